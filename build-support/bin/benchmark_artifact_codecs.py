@@ -0,0 +1,86 @@
+#!/usr/bin/env python2.7
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+# Compares the artifact cache compression codecs and levels on real build outputs, eg the
+# results dirs of zinc or javac compiles under .pants.d/compile.
+#
+# usage: PYTHONPATH=src/python build-support/bin/benchmark_artifact_codecs.py dir1 [ dir2 [ ... ] ]
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import time
+
+from pants.cache.artifact import TarballArtifact
+from pants.util.contextutil import temporary_dir
+
+
+# The (codec, level) pairs to compare.
+CONFIGURATIONS = [
+  (TarballArtifact.UNCOMPRESSED, None),
+  (TarballArtifact.GZIP, 1),
+  (TarballArtifact.GZIP, 5),
+  (TarballArtifact.GZIP, 9),
+  (TarballArtifact.LZ4, 0),
+  (TarballArtifact.LZ4, 9),
+  (TarballArtifact.ZSTD, 1),
+  (TarballArtifact.ZSTD, 3),
+  (TarballArtifact.ZSTD, 9),
+  (TarballArtifact.ZSTD, 19),
+]
+
+
+def du(path):
+  total = 0
+  for root, _, files in os.walk(path):
+    for f in files:
+      total += os.path.getsize(os.path.join(root, f))
+  return total
+
+
+def benchmark(directory, codec, level, iterations):
+  """Returns the best (collect secs, extract secs) over the iterations, and the tarball size."""
+  artifact_root = os.path.dirname(os.path.abspath(directory))
+  collect_times = []
+  extract_times = []
+  with temporary_dir() as tmpdir:
+    tarball = os.path.join(tmpdir, 'artifact.tgz')
+    for _ in range(iterations):
+      artifact = TarballArtifact(artifact_root, tarball, compression=level, codec=codec)
+      start = time.time()
+      artifact.collect([os.path.abspath(directory)])
+      collect_times.append(time.time() - start)
+
+      with temporary_dir() as extract_root:
+        start = time.time()
+        TarballArtifact(extract_root, tarball).extract()
+        extract_times.append(time.time() - start)
+    size = os.path.getsize(tarball)
+  return min(collect_times), min(extract_times), size
+
+
+def main(args):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('directories', nargs='+', help='Directories of build outputs to cache.')
+  parser.add_argument('--iterations', type=int, default=3,
+                      help='The best time of this many runs is reported.')
+  options = parser.parse_args(args)
+
+  row = '{:<40} {:>8} {:>12} {:>12} {:>14} {:>7}'
+  print(row.format('directory', 'codec', 'collect(s)', 'extract(s)', 'size(bytes)', 'ratio'))
+  for directory in options.directories:
+    raw_size = du(directory)
+    for codec, level in CONFIGURATIONS:
+      collect_secs, extract_secs, size = benchmark(directory, codec, level, options.iterations)
+      name = codec if level is None else '{}-{}'.format(codec, level)
+      print(row.format(directory[-40:], name, '{:.3f}'.format(collect_secs),
+                       '{:.3f}'.format(extract_secs), size,
+                       '{:.2f}'.format(size / raw_size if raw_size else 0)))
+
+
+if __name__ == '__main__':
+  main(sys.argv[1:])
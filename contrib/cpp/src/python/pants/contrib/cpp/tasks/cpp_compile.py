@@ -4,17 +4,42 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import multiprocessing
 import os
+import re
+from hashlib import sha1
 
 from pants.base.build_environment import get_buildroot
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
-from pants.util.dirutil import safe_mkdir_for
+from pants.util.dirutil import read_file, safe_file_dump, safe_mkdir_for
 
 from pants.contrib.cpp.tasks.cpp_task import CppTask
 
 
+def parse_depfile(path):
+  """Parses a make-style dependency file, as written by `gcc -MD`.
+
+  :param string path: The path of the dependency file.
+  :returns: The prerequisites of the first rule in the file (for a compile, the source followed by
+            each header it includes), or None if the file is malformed.
+  """
+  content = read_file(path).replace('\\\n', ' ')
+  rule = content.split('\n', 1)[0]
+  _, sep, prerequisites = rule.partition(': ')
+  if not sep:
+    return None
+  return [p.replace('\\ ', ' ') for p in re.split(r'(?<!\\)\s+', prerequisites.strip()) if p]
+
+
 class CppCompile(CppTask):
-  """Compile C++ sources into object files."""
+  """Compile C++ sources into object files.
+
+  Each invalid translation unit is compiled separately, concurrently with the others. Next to each
+  object file we keep the header dependencies the compiler reported for it, along with a
+  fingerprint of the compile command and the content of the source and those headers. When a
+  target is invalidated, only the translation units whose fingerprint changed are recompiled.
+  """
 
   @classmethod
   def register_options(cls, register):
@@ -25,6 +50,8 @@ class CppCompile(CppTask):
              default=['.cc', '.cxx', '.cpp'],
              help=('The list of extensions to consider when determining if a file is a '
                    'C++ source file.'))
+    register('--worker-count', advanced=True, type=int, default=multiprocessing.cpu_count(),
+             help='The number of translation units to compile concurrently.')
 
   @classmethod
   def product_types(cls):
@@ -34,6 +61,15 @@ class CppCompile(CppTask):
   def cache_target_dirs(self):
     return True
 
+  @property
+  def incremental(self):
+    # The objects of unchanged translation units are reused from the previous results.
+    return True
+
+  def __init__(self, *args, **kwargs):
+    super(CppCompile, self).__init__(*args, **kwargs)
+    self._file_digests = {}
+
   def execute(self):
     """Compile all sources in a given target to object files."""
 
@@ -46,19 +82,30 @@ class CppCompile(CppTask):
     # Compile source files to objects.
     with self.invalidated(targets, invalidate_dependents=True) as invalidation_check:
       obj_mapping = self.context.products.get('objs')
+      compiles = []
       for vt in invalidation_check.all_vts:
         for source in vt.target.sources_relative_to_buildroot():
           if is_cc(source):
             if not vt.valid:
-              with self.context.new_workunit(name='cpp-compile', labels=[WorkUnitLabel.MULTITOOL]):
-                # TODO: Parallelise the compilation.
-                # TODO: Only recompile source files that have changed since the
-                #       object file was last written. Also use the output from
-                #       gcc -M to track dependencies on headers.
-                self._compile(vt.target, vt.results_dir, source)
+              compiles.append((vt.target, vt.results_dir, source))
             objpath = self._objpath(vt.target, vt.results_dir, source)
             obj_mapping.add(vt.target, vt.results_dir).append(objpath)
 
+      stale_compiles = [compile_args for compile_args in compiles
+                        if not self._is_up_to_date(*compile_args)]
+      self.context.log.debug('Compiling {} of {} invalid c++ sources.'
+                             .format(len(stale_compiles), len(compiles)))
+      if stale_compiles:
+        with self.context.new_workunit(name='cpp-compile',
+                                       labels=[WorkUnitLabel.MULTITOOL]) as workunit:
+          worker_pool = WorkerPool(workunit, self.context.run_tracker,
+                                   self.get_options().worker_count)
+          try:
+            worker_pool.submit_work_and_wait(Work(self._compile, stale_compiles),
+                                             workunit_parent=workunit)
+          finally:
+            worker_pool.shutdown()
+
   def _objpath(self, target, results_dir, source):
     abs_source_root = os.path.join(get_buildroot(), target.target_base)
     abs_source = os.path.join(get_buildroot(), source)
@@ -68,11 +115,44 @@ class CppCompile(CppTask):
 
     return os.path.join(results_dir, obj_name)
 
-  def _compile(self, target, results_dir, source):
-    """Compile given source to an object file."""
+  def _depfile(self, obj):
+    return obj + '.d'
+
+  def _fingerprint_file(self, obj):
+    return obj + '.fingerprint'
+
+  def _file_digest(self, path):
+    # Headers are typically included by many translation units, so only hash them once.
+    if path not in self._file_digests:
+      with open(path, 'rb') as fh:
+        self._file_digests[path] = sha1(fh.read()).hexdigest()
+    return self._file_digests[path]
+
+  def _fingerprint(self, target, source, dependencies):
+    """Fingerprints the compile command of a source, and the content of the files it reads."""
+    hasher = sha1()
+    for arg in self._compile_command(target, source):
+      hasher.update(arg.encode('utf-8'))
+      hasher.update(b'\0')
+    for dependency in dependencies:
+      hasher.update(dependency.encode('utf-8'))
+      hasher.update(self._file_digest(dependency).encode('utf-8'))
+    return hasher.hexdigest()
+
+  def _is_up_to_date(self, target, results_dir, source):
+    """Whether the object file of the source, cloned from the previous results, is up to date."""
     obj = self._objpath(target, results_dir, source)
-    safe_mkdir_for(obj)
-
+    depfile = self._depfile(obj)
+    fingerprint_file = self._fingerprint_file(obj)
+    if not all(os.path.isfile(path) for path in (obj, depfile, fingerprint_file)):
+      return False
+    dependencies = parse_depfile(depfile)
+    if not dependencies or not all(os.path.isfile(d) for d in dependencies):
+      return False
+    return read_file(fingerprint_file) == self._fingerprint(target, source, dependencies)
+
+  def _compile_command(self, target, source):
+    """Returns the command to compile the given source, without its output arguments."""
     abs_source = os.path.join(get_buildroot(), source)
 
     # TODO: include dir should include dependent work dir when headers are copied there.
@@ -84,11 +164,25 @@ class CppCompile(CppTask):
     cmd = [self.cpp_toolchain.compiler]
     cmd.extend(['-c'])
     cmd.extend(('-I{0}'.format(i) for i in include_dirs))
-    cmd.extend(['-o' + obj, abs_source])
+    cmd.append(abs_source)
     cmd.extend(self.get_options().cc_options)
+    return cmd
+
+  def _compile(self, target, results_dir, source):
+    """Compile given source to an object file."""
+    obj = self._objpath(target, results_dir, source)
+    safe_mkdir_for(obj)
+    depfile = self._depfile(obj)
+
+    # Have the compiler write the headers the source includes to a dependency file as it compiles.
+    cmd = self._compile_command(target, source)
+    cmd.extend(['-o' + obj, '-MD', '-MF', depfile])
 
-    # TODO: submit_async_work with self.run_command, [(cmd)] as a Work object.
     with self.context.new_workunit(name='cpp-compile', labels=[WorkUnitLabel.COMPILER]) as workunit:
       self.run_command(cmd, workunit)
 
+    dependencies = parse_depfile(depfile)
+    if dependencies:
+      safe_file_dump(self._fingerprint_file(obj), self._fingerprint(target, source, dependencies))
+
     self.context.log.info('Built c++ object: {0}'.format(obj))
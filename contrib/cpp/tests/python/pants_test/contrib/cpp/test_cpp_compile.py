@@ -0,0 +1,44 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import unittest
+
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+from pants.contrib.cpp.tasks.cpp_compile import parse_depfile
+
+
+class ParseDepfileTest(unittest.TestCase):
+
+  def parse(self, content):
+    with temporary_dir() as tmpdir:
+      depfile = os.path.join(tmpdir, 'foo.o.d')
+      safe_file_dump(depfile, content)
+      return parse_depfile(depfile)
+
+  def test_single_line(self):
+    self.assertEqual(['src/foo.cpp', 'include/foo.h'],
+                     self.parse('out/foo.o: src/foo.cpp include/foo.h\n'))
+
+  def test_continuation_lines(self):
+    self.assertEqual(['src/foo.cpp', 'include/foo.h', '/usr/include/stdio.h'],
+                     self.parse('out/foo.o: src/foo.cpp \\\n'
+                                ' include/foo.h \\\n'
+                                '  /usr/include/stdio.h\n'))
+
+  def test_escaped_spaces(self):
+    self.assertEqual(['src/foo bar.cpp', 'include/foo.h'],
+                     self.parse('out/foo.o: src/foo\\ bar.cpp include/foo.h\n'))
+
+  def test_only_first_rule(self):
+    # `-MP` adds a phony rule for each header.
+    self.assertEqual(['src/foo.cpp', 'include/foo.h'],
+                     self.parse('out/foo.o: src/foo.cpp include/foo.h\n\ninclude/foo.h:\n'))
+
+  def test_malformed(self):
+    self.assertIsNone(self.parse('garbage'))
@@ -4,15 +4,20 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import json
+import os
 import re
 from collections import namedtuple
+from hashlib import sha1
 
 from pants.backend.python.targets.python_target import PythonTarget
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.option.custom_types import file_option
+from pants.source.source_digest_cache import SourceDigestCache
 from pants.task.lint_task_mixin import LintTaskMixin
 from pants.task.task import Task
+from pants.util.dirutil import read_file, safe_concurrent_creation, safe_file_dump
 from pex.interpreter import PythonInterpreter
 
 from pants.contrib.python.checks.tasks.checkstyle.common import CheckSyntaxError, Nit, PythonFile
@@ -31,6 +36,11 @@ class LintPlugin(namedtuple('_LintPlugin', ['name', 'subsystem'])):
   def checker(self, python_file):
     return self.subsystem.global_instance().get_plugin(python_file)
 
+  def spec(self):
+    """Returns a picklable `(name, plugin type, options)` triple, as run by `check_file_nits`."""
+    subsystem = self.subsystem.global_instance()
+    return self.name, subsystem.get_plugin_type(), subsystem.get_options()
+
 
 def line_contains_noqa(line):
   return _NOQA_LINE_SEARCH(line) is not None
@@ -40,6 +50,32 @@ def noqa_file_filter(python_file):
   return any(_NOQA_FILE_SEARCH(line) is not None for line in python_file.lines)
 
 
+def check_file_nits(args):
+  """Parses a python file once and runs the given plugins over it.
+
+  This is a module-level function so that it may be run in a subprocess pool.
+
+  :param args: A tuple of the filename relative to the root, the root, and the specs of the
+               plugins to run, as returned by `LintPlugin.spec`.
+  :returns: A list of `(plugin name, Nit)` pairs, where the plugin name is None for a syntax error.
+  """
+  filename, root, plugin_specs = args
+  try:
+    python_file = PythonFile.parse(filename, root=root)
+  except CheckSyntaxError as e:
+    return [(None, e.as_nit())]
+
+  if noqa_file_filter(python_file):
+    return []
+
+  nits = []
+  for name, plugin_type, options in plugin_specs:
+    for nit in plugin_type(options, python_file):
+      if not nit.has_lines_to_display or all(not line_contains_noqa(line) for line in nit.lines):
+        nits.append((name, nit))
+  return nits
+
+
 class PythonCheckStyleTask(LintTaskMixin, Task):
   _PYTHON_SOURCE_EXTENSION = '.py'
   _plugins = []
@@ -70,6 +106,9 @@ class PythonCheckStyleTask(LintTaskMixin, Task):
              help='Takes a text file where specific rules on specific files will be skipped.')
     register('--fail', fingerprint=True, default=True, type=bool,
              help='Prevent test failure but still produce output for problems.')
+    register('--parallel', advanced=True, default=True, type=bool,
+             help='Check files in the pool of foreground subprocesses, whose size is set by '
+                  '--run-tracker-num-foreground-workers.')
 
   @classmethod
   def supports_passthru_args(cls):
@@ -95,54 +134,43 @@ class PythonCheckStyleTask(LintTaskMixin, Task):
     cls._plugins.append(plugin)
     cls._subsystems += (plugin.subsystem, )
 
-  def get_nits(self, filename):
-    """Iterate over the instances style checker and yield Nits.
-
-    :param filename: str pointing to a file within the buildroot.
-    """
-    try:
-      python_file = PythonFile.parse(filename, root=get_buildroot())
-    except CheckSyntaxError as e:
-      yield e.as_nit()
-      return
-
-    if noqa_file_filter(python_file):
-      return
-
+  def _check_plugins(self, filename):
     if self.options.suppress:
       # Filter out any suppressed plugins
-      check_plugins = [plugin for plugin in self._plugins
-                       if self.excluder.should_include(filename, plugin.name)]
-    else:
-      check_plugins = self._plugins
-
-    for plugin in check_plugins:
-
-      for i, nit in enumerate(plugin.checker(python_file)):
-        if i == 0:
-          # NB: Add debug log header for nits from each plugin, but only if there are nits from it.
-          self.context.log.debug('Nits from plugin {} for {}'.format(plugin.name, filename))
+      return [plugin for plugin in self._plugins
+              if self.excluder.should_include(filename, plugin.name)]
+    return self._plugins
 
-        if not nit.has_lines_to_display:
-          yield nit
-          continue
+  def _check_args(self, filename):
+    return filename, get_buildroot(), [plugin.spec() for plugin in self._check_plugins(filename)]
 
-        if all(not line_contains_noqa(line) for line in nit.lines):
-          yield nit
+  def _log_plugin_nits(self, filename, plugin_nits):
+    logged_plugins = set()
+    for plugin_name, _ in plugin_nits:
+      if plugin_name and plugin_name not in logged_plugins:
+        # NB: Add debug log header for nits from each plugin, but only if there are nits from it.
+        self.context.log.debug('Nits from plugin {} for {}'.format(plugin_name, filename))
+        logged_plugins.add(plugin_name)
 
-  def check_file(self, filename):
-    """Process python file looking for indications of problems.
+  def get_nits(self, filename):
+    """Iterate over the instances style checker and yield Nits.
 
-    :param filename: (str) Python source filename
-    :return: (int) number of failures
+    :param filename: str pointing to a file within the buildroot.
     """
+    plugin_nits = check_file_nits(self._check_args(filename))
+    self._log_plugin_nits(filename, plugin_nits)
+    for _, nit in plugin_nits:
+      yield nit
+
+  def _report_nits(self, nits):
+    """Prints the nits at or above the severity threshold, and returns the number of failures."""
     # If the user specifies an invalid severity use comment.
     log_threshold = Nit.SEVERITY.get(self.options.severity, Nit.COMMENT)
 
     failure_count = 0
     fail_threshold = Nit.WARNING if self.options.strict else Nit.ERROR
 
-    for i, nit in enumerate(self.get_nits(filename)):
+    for i, nit in enumerate(nits):
       if i == 0:
         print()  # Add an extra newline to clean up the output only if we have nits.
       if nit.severity >= log_threshold:
@@ -151,6 +179,77 @@ class PythonCheckStyleTask(LintTaskMixin, Task):
         failure_count += 1
     return failure_count
 
+  def check_file(self, filename):
+    """Process python file looking for indications of problems.
+
+    :param filename: (str) Python source filename
+    :return: (int) number of failures
+    """
+    return self._report_nits(self.get_nits(filename))
+
+  @property
+  def _nits_cache_path(self):
+    return os.path.join(self.workdir, 'nits.json')
+
+  def _load_nits_cache(self):
+    """Returns a dict from filename to the key its nits were recorded under, and those nits."""
+    if not os.path.exists(self._nits_cache_path):
+      return {}
+    try:
+      return json.loads(read_file(self._nits_cache_path))
+    except ValueError as e:
+      self.context.log.debug('Ignoring unreadable nits cache {}: {}'
+                             .format(self._nits_cache_path, e))
+      return {}
+
+  def _store_nits_cache(self, nits_cache):
+    with safe_concurrent_creation(self._nits_cache_path) as tmp_path:
+      safe_file_dump(tmp_path, json.dumps(nits_cache))
+
+  def _nits_cache_keys(self, filenames):
+    """Returns the keys the nits of the given files are cached under.
+
+    A key covers the content of the file and the plugins that check it, along with their options.
+    """
+    buildroot = get_buildroot()
+    digests = SourceDigestCache.digests_for([os.path.join(buildroot, f) for f in filenames])
+    keys = []
+    for filename, digest in zip(filenames, digests):
+      hasher = sha1()
+      hasher.update(self.fingerprint)
+      hasher.update(filename.encode('utf-8'))
+      hasher.update(digest)
+      for plugin in self._check_plugins(filename):
+        hasher.update(plugin.name)
+      keys.append(hasher.hexdigest())
+    return keys
+
+  def _nits_by_file(self, filenames):
+    """Returns a dict from each of the given files to its nits.
+
+    Files whose nits were recorded under the same key by a previous run are not checked again.
+    The remaining files are checked in the pool of foreground subprocesses, if enabled.
+    """
+    nits_cache = self._load_nits_cache()
+    keys = dict(zip(filenames, self._nits_cache_keys(filenames)))
+    unchecked = [f for f in filenames if nits_cache.get(f, {}).get('key') != keys[f]]
+    self.context.log.debug('Checking {} of {} python files.'
+                           .format(len(unchecked), len(filenames)))
+
+    if unchecked:
+      check_args = [self._check_args(filename) for filename in unchecked]
+      if self.options.parallel and len(unchecked) > 1:
+        results = self.context.subproc_map(check_file_nits, check_args)
+      else:
+        results = [check_file_nits(args) for args in check_args]
+      for filename, plugin_nits in zip(unchecked, results):
+        self._log_plugin_nits(filename, plugin_nits)
+        nits_cache[filename] = {'key': keys[filename],
+                                'nits': [nit.to_dict() for _, nit in plugin_nits]}
+      self._store_nits_cache(nits_cache)
+
+    return {f: [Nit.from_dict(d) for d in nits_cache[f]['nits']] for f in filenames}
+
   def checkstyle(self, sources):
     """Iterate over sources and run checker on each file.
 
@@ -160,9 +259,11 @@ class PythonCheckStyleTask(LintTaskMixin, Task):
     :param sources: iterable containing source file names.
     :return: (int) number of failures
     """
+    filenames = sorted(sources)
+    nits_by_file = self._nits_by_file(filenames)
     failure_count = 0
-    for filename in sources:
-      failure_count += self.check_file(filename)
+    for filename in filenames:
+      failure_count += self._report_nits(nits_by_file[filename])
 
     if failure_count > 0 and self.options.fail:
       raise TaskError(
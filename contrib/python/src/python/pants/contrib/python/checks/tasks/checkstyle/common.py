@@ -100,6 +100,7 @@ class PythonFile(object):
     self.tree = tree
     self.lines = OffByOneList(self._blob.split('\n'))
     self.filename = filename
+    self._tokens = None
     self.logical_lines = dict((start, (start, stop, indent))
         for start, stop, indent in self.iter_logical_lines(self._blob))
 
@@ -158,7 +159,10 @@ class PythonFile(object):
   @property
   def tokens(self):
     """An iterator over tokens for this Python file from the tokenize module."""
-    return self.iter_tokens(self._blob)
+    # Tokenize only once: the tokens are shared by the logical lines and by every plugin.
+    if self._tokens is None:
+      self._tokens = list(self.iter_tokens(self._blob))
+    return iter(self._tokens)
 
   @staticmethod
   def translate_logical_line(start, end, contents, indent_stack, endmarker=False):
@@ -182,7 +186,8 @@ class PythonFile(object):
     indent_stack = []
     contents = []
     line_number_start = None
-    for token in self.iter_tokens(blob):
+    tokens = self.tokens if blob == self._blob else self.iter_tokens(blob)
+    for token in tokens:
       token_type, token_text, token_start = token[0:3]
       if token_type == tokenize.INDENT:
         indent_stack.append(token_text)
@@ -300,6 +305,22 @@ class Nit(object):
   def has_lines_to_display(self):
     return len(self.lines) > 0
 
+  def to_dict(self):
+    """Returns a json-serializable representation of this nit, as read by `from_dict`."""
+    line_range = [self._line_range.start, self._line_range.stop] if self._line_range else None
+    return {'code': self.code,
+            'severity': self.severity,
+            'filename': self.filename,
+            'message': self._message,
+            'line_range': line_range,
+            'lines': list(self.lines)}
+
+  @classmethod
+  def from_dict(cls, d):
+    line_range = slice(*d['line_range']) if d['line_range'] else None
+    return cls(d['code'], d['severity'], d['filename'], d['message'],
+               line_range=line_range, lines=d['lines'] or None)
+
 
 class CheckSyntaxError(Exception):
   def __init__(self, syntax_error, blob, filename):
@@ -6,10 +6,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from textwrap import dedent
 
+import mock
 from pants.backend.python.targets.python_library import PythonLibrary
 from pants.base.exceptions import TaskError
 from pants_test.backend.python.tasks.python_task_test_base import PythonTaskTestBase
 
+from pants.contrib.python.checks.tasks.checkstyle import checker
 from pants.contrib.python.checks.tasks.checkstyle.checker import PythonCheckStyleTask
 from pants.contrib.python.checks.tasks.checkstyle.print_statements_subsystem import \
   PrintStatementsSubsystem
@@ -138,3 +140,23 @@ class PythonCheckStyleTaskTest(PythonTaskTestBase):
       """     |print ('Multi'\n"""
       """     |       'line') + 'expression'""",
       str(nits[0]))
+
+  def test_unchanged_files_not_rechecked(self):
+    self.create_file('a/python/fail.py', contents=dedent("""
+                         print 'Print should not be used as a statement'
+                       """))
+    self.create_file('a/python/pass.py', contents=dedent("""
+                         print('Print is a function')
+                       """))
+    self.set_options(fail=False)
+    task = self.create_task(self.context())
+    self.assertEqual(1, task.checkstyle(['a/python/fail.py', 'a/python/pass.py']))
+
+    with mock.patch.object(checker, 'check_file_nits') as check_file_nits:
+      self.assertEqual(1, task.checkstyle(['a/python/fail.py', 'a/python/pass.py']))
+      self.assertFalse(check_file_nits.called)
+
+    self.create_file('a/python/pass.py', contents=dedent("""
+                         print 'Print should not be used as a statement'
+                       """))
+    self.assertEqual(2, task.checkstyle(['a/python/fail.py', 'a/python/pass.py']))
@@ -5,6 +5,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import ast
+import json
 import textwrap
 import unittest
 
@@ -142,6 +143,18 @@ class CommonTest(unittest.TestCase):
       error = self._plugin_for_testing().error(*code_test_input)
       self.assertEqual(code_test_expected, error.code)
 
+  def test_nit_dict_roundtrip(self):
+    for nit in [self._plugin_for_testing().error('A123', 'Uh-oh this is bad', 2),
+                self._plugin_for_testing().warning('A123', 'No worries, its just a warning')]:
+      roundtripped = Nit.from_dict(json.loads(json.dumps(nit.to_dict())))
+      self.assertEqual(str(nit), str(roundtripped))
+      self.assertEqual(nit.severity, roundtripped.severity)
+
+  def test_tokens_shared(self):
+    python_file = self._python_file_for_testing()
+    self.assertEqual(list(python_file.tokens), list(python_file.tokens))
+    self.assertIs(python_file.tokens.next(), python_file.tokens.next())
+
   def test_error_severity(self):
     """Test that we get Nit.Error when calling error."""
     error = self._plugin_for_testing().error('A123', 'Uh-oh this is bad')
@@ -5,9 +5,12 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import json
+import os
 from collections import defaultdict
 
 from pants.base.specs import DescendantAddresses
+from pants.engine.legacy.dependees_index import DependeesIndex
+from pants.engine.legacy.graph import LegacyBuildGraph
 from pants.task.console_task import ConsoleTask
 
 
@@ -32,34 +35,51 @@ class ReverseDepmap(ConsoleTask):
     self._closed = self.get_options().closed
 
   def console_output(self, _):
-    dependees_by_target = defaultdict(set)
-    for address in self.context.build_graph.inject_specs_closure([DescendantAddresses('')]):
-      target = self.context.build_graph.get_target(address)
-      # TODO(John Sirois): tighten up the notion of targets written down in a BUILD by a
-      # user vs. targets created by pants at runtime.
-      concrete_target = self.get_concrete_target(target)
-      for dependency in concrete_target.dependencies:
-        dependency = self.get_concrete_target(dependency)
-        dependees_by_target[dependency].add(concrete_target)
-
-    roots = set(self.context.target_roots)
+    roots = set(self.get_concrete_target(root).address for root in self.context.target_roots)
+    get_dependents = self._dependents_getter()
     if self.get_options().output_format == 'json':
       deps = defaultdict(list)
       for root in roots:
         if self._closed:
-          deps[root.address.spec].append(root.address.spec)
-        for dependent in self.get_dependents(dependees_by_target, [root]):
-          deps[root.address.spec].append(dependent.address.spec)
+          deps[root.spec].append(root.spec)
+        for dependent in get_dependents([root]):
+          deps[root.spec].append(dependent.spec)
       for address in deps.keys():
         deps[address].sort()
       yield json.dumps(deps, indent=4, separators=(',', ': '), sort_keys=True)
     else:
       if self._closed:
         for root in roots:
-          yield root.address.spec
+          yield root.spec
+
+      for dependent in get_dependents(roots):
+        yield dependent.spec
 
-      for dependent in self.get_dependents(dependees_by_target, roots):
-        yield dependent.address.spec
+  def _dependents_getter(self):
+    """Returns a function from root addresses to the addresses of their dependees."""
+    build_graph = self.context.build_graph
+    if isinstance(build_graph, LegacyBuildGraph):
+      # Answer from the persisted index of the dependees of every target in the repo, which only
+      # needs to parse the BUILD files that changed since it was last updated.
+      global_options = self.context.options.for_global_scope()
+      graph = DependeesIndex(self.context.scheduler,
+                             build_graph.target_types,
+                             os.path.join(global_options.pants_workdir, 'dependees'),
+                             build_ignore_patterns=global_options.build_ignore).update()
+      if self._transitive:
+        return lambda roots: set(graph.transitive_dependents_of_addresses(roots))
+      return lambda roots: set(graph.dependents_of_addresses(roots))
+
+    dependees_by_target = defaultdict(set)
+    for address in build_graph.inject_specs_closure([DescendantAddresses('')]):
+      target = build_graph.get_target(address)
+      # TODO(John Sirois): tighten up the notion of targets written down in a BUILD by a
+      # user vs. targets created by pants at runtime.
+      concrete_target = self.get_concrete_target(target)
+      for dependency in concrete_target.dependencies:
+        dependency = self.get_concrete_target(dependency)
+        dependees_by_target[dependency.address].add(concrete_target.address)
+    return lambda roots: self.get_dependents(dependees_by_target, roots)
 
   def get_dependents(self, dependees_by_target, roots):
     check = set(roots)
@@ -112,6 +112,8 @@ class ArtifactClasspathEntry(ClasspathEntry):
     return self._cache_path
 
   def is_excluded_by(self, excludes):
+    if isinstance(excludes, _ExcludeMatcher):
+      return excludes.matches(self.coordinate)
     return any(_matches_exclude(self.coordinate, exclude) for exclude in excludes)
 
   def __hash__(self):
@@ -142,6 +144,25 @@ def _matches_exclude(coordinate, exclude):
   return False
 
 
+class _ExcludeMatcher(object):
+  """A set of excludes, indexed by (org, name) to match coordinates without scanning them all."""
+
+  def __init__(self, excludes):
+    self._excludes = excludes
+    # An exclude without a name excludes the whole org.
+    self._keys = frozenset((exclude.org, exclude.name or None) for exclude in excludes)
+
+  def __iter__(self):
+    return iter(self._excludes)
+
+  def __len__(self):
+    return len(self._excludes)
+
+  def matches(self, coordinate):
+    return ((coordinate.org, None) in self._keys or
+            (coordinate.org, coordinate.name) in self._keys)
+
+
 def _not_excluded_filter(excludes):
   def not_excluded(product_to_target):
     path_tuple = product_to_target[0]
@@ -163,6 +184,23 @@ class ClasspathProducts(object):
     self._classpaths = classpaths or UnionProducts()
     self._excludes = excludes or UnionProducts()
     self._pants_workdir = pants_workdir
+    self._reset_memos()
+
+  def _reset_memos(self):
+    """Forgets the memoized classpaths and excludes, as when products are added or removed."""
+    # The revision of the build graph the memos were computed against.
+    self._memos_revision = None
+    self._transitive_excludes_by_target = {}
+    self._exclude_matcher_by_targets = {}
+    self._classpath_entries_by_targets = {}
+
+  def _check_memos(self, targets):
+    """Forgets the memoized values if the dependencies of the given targets may have changed."""
+    if targets:
+      revision = targets[0]._build_graph.dependencies_revision
+      if revision != self._memos_revision:
+        self._reset_memos()
+        self._memos_revision = revision
 
   @staticmethod
   def init_func(pants_workdir):
@@ -330,6 +368,7 @@ class ClasspathProducts(object):
 
   def remove_for_target(self, target, classpath_elements):
     """Removes the given entries for the target."""
+    self._reset_memos()
     self._classpaths.remove_for_target(target, self._wrap_path_elements(classpath_elements))
 
   def get_for_target(self, target):
@@ -368,9 +407,23 @@ class ClasspathProducts(object):
     :rtype: list of (string, :class:`ClasspathEntry`)
     """
 
-    # remove the duplicate, preserve the ordering.
-    return list(OrderedSet([cp for cp, target in self.get_product_target_mappings_for_targets(
-                            targets, respect_excludes)]))
+    if iter(targets) is targets:
+      # NB: Excludes have never been applied for an iterator of targets, which is consumed before
+      # their closure is walked. Some callers rely on that: see
+      # https://github.com/pantsbuild/pants/issues/4874
+      respect_excludes = False
+    targets = tuple(targets)
+    self._check_memos(targets)
+    key = (targets, respect_excludes)
+    classpath_entries = self._classpath_entries_by_targets.get(key)
+    if classpath_entries is None:
+      # remove the duplicate, preserve the ordering.
+      classpath_entries = list(OrderedSet([cp for cp, target in
+                                           self.get_product_target_mappings_for_targets(
+                                             targets, respect_excludes)]))
+      self._classpath_entries_by_targets[key] = classpath_entries
+    # Callers are free to modify the returned list.
+    return list(classpath_entries)
 
   def get_product_target_mappings_for_targets(self, targets, respect_excludes=True):
     """Gets the classpath products-target associations for the given targets.
@@ -423,6 +476,7 @@ class ClasspathProducts(object):
     """Adds the contents of other to this ClasspathProducts."""
     if self._pants_workdir != other._pants_workdir:
       raise ValueError('Other ClasspathProducts from a different pants workdir {}'.format(other._pants_workdir))
+    self._reset_memos()
     for target, products in other._classpaths._products_by_target.items():
       self._classpaths.add_for_target(target, products)
     for target, products in other._excludes._products_by_target.items():
@@ -431,11 +485,59 @@ class ClasspathProducts(object):
   def _filter_by_excludes(self, classpath_target_tuples, root_targets):
     # Excludes are always applied transitively, so regardless of whether a transitive
     # set of targets was included here, their closure must be included.
-    closure = BuildGraph.closure(root_targets, bfs=True)
-    excludes = self._excludes.get_for_targets(closure)
-    return filter(_not_excluded_filter(excludes), classpath_target_tuples)
+    root_targets = tuple(root_targets)
+    self._check_memos(root_targets)
+    matcher = self._exclude_matcher_by_targets.get(root_targets)
+    if matcher is None:
+      excludes = OrderedSet()
+      for target in root_targets:
+        excludes.update(self._transitive_excludes(target))
+      matcher = _ExcludeMatcher(excludes)
+      self._exclude_matcher_by_targets[root_targets] = matcher
+    if not matcher:
+      return list(classpath_target_tuples)
+    return filter(_not_excluded_filter(matcher), classpath_target_tuples)
+
+  def _transitive_excludes(self, target):
+    """Returns the excludes of the target and its transitive dependencies.
+
+    The excludes of every target walked are memoized, so that the excludes of a target are computed
+    from those of its dependencies rather than by walking its whole closure.
+    """
+    memo = self._transitive_excludes_by_target
+    if target in memo:
+      return memo[target]
+
+    visiting = {target}
+    stack = [(target, iter(target.dependencies))]
+    while stack:
+      current, dependencies = stack[-1]
+      for dependency in dependencies:
+        if dependency not in memo:
+          if dependency in visiting:
+            # A dependency cycle: the excludes of its members cannot be computed from each other.
+            closure = BuildGraph.closure([target], bfs=True)
+            return frozenset(self._excludes.get_for_targets(closure))
+          visiting.add(dependency)
+          stack.append((dependency, iter(dependency.dependencies)))
+          break
+      else:
+        stack.pop()
+        memo[current] = self._union_excludes(self._excludes.get_for_target(current),
+                                             [memo[d] for d in current.dependencies])
+    return memo[target]
+
+  @staticmethod
+  def _union_excludes(excludes, dependency_excludes):
+    union = frozenset(excludes).union(*dependency_excludes)
+    # Most targets add no excludes of their own: share the set of a dependency where possible.
+    for dependency_set in dependency_excludes:
+      if len(dependency_set) == len(union):
+        return dependency_set
+    return union
 
   def _add_excludes_for_target(self, target):
+    self._reset_memos()
     if isinstance(target, ExportableJvmLibrary) and target.provides:
       self._excludes.add_for_target(target, [Exclude(target.provides.org,
                                                      target.provides.name)])
@@ -446,6 +548,7 @@ class ClasspathProducts(object):
     return [(element[0], ClasspathEntry(element[1])) for element in classpath_elements]
 
   def _add_elements_for_target(self, target, elements):
+    self._reset_memos()
     self._validate_classpath_tuples(elements, target)
     self._classpaths.add_for_target(target, elements)
 
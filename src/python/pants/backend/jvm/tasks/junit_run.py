@@ -8,12 +8,16 @@ import fnmatch
 import functools
 import itertools
 import os
+import random
 import shutil
 import sys
+import threading
 from abc import abstractmethod
+from collections import defaultdict
 from contextlib import contextmanager
 
-from six.moves import range
+import six
+from six.moves import queue, range
 from twitter.common.collections import OrderedSet
 
 from pants.backend.jvm import argfile
@@ -28,20 +32,24 @@ from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.backend.jvm.tasks.reports.junit_html_report import JUnitHtmlReport, NoJunitHtmlReport
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TargetDefinitionException, TaskError
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.files import Files
 from pants.build_graph.target import Target
 from pants.build_graph.target_scopes import Scopes
 from pants.java.distribution.distribution import DistributionLocator
 from pants.java.executor import SubprocessExecutor
+from pants.java.jar.jar_dependency import JarDependency
 from pants.java.junit.junit_xml_parser import RegistryOfTests, Test, parse_failed_targets
+from pants.java.nailgun_executor import NailgunExecutor
 from pants.process.lock import OwnerPrintingInterProcessFileLock
 from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestResult
 from pants.util import desktop
 from pants.util.argutil import ensure_arg, remove_arg
 from pants.util.contextutil import environment_as, temporary_dir
 from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_rmtree, safe_walk
-from pants.util.memo import memoized_method
+from pants.util.job_durations import JobDurations
+from pants.util.memo import memoized_method, memoized_property
 from pants.util.meta import AbstractClass
 from pants.util.strutil import pluralize
 
@@ -139,12 +147,49 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
 
   _BATCH_ALL = sys.maxsize
 
+  # Possible execution strategies:
+  NAILGUN = 'nailgun'
+  SUBPROCESS = 'subprocess'
+
   @classmethod
   def register_options(cls, register):
     super(JUnitRun, cls).register_options(register)
 
     register('--batch-size', advanced=True, type=int, default=cls._BATCH_ALL, fingerprint=True,
              help='Run at most this many tests in a single test process.')
+    register('--batch-concurrency', advanced=True, type=int, default=1,
+             help='Run up to this many batches of tests concurrently, each in its own test '
+                  'process. Only applies when --batch-size is set.')
+    register('--balance-batches', advanced=True, type=bool, fingerprint=True,
+             help='Assign tests to batches so that each batch takes a similar amount of time to '
+                  'run, based on how long each test class took in previous runs, rather than '
+                  'batching tests in sorted order. Only applies when --batch-size is set.')
+    register('--execution-strategy', advanced=True, choices=[cls.SUBPROCESS, cls.NAILGUN],
+             default=cls.SUBPROCESS,
+             help='If set to nailgun, tests are run in warm test runner JVMs kept alive across '
+                  'batches and runs, up to --batch-concurrency per combination of classpath, JVM '
+                  'options and java version, to avoid paying JVM startup and warm-up for every '
+                  'batch. Each batch leases a JVM that is not running another batch, but static '
+                  'state survives from one batch to the next, so only use this for tests that do '
+                  'not depend on a fresh JVM. '
+                  'Tests with extra_env_vars, and tests run in a --chroot or in a cwd other than '
+                  'the buildroot, are always run in a subprocess.')
+    register('--nailgun-max-runs', advanced=True, type=int, default=20,
+             help='Replace a warm test runner JVM after it has run this many batches of tests.')
+    register('--nailgun-max-rss-mb', advanced=True, type=int, default=None,
+             help='Replace a warm test runner JVM once its resident memory exceeds this many '
+                  'megabytes.')
+    register('--nailgun-pool-size', advanced=True, type=int, default=4,
+             help='Keep at most this many warm test runner JVMs alive, shutting down the least '
+                  'recently used ones. Should be at least --batch-concurrency, so that concurrent '
+                  'batches do not shut down each other\'s JVMs between batches.')
+    cls.register_jvm_tool(register,
+                          'nailgun-server',
+                          classpath=[
+                            JarDependency(org='com.martiansoftware',
+                                          name='nailgun-server',
+                                          rev='0.9.1'),
+                          ])
     register('--test', type=list, fingerprint=True,
              help='Force running of just these tests.  Tests can be specified using any of: '
                   '[classname], [classname]#[methodname], [filename] or [filename]#[methodname]')
@@ -220,6 +265,13 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     options = self.get_options()
     self._tests_to_run = options.test
     self._batch_size = options.batch_size
+    self._batch_concurrency = options.batch_concurrency
+    self._balance_batches = options.balance_batches
+    # Guards modifications to the environment of the test processes spawned by concurrent batches.
+    self._spawn_lock = threading.Lock()
+    # Ensures that only one batch at a time runs in each warm test runner JVM, by JVM id.
+    self._nailgun_locks = defaultdict(threading.Lock)
+    self._nailgun_locks_lock = threading.Lock()
 
     if options.cwd and self.run_tests_in_chroot:
       raise self.OptionError('Cannot set both `cwd` ({}) and ask for a `chroot` at the same time.'
@@ -302,19 +354,128 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
                                                   if isinstance(target, JvmTarget)],
                                                   self._strict_jvm_version)
 
-  def _spawn(self, distribution, executor=None, *args, **kwargs):
+  def _spawn(self, distribution, executor=None, env_vars=None, *args, **kwargs):
     """Returns a processhandler to a process executing java.
 
     :param Executor executor: the java subprocess executor to use. If not specified, construct
       using the distribution.
     :param Distribution distribution: The JDK or JRE installed.
+    :param dict env_vars: Extra environment variables to set for the process.
     :rtype: ProcessHandler
     """
 
     actual_executor = executor or SubprocessExecutor(distribution)
-    return distribution.execute_java_async(*args,
-                                           executor=actual_executor,
-                                           **kwargs)
+    # NB: The process inherits the environment when it is spawned, so only one batch at a time may
+    # modify it.
+    with self._spawn_lock, environment_as(**(env_vars or {})):
+      return distribution.execute_java_async(*args,
+                                             executor=actual_executor,
+                                             **kwargs)
+
+  @contextmanager
+  def _test_runner_executor(self, distribution, classpath, jvm_options, env_vars, cwd):
+    """Yields the executor to run a batch of tests with, for the duration of the batch."""
+    # A nail sees neither a per-run environment nor a per-run working directory: the JVM's are
+    # fixed when it starts, in the buildroot.
+    if (self.get_options().execution_strategy != self.NAILGUN or env_vars or
+        os.path.realpath(cwd) != os.path.realpath(get_buildroot())):
+      yield SubprocessExecutor(distribution)
+      return
+
+    nailgun_classpath = self.tool_classpath('nailgun-server')
+    fingerprint = NailgunExecutor._fingerprint(jvm_options, nailgun_classpath + list(classpath),
+                                               distribution.version)
+    with self._lease_nailgun_jvm(fingerprint) as jvm_id:
+      executor = self._nailgun_executor(jvm_id, distribution, nailgun_classpath)
+      # Mark the JVM as the most recently used, and shut down any in excess of the pool size.
+      safe_mkdir(self._nailgun_workdir(jvm_id))
+      os.utime(self._nailgun_workdir(jvm_id), None)
+      self._evict_nailgun_executors(distribution)
+      yield executor
+
+  @contextmanager
+  def _lease_nailgun_jvm(self, fingerprint):
+    """Leases a test runner JVM with the given fingerprint that is not running another batch.
+
+    Up to --batch-concurrency JVMs are kept per fingerprint, so that concurrent batches with the
+    same classpath and JVM options each run in their own. Lower numbered JVMs are preferred, as they
+    have run the most batches and so are the warmest.
+
+    :returns: A context manager yielding the id of the leased JVM, which is held until it exits.
+    """
+    jvm_ids = ['{}-{}'.format(fingerprint, i) for i in range(max(1, self._batch_concurrency))]
+    for jvm_id in jvm_ids:
+      with self._nailgun_lock(jvm_id, blocking=False) as acquired:
+        if acquired:
+          yield jvm_id
+          return
+    # Every JVM is running a batch for another pants run: wait for one of them.
+    jvm_id = random.choice(jvm_ids)
+    with self._nailgun_lock(jvm_id):
+      yield jvm_id
+
+  @contextmanager
+  def _nailgun_lock(self, jvm_id, blocking=True):
+    """Locks the test runner JVM with the given id, so that it runs one batch at a time.
+
+    The JVMs are shared by concurrent pants runs using the same workdir, so the lock is held both
+    within this process and on a lock file beside the JVM's workdir.
+
+    :param bool blocking: Whether to wait for the lock if it is held.
+    :returns: A context manager yielding whether the lock was acquired, which is always the case
+              when `blocking`.
+    """
+    with self._nailgun_locks_lock:
+      thread_lock = self._nailgun_locks[jvm_id]
+    if not thread_lock.acquire(blocking):
+      yield False
+      return
+    try:
+      # NB: The lock file is kept when a JVM is shut down, since another process may be waiting on
+      # it, and so it must not be inside the JVM's workdir.
+      file_lock = OwnerPrintingInterProcessFileLock(self._nailgun_workdir(jvm_id) + '.lock')
+      message_fn = self.context.log.info if blocking else lambda message: None
+      if not file_lock.acquire(message_fn=message_fn, blocking=blocking):
+        yield False
+        return
+      try:
+        yield True
+      finally:
+        file_lock.release()
+    finally:
+      thread_lock.release()
+
+  def _nailgun_workdir(self, jvm_id):
+    return os.path.join(self.get_options().pants_workdir, 'ng', self.__class__.__name__, jvm_id)
+
+  def _nailgun_executor(self, jvm_id, distribution, nailgun_classpath):
+    max_rss_mb = self.get_options().nailgun_max_rss_mb
+    return NailgunExecutor('_'.join(('ng', self.__class__.__name__, jvm_id)),
+                           self._nailgun_workdir(jvm_id),
+                           nailgun_classpath,
+                           distribution,
+                           max_runs=self.get_options().nailgun_max_runs,
+                           max_rss=max_rss_mb * 1024 * 1024 if max_rss_mb else None)
+
+  def _evict_nailgun_executors(self, distribution):
+    pool_dir = os.path.dirname(self._nailgun_workdir(''))
+    jvm_ids = [name for name in os.listdir(pool_dir) if os.path.isdir(os.path.join(pool_dir, name))]
+    jvm_ids.sort(key=lambda jvm_id: os.path.getmtime(os.path.join(pool_dir, jvm_id)), reverse=True)
+    for jvm_id in jvm_ids[self.get_options().nailgun_pool_size:]:
+      with self._nailgun_lock(jvm_id, blocking=False) as acquired:
+        # Leave JVMs that are running a batch of tests, in this run or another, alone.
+        if not acquired:
+          continue
+        # Another run may have shut the JVM down since we listed it.
+        workdir = os.path.join(pool_dir, jvm_id)
+        if not os.path.isdir(workdir):
+          continue
+        try:
+          self.context.log.debug('Shutting down test runner JVM {}.'.format(jvm_id))
+          self._nailgun_executor(jvm_id, distribution, []).terminate()
+          safe_rmtree(workdir)
+        except NailgunExecutor.NonResponsiveProcess as e:
+          self.context.log.warn('Failed to shut down test runner JVM {}: {}'.format(jvm_id, e))
 
   def execute_java_for_coverage(self, targets, *args, **kwargs):
     """Execute java for targets directly and don't use the test mixin.
@@ -403,8 +564,7 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     # back to runtime_classpath
     classpath_product = self.context.products.get_data('instrument_classpath')
 
-    result = 0
-    for batch_id, (properties, batch) in enumerate(self._iter_batches(test_registry)):
+    def run_batch(batch_id, properties, batch):
       (workdir, platform, target_jvm_options, target_env_vars, concurrency, threads) = properties
 
       batch_output_dir = output_dir
@@ -449,34 +609,46 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         with self._chroot(relevant_targets, workdir) as chroot:
           self.context.log.debug('CWD = {}'.format(chroot))
           self.context.log.debug('platform = {}'.format(platform))
-          with environment_as(**dict(target_env_vars)):
+          jvm_options = self.jvm_options + extra_jvm_options + list(target_jvm_options)
+          with self._test_runner_executor(distribution, complete_classpath, jvm_options,
+                                          target_env_vars, chroot) as executor:
             subprocess_result = self._spawn_and_wait(
-              executor=SubprocessExecutor(distribution),
+              executor=executor,
               distribution=distribution,
+              env_vars=dict(target_env_vars),
               classpath=complete_classpath,
               main=JUnit.RUNNER_MAIN,
-              jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
+              jvm_options=jvm_options,
               args=args + batch_tests,
               workunit_factory=self.context.new_workunit,
               workunit_name='run',
               workunit_labels=[WorkUnitLabel.TEST],
               cwd=chroot,
               synthetic_jar_dir=batch_output_dir,
-              create_synthetic_jar=self.synthetic_classpath,
+              # Args are passed to nailgun over its socket, so there is no command line to shorten.
+              create_synthetic_jar=(self.synthetic_classpath and
+                                    not isinstance(executor, NailgunExecutor)),
             )
-            self.context.log.debug('JUnit subprocess exited with result ({})'
-                                   .format(subprocess_result))
-            result += abs(subprocess_result)
+          self.context.log.debug('JUnit subprocess exited with result ({})'
+                                 .format(subprocess_result))
 
-        tests_info = self.parse_test_info(batch_output_dir, parse_error_handler, ['classname'])
-        for test_name, test_info in tests_info.items():
-          test_item = Test(test_info['classname'], test_name)
-          test_target = test_registry.get_owning_target(test_item)
-          self.report_all_info_for_single_test(self.options_scope, test_target,
-                                               test_name, test_info)
+      return abs(subprocess_result), self.parse_test_info(batch_output_dir, parse_error_handler,
+                                                          ['classname'])
 
-        if result != 0 and fail_fast:
-          break
+    result = 0
+    batches = self._iter_batches(test_registry)
+    for batch_result, tests_info in self._run_batches(run_batch, batches, fail_fast):
+      result += batch_result
+      class_durations = defaultdict(float)
+      for test_name, test_info in tests_info.items():
+        test_item = Test(test_info['classname'], test_name)
+        test_target = test_registry.get_owning_target(test_item)
+        self.report_all_info_for_single_test(self.options_scope, test_target,
+                                             test_name, test_info)
+        class_durations[test_info['classname']] += test_info['time'] or 0
+      for classname, duration in class_durations.items():
+        self._test_durations.record(classname, duration)
+    self._test_durations.save()
 
     if result == 0:
       return TestResult.rc(0)
@@ -507,6 +679,69 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     )
     return TestResult(msg='\n'.join(error_message_lines), rc=result, failed_targets=failed_targets)
 
+  def _run_batches(self, run_batch, batches, fail_fast):
+    """Runs each of the given batches of tests, and yields their results.
+
+    Batches are run concurrently if --batch-concurrency allows it, in which case their results are
+    yielded in the order that they complete. Once a batch fails when `fail_fast` is set, no further
+    batches are started.
+
+    :param run_batch: A function to run a single batch, given its id, properties and tests.
+    :param batches: An iterable of (properties, tests) tuples for each batch.
+    :returns: An iterator of (result code, tests info) tuples for the batches that ran.
+    """
+    batches = [(batch_id, properties, batch)
+               for batch_id, (properties, batch) in enumerate(batches)]
+    num_workers = min(self._batch_concurrency, len(batches))
+    if num_workers <= 1:
+      for batch_args in batches:
+        batch_result, tests_info = run_batch(*batch_args)
+        yield batch_result, tests_info
+        if batch_result != 0 and fail_fast:
+          return
+      return
+
+    failed = threading.Event()
+    # Each batch puts exactly one (result, exc_info) pair here when it completes or is skipped.
+    completed = queue.Queue()
+
+    def run_batch_unless_failed(*batch_args):
+      if failed.is_set():
+        completed.put((None, None))
+        return
+      try:
+        batch_result, tests_info = run_batch(*batch_args)
+      except Exception:
+        failed.set()
+        completed.put((None, sys.exc_info()))
+        return
+      if batch_result != 0 and fail_fast:
+        failed.set()
+      completed.put(((batch_result, tests_info), None))
+
+    with self.context.new_workunit('batches') as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, num_workers)
+      try:
+        worker_pool.submit_async_work(Work(run_batch_unless_failed, batches),
+                                      workunit_parent=workunit)
+        for _ in batches:
+          # NB: Like `WorkerPool.submit_work_and_wait`, wait with a timeout so that we don't miss
+          # SIGINT.
+          result, exc_info = completed.get(timeout=1000000000)
+          if exc_info is not None:
+            six.reraise(*exc_info)
+          if result is not None:
+            yield result
+      finally:
+        # Don't start any more batches if we stopped early.
+        failed.set()
+        worker_pool.shutdown()
+
+  @memoized_property
+  def _test_durations(self):
+    """The time each test class took to run in previous runs."""
+    return JobDurations(os.path.join(self.workdir, 'test_durations.json'))
+
   def _iter_batches(self, test_registry):
     tests_by_properties = test_registry.index(
       lambda tgt: tgt.cwd if tgt.cwd is not None else self._working_dir,
@@ -518,10 +753,40 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
 
     for properties, tests in sorted(tests_by_properties.items()):
       sorted_tests = sorted(tests)
+      if self._batched and self._balance_batches:
+        for batch in self._balanced_batches(sorted_tests):
+          yield properties, batch
+        continue
       stride = min(self._batch_size, len(sorted_tests))
       for i in range(0, len(sorted_tests), stride):
         yield properties, sorted_tests[i:i + stride]
 
+  def _balanced_batches(self, tests):
+    """Splits the given tests into the fewest batches allowed by --batch-size, balanced by runtime.
+
+    Each test, longest running first, is added to whichever batch that still has room is expected
+    to take the least time. Tests that have not run before are assumed to take the average time of
+    those that have.
+    """
+    num_batches = (len(tests) + self._batch_size - 1) // self._batch_size
+    known_durations = [self._test_durations.get(test.classname) for test in tests]
+    known_durations = [duration for duration in known_durations if duration is not None]
+    default_duration = sum(known_durations) / len(known_durations) if known_durations else 1.0
+
+    def duration(test):
+      measured = self._test_durations.get(test.classname)
+      return default_duration if measured is None else measured
+
+    batches = [[] for _ in range(num_batches)]
+    batch_durations = [0.0] * num_batches
+    for test in sorted(tests, key=duration, reverse=True):
+      index = min((i for i in range(num_batches) if len(batches[i]) < self._batch_size),
+                  key=lambda i: batch_durations[i])
+      batches[index].append(test)
+      batch_durations[index] += duration(test)
+    for batch in batches:
+      yield sorted(batch)
+
   def _get_possible_tests_to_run(self):
     buildroot = get_buildroot()
     for test_spec in self._tests_to_run:
@@ -6,11 +6,13 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import Queue as queue
 import threading
+import time
 import traceback
-from collections import defaultdict, deque
+from collections import defaultdict, deque, namedtuple
 from heapq import heappop, heappush
 
 from pants.base.worker_pool import Work
+from pants.util.memo import memoized_property
 
 
 class Job(object):
@@ -146,6 +148,171 @@ class ThreadSafeCounter(object):
       self._counter -= 1
 
 
+class JobTiming(namedtuple('JobTiming', ['ready', 'start', 'finish', 'worker'])):
+  """When a job became ready to run, started and finished running, and which worker ran it.
+
+  Times are in seconds since the epoch.
+  """
+
+  @property
+  def queue_wait(self):
+    """The time the job spent waiting for a worker after its dependencies finished."""
+    return self.start - self.ready
+
+  @property
+  def duration(self):
+    return self.finish - self.start
+
+
+class ExecutionStats(object):
+  """Statistics about an execution of an ExecutionGraph."""
+
+  def __init__(self, dependencies, timings, num_workers):
+    """
+    :param dict dependencies: A dict from job key to the keys of the jobs it depends on.
+    :param dict timings: A dict from job key to the JobTiming of each job that ran.
+    :param int num_workers: The number of workers that were available to run jobs.
+    """
+    self._dependencies = dependencies
+    self.timings = timings
+    self.num_workers = num_workers
+
+  @memoized_property
+  def critical_path_times(self):
+    """A dict from job key to the total duration of the longest chain of jobs ending in that job.
+
+    The longest of these is the least time the execution could have taken given unlimited workers.
+    """
+    critical_path_times = {}
+    for key in self._topologically_sorted_keys():
+      critical_path_times[key] = self.timings[key].duration + max(
+        [critical_path_times[dep] for dep in self._dependencies[key] if dep in self.timings] or [0])
+    return critical_path_times
+
+  def critical_path(self):
+    """Returns the keys of the longest chain of jobs that ran, in execution order."""
+    critical_path_times = self.critical_path_times
+    path = []
+    candidates = list(critical_path_times)
+    while candidates:
+      key = max(candidates, key=lambda k: critical_path_times[k])
+      path.append(key)
+      candidates = [dep for dep in self._dependencies[key] if dep in critical_path_times]
+    return list(reversed(path))
+
+  def actual_critical_path(self):
+    """Returns the keys of the chain of jobs that the last job to finish actually waited on.
+
+    Starting from the last job to finish, each job is preceded by whichever of its dependencies
+    finished last. Unlike `critical_path`, this includes any time jobs spent waiting for a worker.
+    """
+    path = []
+    candidates = list(self.timings)
+    while candidates:
+      key = max(candidates, key=lambda k: self.timings[k].finish)
+      path.append(key)
+      candidates = [dep for dep in self._dependencies[key] if dep in self.timings]
+    return list(reversed(path))
+
+  @property
+  def start_time(self):
+    """The time the first job became ready."""
+    return min(timing.ready for timing in self.timings.values()) if self.timings else 0
+
+  @property
+  def end_time(self):
+    """The time the last job finished."""
+    return max(timing.finish for timing in self.timings.values()) if self.timings else 0
+
+  @property
+  def wall_time(self):
+    """The time between the first job becoming ready and the last job finishing."""
+    return self.end_time - self.start_time
+
+  @property
+  def utilization(self):
+    """The fraction of the available worker time that was spent running jobs."""
+    available_time = self.wall_time * self.num_workers
+    if not available_time:
+      return 0
+    return sum(timing.duration for timing in self.timings.values()) / available_time
+
+  @property
+  def ideal_time(self):
+    """The least time the execution could have taken given unlimited workers."""
+    return max(self.critical_path_times.values() or [0])
+
+  @property
+  def ideal_speedup(self):
+    """How many times faster the execution would have been given unlimited workers."""
+    if not self.ideal_time:
+      return 1
+    return self.wall_time / self.ideal_time
+
+  def idle_gaps(self):
+    """Returns a dict from worker name to a list of (start, end) times when it was idle.
+
+    Only the time between the first job becoming ready and the last job finishing is considered.
+    """
+    timings_by_worker = defaultdict(list)
+    for timing in self.timings.values():
+      timings_by_worker[timing.worker].append(timing)
+
+    gaps = {}
+    for worker, timings in timings_by_worker.items():
+      gaps[worker] = []
+      idle_since = self.start_time
+      for timing in sorted(timings, key=lambda t: t.start):
+        if timing.start > idle_since:
+          gaps[worker].append((idle_since, timing.start))
+        idle_since = timing.finish
+      if self.end_time > idle_since:
+        gaps[worker].append((idle_since, self.end_time))
+    return gaps
+
+  def get_all(self):
+    """Returns the stats as a dict, with all times in seconds relative to `start_time`."""
+    def relative(t):
+      return t - self.start_time
+
+    critical_path = []
+    for key in self.actual_critical_path():
+      timing = self.timings[key]
+      critical_path.append({
+        'key': key,
+        'start': relative(timing.start),
+        'finish': relative(timing.finish),
+        'queue_wait': timing.queue_wait,
+        'worker': timing.worker,
+      })
+
+    jobs_by_worker = defaultdict(int)
+    for timing in self.timings.values():
+      jobs_by_worker[timing.worker] += 1
+    workers = {}
+    for worker, gaps in self.idle_gaps().items():
+      workers[worker] = {
+        'jobs': jobs_by_worker[worker],
+        'idle_time': sum(end - start for start, end in gaps),
+        'idle_gaps': [[relative(start), relative(end)] for start, end in gaps],
+      }
+
+    return {
+      'num_jobs': len(self.timings),
+      'num_workers': self.num_workers,
+      'wall_time': self.wall_time,
+      'utilization': self.utilization,
+      'ideal_time': self.ideal_time,
+      'ideal_speedup': self.ideal_speedup,
+      'critical_path': critical_path,
+      'workers': workers,
+    }
+
+  def _topologically_sorted_keys(self):
+    # Jobs can only start after their dependencies finish, so ordering by start time suffices.
+    return sorted(self.timings, key=lambda key: self.timings[key].start)
+
+
 class ExecutionGraph(object):
   """A directed acyclic graph of work to execute.
 
@@ -175,6 +342,8 @@ class ExecutionGraph(object):
       raise NoRootJobError()
 
     self._job_priority = self._compute_job_priorities(job_list)
+    self._timings = {}
+    self._num_workers = 0
 
   def format_dependee_graph(self):
     return "\n".join([
@@ -223,11 +392,21 @@ class ExecutionGraph(object):
 
     return job_priority
 
-  def execute(self, pool, log):
+  @property
+  def stats(self):
+    """Statistics about the most recent execution of this graph.
+
+    :rtype: :class:`ExecutionStats`
+    """
+    return ExecutionStats(self._dependencies, dict(self._timings), self._num_workers)
+
+  def execute(self, pool, log, workers_pull_jobs=False):
     """Runs scheduled work, ensuring all dependencies for each element are done before execution.
 
     :param pool: A WorkerPool to run jobs on
     :param log: logger for logging debug information and progress
+    :param bool workers_pull_jobs: True to have the workers pull jobs themselves; see
+                                   `_execute_on_workers`.
 
     submits all the work without any dependencies to the worker pool
     when a unit of work finishes,
@@ -246,25 +425,36 @@ class ExecutionGraph(object):
     """
     log.debug(self.format_dependee_graph())
 
+    self._timings = {}
+    self._num_workers = pool.num_workers
+    if workers_pull_jobs:
+      self._execute_on_workers(pool, log)
+      return
+
     status_table = StatusTable(self._job_keys_as_scheduled,
                                {key: len(self._jobs[key].dependencies) for key in self._job_keys_as_scheduled})
     finished_queue = queue.Queue()
 
     heap = []
     jobs_in_flight = ThreadSafeCounter()
+    ready_times = {}
 
     def put_jobs_into_heap(job_keys):
       for job_key in job_keys:
+        ready_times[job_key] = time.time()
         # minus because jobs with larger priority should go first
         heappush(heap, (-self._job_priority[job_key], job_key))
 
     def try_to_submit_jobs_from_heap():
       def worker(worker_key, work):
+        start = time.time()
         try:
           work()
           result = (worker_key, SUCCESSFUL, None)
         except Exception as e:
           result = (worker_key, FAILED, e)
+        self._timings[worker_key] = JobTiming(ready_times[worker_key], start, time.time(),
+                                              threading.current_thread().name)
         finished_queue.put(result)
         jobs_in_flight.decrement()
 
@@ -338,3 +528,130 @@ class ExecutionGraph(object):
 
     if status_table.has_failures():
       raise ExecutionFailure("Failed jobs: {}".format(', '.join(status_table.failed_keys())))
+
+  def _execute_on_workers(self, pool, log):
+    """Runs scheduled work without dispatching each job from the main thread.
+
+    Each worker pulls the highest priority ready job from a shared queue, runs it along with its
+    callbacks, and then queues any dependees that became ready itself. The main thread just waits
+    for all of the workers to finish. Callbacks still run one at a time, but no longer on the main
+    thread.
+    """
+    status_table = StatusTable(self._job_keys_as_scheduled,
+                               {key: len(self._jobs[key].dependencies) for key in self._job_keys_as_scheduled})
+    # Protects all of the state below, and is notified when jobs are queued or all work is done.
+    condition = threading.Condition()
+    callback_lock = threading.Lock()
+    heap = []
+    ready_times = {}
+    unfinished_count = [len(self._job_keys_as_scheduled)]
+    # Execution stops at the first error, which is a tuple of (ExecutionFailure, unexpected).
+    errors = []
+
+    def is_done():
+      return errors or unfinished_count[0] == 0
+
+    def queue_jobs(job_keys):
+      for job_key in job_keys:
+        ready_times[job_key] = time.time()
+        status_table.mark_queued(job_key)
+        # minus because jobs with larger priority should go first
+        heappush(heap, (-self._job_priority[job_key], job_key))
+      condition.notify_all()
+
+    def abort(error, unexpected=False):
+      with condition:
+        errors.append((error, unexpected))
+        condition.notify_all()
+
+    def run_callbacks(job_keys, status):
+      with callback_lock:
+        for job_key in job_keys:
+          try:
+            if status is SUCCESSFUL:
+              self._jobs[job_key].run_success_callback()
+            else:
+              self._jobs[job_key].run_failure_callback()
+          except Exception as e:
+            log.debug(traceback.format_exc())
+            callback = 'on_success' if status is SUCCESSFUL else 'on_failure'
+            raise ExecutionFailure("Error in {} for {}".format(callback, job_key), e)
+          log.debug("{} finished with status {}".format(job_key, status))
+
+    def run_job(job_key):
+      start = time.time()
+      try:
+        self._jobs[job_key]()
+        status = SUCCESSFUL
+      except Exception as e:
+        status = FAILED
+        log.error("{} failed: {}".format(job_key, e))
+      self._timings[job_key] = JobTiming(ready_times[job_key], start, time.time(),
+                                         threading.current_thread().name)
+      run_callbacks([job_key], status)
+
+      canceled = []
+      with condition:
+        status_table.mark_as(status, job_key)
+        unfinished_count[0] -= 1
+        if status is SUCCESSFUL:
+          ready_dependees = []
+          for dependee in self._dependees[job_key]:
+            status_table.mark_one_successful_dependency(dependee)
+            if status_table.is_ready_to_submit(dependee):
+              ready_dependees.append(dependee)
+          queue_jobs(ready_dependees)
+        else:
+          # Propagate failures downstream.
+          to_cancel = deque(self._dependees[job_key])
+          while to_cancel:
+            dependee = to_cancel.popleft()
+            if status_table.is_unstarted(dependee):
+              status_table.mark_as(CANCELED, dependee)
+              canceled.append(dependee)
+              to_cancel.extend(self._dependees[dependee])
+          unfinished_count[0] -= len(canceled)
+        if is_done():
+          condition.notify_all()
+      run_callbacks(canceled, CANCELED)
+
+    def worker():
+      while True:
+        with condition:
+          while not heap and not is_done():
+            condition.wait()
+          if is_done():
+            return
+          _, job_key = heappop(heap)
+        try:
+          run_job(job_key)
+        except ExecutionFailure as e:
+          abort(e)
+        except Exception as e:
+          log.debug(traceback.format_exc())
+          abort(ExecutionFailure("Error running job", e), unexpected=True)
+
+    with condition:
+      queue_jobs(self._job_keys_with_no_dependencies)
+    try:
+      result = pool.submit_async_work(Work(worker, [()] * pool.num_workers))
+      # NB: We specify a timeout explicitly, because otherwise python ignores SIGINT when waiting on
+      # a condition variable, so we won't be able to ctrl-c out.
+      result.get(timeout=1000000000)
+    except Exception as e:
+      log.debug(traceback.format_exc())
+      abort(ExecutionFailure("Error running job", e), unexpected=True)
+    finally:
+      # Make sure that no worker waits forever, eg if we are interrupted.
+      abort(None)
+
+    error, unexpected = errors[0]
+    if error:
+      if unexpected:
+        # Call failure callbacks for jobs that are unfinished.
+        for key, state in status_table.unfinished_items():
+          self._jobs[key].run_failure_callback()
+      raise error
+
+    if status_table.has_failures():
+      raise ExecutionFailure("Failed jobs: {}".format(', '.join(status_table.failed_keys())))
@@ -35,6 +35,7 @@ from pants.util.contextutil import Timer
 from pants.util.dirutil import (fast_relpath, read_file, safe_delete, safe_mkdir, safe_rmtree,
                                 safe_walk)
 from pants.util.fileutil import create_size_estimators
+from pants.util.job_durations import JobDurations
 from pants.util.memo import memoized_method, memoized_property
 
 
@@ -104,6 +105,17 @@ class JvmCompile(NailgunTaskBase):
                   'constraints). Choose \'random\' to choose random sizes for each target, which '
                   'may be useful for distributed builds.')
 
+    register('--use-measured-durations', advanced=True, type=bool, default=True,
+             help='Prioritize targets by how long they took to compile in previous runs, using the '
+                  '--size-estimator only for targets that have not been compiled before.')
+
+    register('--scheduling', advanced=True, choices=['main-thread', 'workers'],
+             default='main-thread',
+             help='How compile jobs are scheduled. With \'main-thread\', the main thread hands '
+                  'each ready job to the worker pool and runs all callbacks. With \'workers\', '
+                  'each worker pulls the next ready job itself as soon as it is free, which avoids '
+                  'idling workers while the main thread is busy.')
+
     register('--capture-classpath', advanced=True, type=bool, default=True,
              fingerprint=True,
              help='Capture classpath to per-target newline-delimited text files. These files will '
@@ -324,6 +336,10 @@ class JvmCompile(NailgunTaskBase):
 
     self._size_estimator = self.size_estimator_by_name(self.get_options().size_estimator)
 
+  @memoized_property
+  def _job_durations(self):
+    return JobDurations(os.path.join(self.workdir, 'job_durations.json'))
+
   @memoized_property
   def _missing_deps_finder(self):
     dep_analyzer = JvmDependencyAnalyzer(get_buildroot(),
@@ -433,11 +449,18 @@ class JvmCompile(NailgunTaskBase):
                                      invalid_targets,
                                      invalidation_check.invalid_vts)
 
+    if self.get_options().use_measured_durations:
+      self._job_durations.apply_to(jobs)
+
     exec_graph = ExecutionGraph(jobs)
     try:
-      exec_graph.execute(worker_pool, self.context.log)
+      exec_graph.execute(worker_pool, self.context.log,
+                         workers_pull_jobs=self.get_options().scheduling == 'workers')
     except ExecutionFailure as e:
       raise TaskError("Compilation failure: {}".format(e))
+    finally:
+      self._job_durations.save()
+      self._record_execution_stats(exec_graph.stats, invalid_targets)
 
   def _record_compile_classpath(self, classpath, targets, outdir):
     relative_classpaths = [fast_relpath(path, self.get_options().pants_workdir) for path in classpath]
@@ -695,6 +718,7 @@ class JvmCompile(NailgunTaskBase):
                                   timer.elapsed,
                                   is_incremental,
                                   'compile')
+        self._job_durations.record(self.exec_graph_key_for_target(tgt), timer.elapsed)
 
         # Write any additional resources for this target to the target workdir.
         self.write_extra_resources(ctx)
@@ -764,6 +788,21 @@ class JvmCompile(NailgunTaskBase):
     record('sources_len', sources_len)
     record('incremental', is_incremental)
 
+  def _record_execution_stats(self, stats, targets):
+    critical_path_times = stats.critical_path_times
+    for target in targets:
+      key = self.exec_graph_key_for_target(target)
+      timing = stats.timings.get(key)
+      if timing:
+        def record(k, v):
+          self.context.run_tracker.report_target_info(self.options_scope, target, ['compile', k], v)
+        record('queue_wait', timing.queue_wait)
+        record('critical_path', critical_path_times[key])
+    if stats.timings:
+      self.context.run_tracker.scheduling_stats.add_execution(self.options_scope, stats.get_all())
+    self.context.log.debug('Compiled {} targets using {:.0%} of {} workers.'.format(
+      len(stats.timings), stats.utilization, stats.num_workers))
+
   def _collect_invalid_compile_dependencies(self, compile_target, invalid_target_set):
     # Collects all invalid dependencies that are not dependencies of other invalid dependencies
     # within the closure of compile_target.
@@ -12,7 +12,8 @@ from pants.init.subprocess import Subprocess
 from pants.java import util
 from pants.java.executor import SubprocessExecutor
 from pants.java.jar.jar_dependency import JarDependency
-from pants.java.nailgun_executor import NailgunExecutor, NailgunProcessGroup
+from pants.java.nailgun_executor import (NailgunExecutor, NailgunExecutorPool,
+                                         NailgunProcessGroup)
 from pants.task.task import Task, TaskBase
 from pants.util.memo import memoized_property
 
@@ -38,6 +39,14 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
              help='Timeout (secs) for nailgun startup.')
     register('--nailgun-connect-attempts', advanced=True, default=5, type=int,
              help='Max attempts for nailgun connects.')
+    register('--nailgun-instances', advanced=True, default=1, type=int,
+             help='The number of equivalent nailgun servers to run for this task. Programs this '
+                  'task runs concurrently (eg, the compiles of parallel workers, see '
+                  '--worker-count) are each dispatched to the least loaded server, and servers '
+                  'that stop accepting connections are restarted.')
+    register('--nailgun-max-rss-mb', advanced=True, type=int, default=None,
+             help='Restart a nailgun server of this task before running a program in it once its '
+                  'resident memory exceeds this many megabytes.')
     cls.register_jvm_tool(register,
                           'nailgun-server',
                           classpath=[
@@ -83,22 +92,39 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
     dist = dist or self.dist
     if self.execution_strategy == self.NAILGUN:
       classpath = os.pathsep.join(self.tool_classpath('nailgun-server'))
-      return NailgunExecutor(self._identity,
-                             self._executor_workdir,
-                             classpath,
-                             dist,
-                             connect_timeout=self.get_options().nailgun_timeout_seconds,
-                             connect_attempts=self.get_options().nailgun_connect_attempts)
+      instances = self.get_options().nailgun_instances
+      if instances <= 1:
+        return self._create_nailgun_executor(self._identity, self._executor_workdir, classpath,
+                                             dist)
+      return NailgunExecutorPool([
+        self._create_nailgun_executor('{}_{}'.format(self._identity, i),
+                                      os.path.join(self._executor_workdir, str(i)),
+                                      classpath,
+                                      dist,
+                                      health_check=True)
+        for i in range(instances)
+      ])
     else:
       return SubprocessExecutor(dist)
 
+  def _create_nailgun_executor(self, identity, workdir, classpath, dist, **kwargs):
+    max_rss_mb = self.get_options().nailgun_max_rss_mb
+    return NailgunExecutor(identity,
+                           workdir,
+                           classpath,
+                           dist,
+                           connect_timeout=self.get_options().nailgun_timeout_seconds,
+                           connect_attempts=self.get_options().nailgun_connect_attempts,
+                           max_rss=max_rss_mb * 1024 * 1024 if max_rss_mb else None,
+                           **kwargs)
+
   def runjava(self, classpath, main, jvm_options=None, args=None, workunit_name=None,
               workunit_labels=None, workunit_log_config=None, dist=None):
     """Runs the java main using the given classpath and args.
 
     If --no-use-nailgun is specified then the java main is run in a freshly spawned subprocess,
-    otherwise a persistent nailgun server dedicated to this Task subclass is used to speed up
-    amortized run times.
+    otherwise a persistent nailgun server (or with --nailgun-instances, the least loaded of a pool
+    of them) dedicated to this Task subclass is used to speed up amortized run times.
 
     :API: public
     """
@@ -201,6 +201,10 @@ class SubprocPool(object):
   def set_num_processes(cls, num_processes):
     cls._num_processes = num_processes
 
+  @classmethod
+  def num_processes(cls):
+    return cls._num_processes
+
   @classmethod
   def foreground(cls):
     with cls._lock:
@@ -11,6 +11,7 @@ from collections import OrderedDict, defaultdict, deque
 
 from twitter.common.collections import OrderedSet
 
+from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
 from pants.build_graph.address import Address
 from pants.build_graph.address_lookup_error import AddressLookupError
 from pants.build_graph.injectables_mixin import InjectablesMixin
@@ -96,6 +97,7 @@ class BuildGraph(AbstractClass):
     return Target.closure_for_targets(*vargs, **kwargs)
 
   def __init__(self):
+    self._dependencies_revision = 0
     self.reset()
 
   def __len__(self):
@@ -130,6 +132,18 @@ class BuildGraph(AbstractClass):
     self._derived_from_by_derivative = {}  # Address -> Address.
     self._derivatives_by_derived_from = defaultdict(list)   # Address -> list of Address.
     self.synthetic_addresses = set()
+    self._dependencies_revision += 1
+
+  @property
+  def dependencies_revision(self):
+    """A counter that increases whenever a dependency is injected into the graph, or it is reset.
+
+    Values computed from the transitive dependencies of targets may be cached for as long as the
+    revision is unchanged.
+
+    :API: public
+    """
+    return self._dependencies_revision
 
   def contains_address(self, address):
     """
@@ -314,6 +328,7 @@ class BuildGraph(AbstractClass):
     else:
       self._target_dependencies_by_address[dependent].add(dependency)
       self._target_dependees_by_address[dependency].add(dependent)
+      self._dependencies_revision += 1
 
   def targets(self, predicate=None):
     """Returns all the targets in the graph in no particular order.
@@ -503,6 +518,89 @@ class BuildGraph(AbstractClass):
           to_walk.append((level + 1, dep_address))
     return ordered_closure
 
+  def transitive_invalidation_hashes(self, targets, fingerprint_strategy=None, direct=True):
+    """Computes the transitive invalidation hashes of many targets in a single pass.
+
+    Equivalent to calling `Target.transitive_invalidation_hash` on each of the `targets`, but the
+    dependency graph is walked iteratively rather than recursively. Like those of
+    `Target.transitive_invalidation_hash`, the results are memoized on the targets per
+    fingerprint strategy, and so are shared by all tasks using equal strategies.
+
+    :API: public
+
+    :param targets: The targets to compute transitive invalidation hashes for.
+    :param FingerprintStrategy fingerprint_strategy: optional fingerprint strategy to use to
+      compute the fingerprints of the targets.
+    :param bool direct: `False` to include all of the transitive dependencies of the `targets`
+      even if the fingerprint strategy says only their direct dependencies matter.
+    :returns: A dict from each of the `targets` to its transitive invalidation hash, which may be
+      `None`; see `Target.transitive_invalidation_hash`.
+    :raises: :class:`pants.build_graph.target.Target.RecursiveDepthError` if the dependencies of
+      the targets contain a cycle.
+    """
+    fingerprint_strategy = fingerprint_strategy or DefaultFingerprintStrategy()
+
+    direct_targets = OrderedSet()
+    transitive_hashes = {}
+    # The targets whose transitive hash must be computed, in post order.
+    to_compute = []
+
+    def memoized(target):
+      if target in transitive_hashes:
+        return True
+      cached_hash = target._transitive_fingerprint_map(False).get(fingerprint_strategy)
+      if cached_hash is not None:
+        transitive_hashes[target] = cached_hash
+        return True
+      return False
+
+    for root in targets:
+      if direct and fingerprint_strategy.direct(root):
+        direct_targets.add(root)
+        continue
+      if memoized(root):
+        continue
+      path = [root]
+      on_path = {root}
+      deps_to_walk = [iter(root.dependencies)]
+      while deps_to_walk:
+        for dep in deps_to_walk[-1]:
+          if dep in on_path:
+            cycle = path[path.index(dep):] + [dep]
+            raise Target.RecursiveDepthError(
+              'Cycle detected in the dependencies of {}:\n  {}'.format(
+                root.address.spec, ' ->\n  '.join(t.address.spec for t in cycle)))
+          if not memoized(dep):
+            path.append(dep)
+            on_path.add(dep)
+            deps_to_walk.append(iter(dep.dependencies))
+            break
+        else:
+          deps_to_walk.pop()
+          target = path.pop()
+          on_path.remove(target)
+          to_compute.append(target)
+          # Mark the target as visited; its hash is filled in below.
+          transitive_hashes[target] = None
+
+    for target in to_compute:
+      dep_hashes = [transitive_hashes[dep] for dep in target.dependencies]
+      transitive_hashes[target] = target._combine_transitive_invalidation_hash(
+        fingerprint_strategy, [dep_hash for dep_hash in dep_hashes if dep_hash is not None],
+        direct=False)
+
+    result = {}
+    for target in targets:
+      if target in direct_targets:
+        dep_hashes = [dep.invalidation_hash(fingerprint_strategy)
+                      for dep in fingerprint_strategy.dependencies(target)]
+        result[target] = target._combine_transitive_invalidation_hash(
+          fingerprint_strategy, [dep_hash for dep_hash in dep_hashes if dep_hash is not None],
+          direct=True)
+      else:
+        result[target] = transitive_hashes[target]
+    return result
+
   @abstractmethod
   def inject_synthetic_target(self,
                               address,
@@ -68,9 +68,7 @@ class Target(AbstractTarget):
   """
 
   class RecursiveDepthError(AddressLookupError):
-    """Raised when there are too many recursive calls to calculate the fingerprint."""
-
-  _MAX_RECURSION_DEPTH = 250
+    """Raised when a dependency cycle prevents calculating the fingerprint."""
 
   class WrongNumberOfAddresses(Exception):
     """Internal error, too many elements in Addresses
@@ -417,47 +415,44 @@ class Target(AbstractTarget):
       did not contribute to the fingerprint, according to the provided FingerprintStrategy.
     :rtype: string
     """
-    if depth > self._MAX_RECURSION_DEPTH:
-      # NB(zundel) without this catch, we'll eventually hit the python stack limit
-      # RuntimeError: maximum recursion depth exceeded while calling a Python object
-      raise self.RecursiveDepthError("Max depth of {} exceeded.".format(self._MAX_RECURSION_DEPTH))
-
     fingerprint_strategy = fingerprint_strategy or DefaultFingerprintStrategy()
-
-    direct = (depth == 0 and fingerprint_strategy.direct(self))
+    direct = depth == 0
+    cached_hash = self._transitive_fingerprint_map(
+      direct and fingerprint_strategy.direct(self)).get(fingerprint_strategy)
+    if cached_hash is not None:
+      return cached_hash
+    # NB: The hashes of the dependencies are computed iteratively, so that deep graphs can't exhaust
+    # the stack.
+    return self._build_graph.transitive_invalidation_hashes([self],
+                                                            fingerprint_strategy=fingerprint_strategy,
+                                                            direct=direct)[self]
+
+  def _transitive_fingerprint_map(self, direct):
     if direct:
-      fingerprint_map = self._cached_direct_transitive_fingerprint_map
+      return self._cached_direct_transitive_fingerprint_map
     else:
-      fingerprint_map = self._cached_all_transitive_fingerprint_map
-
-    if fingerprint_strategy not in fingerprint_map:
-      hasher = sha1()
-
-      def dep_hash_iter():
-        dep_list = fingerprint_strategy.dependencies(self) if direct else self.dependencies
-        for dep in dep_list:
-          try:
-            if direct:
-              dep_hash = dep.invalidation_hash(fingerprint_strategy)
-            else:
-              dep_hash = dep.transitive_invalidation_hash(fingerprint_strategy, depth=depth+1)
-            if dep_hash is not None:
-              yield dep_hash
-          except self.RecursiveDepthError as e:
-            raise self.RecursiveDepthError("{message}\n  referenced from {spec}"
-                                           .format(message=e, spec=dep.address.spec))
-
-      dep_hashes = sorted(list(dep_hash_iter()))
-      for dep_hash in dep_hashes:
-        hasher.update(dep_hash)
-      target_hash = self.invalidation_hash(fingerprint_strategy)
-      if target_hash is None and not dep_hashes:
-        return None
-      dependencies_hash = hasher.hexdigest()[:12]
-      combined_hash = '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
-                                                         deps_hash=dependencies_hash)
-      fingerprint_map[fingerprint_strategy] = combined_hash
-    return fingerprint_map[fingerprint_strategy]
+      return self._cached_all_transitive_fingerprint_map
+
+  def _combine_transitive_invalidation_hash(self, fingerprint_strategy, dep_hashes, direct):
+    """Computes and memoizes the transitive invalidation hash of this target.
+
+    :param FingerprintStrategy fingerprint_strategy: The fingerprint strategy in use.
+    :param list dep_hashes: The non-`None` hashes of the dependencies of this target: either their
+      invalidation hashes if `direct`, or else their transitive invalidation hashes.
+    :param bool direct: Whether only the direct dependencies of this target are included.
+    """
+    hasher = sha1()
+    dep_hashes = sorted(dep_hashes)
+    for dep_hash in dep_hashes:
+      hasher.update(dep_hash)
+    target_hash = self.invalidation_hash(fingerprint_strategy)
+    if target_hash is None and not dep_hashes:
+      return None
+    dependencies_hash = hasher.hexdigest()[:12]
+    combined_hash = '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
+                                                       deps_hash=dependencies_hash)
+    self._transitive_fingerprint_map(direct)[fingerprint_strategy] = combined_hash
+    return combined_hash
 
   def mark_transitive_invalidation_hash_dirty(self):
     """
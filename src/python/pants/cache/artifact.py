@@ -9,6 +9,9 @@ import os
 import shutil
 import tarfile
 
+import lz4.frame
+import zstandard
+
 from pants.util.contextutil import open_tar
 from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
 
@@ -82,32 +85,96 @@ class DirectoryArtifact(Artifact):
 class TarballArtifact(Artifact):
   """An artifact stored in a tarball."""
 
+  GZIP = 'gzip'
+  LZ4 = 'lz4'
+  UNCOMPRESSED = 'none'
+  ZSTD = 'zstd'
+
+  # The valid compression levels of each supported codec, or None if the codec has no levels.
+  # In our tests, gzip is slightly less compressive than bzip2 on .class files, but decompression
+  # times are much faster, so bzip2 is not offered.
+  LEVELS = {
+    GZIP: range(1, 10),
+    LZ4: range(0, 17),
+    UNCOMPRESSED: None,
+    ZSTD: range(1, 23),
+  }
+
+  CODECS = frozenset(LEVELS.keys())
+
+  # The `tarfile` write mode for each codec that `tarfile` supports natively. The codec needn't be
+  # known to read a tarball: it is detected from the content, so artifacts written with different
+  # codecs can be mixed in a cache.
+  _WRITE_MODES = {
+    GZIP: 'w:gz',
+    UNCOMPRESSED: 'w',
+  }
+
+  # The magic numbers which start the frames of the codecs that `tarfile` does not detect itself.
+  _MAGIC_LENGTH = 4
+  _CODECS_BY_MAGIC = {
+    b'\x04\x22\x4d\x18': LZ4,
+    b'\x28\xb5\x2f\xfd': ZSTD,
+  }
+
   # TODO: Expose `dereference` for tasks.
   # https://github.com/pantsbuild/pants/issues/3961
-  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True):
+  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True, codec=GZIP):
+    """
+    :param str artifact_root: The path under which the artifact's files are read/written.
+    :param str tarfile_: The path of the tarball.
+    :param int compression: The compression level for the codec, if it has levels.
+    :param bool dereference: Dereference symlinks when creating the tarball.
+    :param str codec: One of `CODECS`, used when creating the tarball.
+    """
+    if codec not in self.CODECS:
+      raise ValueError('Unknown compression codec {!r}, must be one of {}'.format(
+        codec, sorted(self.CODECS)))
     super(TarballArtifact, self).__init__(artifact_root)
     self._tarfile = tarfile_
     self._compression = compression
     self._dereference = dereference
+    self._codec = codec
 
   def exists(self):
     return os.path.isfile(self._tarfile)
 
   def collect(self, paths):
-    # In our tests, gzip is slightly less compressive than bzip2 on .class files,
-    # but decompression times are much faster.
-    mode = 'w:gz'
+    mode = self._WRITE_MODES.get(self._codec)
+    if mode is not None:
+      tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2}
+      if self._codec != self.UNCOMPRESSED:
+        tar_kwargs['compresslevel'] = self._compression
+      with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
+        self._add(tarout, paths)
+    else:
+      with open(self._tarfile, 'wb') as fh:
+        with self._compressor(fh) as compressed:
+          # The compressed stream can't seek, so the tarball is written to it in stream mode.
+          with open_tar(compressed, 'w|', dereference=self._dereference,
+                        errorlevel=2) as tarout:
+            self._add(tarout, paths)
 
-    tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2, 'compresslevel': self._compression}
+  def _add(self, tarout, paths):
+    for path in paths or ():
+      # Adds dirs recursively.
+      relpath = os.path.relpath(path, self._artifact_root)
+      tarout.add(path, relpath)
+      self._relpaths.add(relpath)
 
-    with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
-      for path in paths or ():
-        # Adds dirs recursively.
-        relpath = os.path.relpath(path, self._artifact_root)
-        tarout.add(path, relpath)
-        self._relpaths.add(relpath)
+  def _compressor(self, fileobj):
+    if self._codec == self.ZSTD:
+      return zstandard.ZstdCompressor(level=self._compression).stream_writer(fileobj)
+    return lz4.frame.LZ4FrameFile(fileobj, 'wb', compression_level=self._compression)
 
   def extract(self):
+    with open(self._tarfile, 'rb') as fh:
+      if self._CODECS_BY_MAGIC.get(fh.read(self._MAGIC_LENGTH)):
+        # The tarball can only be read sequentially, as it is decompressed.
+        fh.seek(0)
+        self.extract_stream(fh)
+        return
+
     try:
       with open_tar(self._tarfile, 'r', errorlevel=2) as tarin:
         # Note: We create all needed paths proactively, even though extractall() can do this for us.
@@ -121,17 +188,72 @@ class TarballArtifact(Artifact):
         dirs = set()
         for tarinfo in tarin.getmembers():
           paths.append(tarinfo.name)
-          if tarinfo.isdir():
-            dirs.add(tarinfo.name)
-          else:
-            dirs.add(os.path.dirname(tarinfo.name))
+          dirs.add(self._dir_for(tarinfo))
         for d in dirs:
-          try:
-            os.makedirs(os.path.join(self._artifact_root, d))
-          except OSError as e:
-            if e.errno != errno.EEXIST:
-              raise
+          self._makedirs(d)
         tarin.extractall(self._artifact_root)
         self._relpaths.update(paths)
     except tarfile.ReadError as e:
       raise ArtifactError(str(e))
+
+  def extract_stream(self, fileobj):
+    """Extract the files of a tarball read sequentially from `fileobj`, as they are read.
+
+    Unlike `extract`, this does not require this artifact's tarball to exist: each member is
+    extracted as soon as its bytes have been read, so extraction overlaps with (eg) a download.
+
+    :param fileobj: A file-like object supporting `read`, positioned at the start of a tarball
+                    using any of the `CODECS`.
+    """
+    magic = fileobj.read(self._MAGIC_LENGTH)
+    fileobj = _PrefixedReader(magic, fileobj)
+    codec = self._CODECS_BY_MAGIC.get(magic)
+    decode_errors = (tarfile.ReadError,)
+    if codec == self.ZSTD:
+      fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+      decode_errors += (zstandard.ZstdError,)
+    elif codec == self.LZ4:
+      fileobj = lz4.frame.LZ4FrameFile(fileobj, 'rb')
+      # lz4 has no error type of its own: it raises these for corrupt and truncated frames.
+      decode_errors += (EOFError, RuntimeError)
+
+    try:
+      with open_tar(fileobj, 'r|*', errorlevel=2) as tarin:
+        for tarinfo in tarin:
+          # See the note in `extract`: the whole tarball can't be listed up front here, so we
+          # create each member's directory just before extracting it.
+          self._makedirs(self._dir_for(tarinfo))
+          tarin.extract(tarinfo, self._artifact_root)
+          self._relpaths.add(tarinfo.name)
+    except decode_errors as e:
+      raise ArtifactError(str(e))
+
+  @staticmethod
+  def _dir_for(tarinfo):
+    return tarinfo.name if tarinfo.isdir() else os.path.dirname(tarinfo.name)
+
+  def _makedirs(self, relpath):
+    try:
+      os.makedirs(os.path.join(self._artifact_root, relpath))
+    except OSError as e:
+      if e.errno != errno.EEXIST:
+        raise
+
+
+class _PrefixedReader(object):
+  """Reads the given bytes, which were already read from the start of a file, then the rest of it."""
+
+  def __init__(self, prefix, fileobj):
+    self._prefix = prefix
+    self._fileobj = fileobj
+
+  def read(self, size=-1):
+    if not self._prefix:
+      return self._fileobj.read(size)
+    if size is None or size < 0:
+      data, self._prefix = self._prefix + self._fileobj.read(), b''
+    else:
+      data, self._prefix = self._prefix[:size], self._prefix[size:]
+      if len(data) < size:
+        data += self._fileobj.read(size - len(data))
+    return data
@@ -134,6 +134,48 @@ class ArtifactCache(object):
     """
     pass
 
+  def has_many(self, cache_keys):
+    """Check whether artifacts are cached for each of the given keys.
+
+    Implementations that can amortize the cost of a lookup across many keys (for example, by
+    issuing concurrent requests to a remote service) should override this method.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of booleans, in the same order as `cache_keys`.
+    """
+    return [self._has_or_miss(cache_key) for cache_key in cache_keys]
+
+  def use_cached_files_many(self, requests):
+    """Use the files cached for each of the given keys.
+
+    Implementations that can amortize the cost of a fetch across many keys should override
+    this method. See `use_cached_files` for the meaning of each result.
+
+    :param list requests: A list of (CacheKey, results_dir) pairs, as passed to `use_cached_files`.
+    :returns: A list of results, in the same order as `requests`.
+    """
+    return [self._use_cached_files_or_miss(request) for request in requests]
+
+  def _has_or_miss(self, cache_key):
+    """Like `has`, but treats a nonfatal error as a miss for this key alone."""
+    try:
+      return self.has(cache_key)
+    except NonfatalArtifactCacheError as e:
+      logger.warn('Error calling has in artifact cache: {0}'.format(e))
+      return False
+
+  def _use_cached_files_or_miss(self, request):
+    """Like `use_cached_files`, but treats a nonfatal error as a miss for this request alone.
+
+    :param request: A (CacheKey, results_dir) pair.
+    """
+    cache_key, results_dir = request
+    try:
+      return self.use_cached_files(cache_key, results_dir)
+    except NonfatalArtifactCacheError as e:
+      logger.warn('Error calling use_cached_files in artifact cache: {0}'.format(e))
+      return False
+
   def delete(self, cache_key):
     """Delete the artifacts for the specified key.
 
@@ -167,6 +209,26 @@ def call_use_cached_files(tup):
     return False
 
 
+def call_use_cached_files_many(tup):
+  """Importable helper for multi-proc calling of ArtifactCache.use_cached_files_many.
+
+  See docstring on call_use_cached_files explaining why this is useful.
+
+  :param tup: A pair of an ArtifactCache and a list of (CacheKey, results_dir) pairs.
+  :returns: A list of results, one per (CacheKey, results_dir) pair.
+  """
+  cache, requests = tup
+  try:
+    results = cache.use_cached_files_many(requests)
+  except NonfatalArtifactCacheError as e:
+    logger.warn('Error calling use_cached_files_many in artifact cache: {0}'.format(e))
+    results = [False] * len(requests)
+  for res in results:
+    sys.stderr.write('.' if res else ' ')
+  sys.stderr.flush()
+  return results
+
+
 def call_insert(tup):
   """Importable helper for multi-proc calling of ArtifactCache.insert on an ArtifactCache instance.
 
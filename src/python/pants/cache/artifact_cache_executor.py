@@ -0,0 +1,119 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import math
+import multiprocessing
+import pickle
+from hashlib import sha1
+
+from pants.base.worker_pool import SubprocPool
+from pants.cache.artifact_cache import call_insert, call_use_cached_files_many
+
+
+logger = logging.getLogger(__name__)
+
+
+# The caches unpickled by this (worker) process, by the digest of their pickled form.
+_caches_by_id = {}
+
+# Each task may configure distinct caches: bound the number that a worker keeps.
+_MAX_CACHES_PER_WORKER = 16
+
+
+def _worker_cache(cache_id, pickled_cache):
+  cache = _caches_by_id.get(cache_id)
+  if cache is None:
+    if len(_caches_by_id) >= _MAX_CACHES_PER_WORKER:
+      _caches_by_id.clear()
+    cache = _caches_by_id[cache_id] = pickle.loads(pickled_cache)
+  return cache
+
+
+def _use_cached_files_chunk(cache, chunk):
+  indexes, requests = zip(*chunk)
+  return list(zip(indexes, call_use_cached_files_many((cache, list(requests)))))
+
+
+def _insert_chunk(cache, chunk):
+  return [(index, call_insert((cache,) + insert)) for index, insert in chunk]
+
+
+def _call_chunk(args):
+  """Runs a chunk of work against a cache in a `SubprocPool` worker.
+
+  :param args: A tuple of the id of the cache, the pickled cache, the function to call and a list
+               of (index, item) pairs to call it with.
+  :returns: A list of (index, result) pairs.
+  """
+  cache_id, pickled_cache, func, chunk = args
+  return func(_worker_cache(cache_id, pickled_cache), chunk)
+
+
+class ArtifactCacheExecutor(object):
+  """Reads from and writes to an artifact cache in the long-lived foreground subprocesses.
+
+  The cache is pickled once, rather than once per item of work, and each worker process unpickles
+  it only the first time it is handed work for it. A worker then keeps its copy of the cache, and
+  of any state the cache initialized (such as the keep-alive session of a `RESTfulArtifactCache`),
+  for later work and runs.
+
+  Work is submitted in chunks, and results are yielded as each chunk completes, so that callers
+  can make progress on the results that are ready before the whole batch is done.
+  """
+
+  # Submit a few chunks per worker, so that a slow chunk does not hold up the others.
+  _CHUNKS_PER_WORKER = 4
+
+  # How long to wait for a chunk to complete between checks for an interrupt.
+  _WAIT_SECS = 60
+
+  def __init__(self, cache):
+    """
+    :param cache: The `ArtifactCache` to read from or write to.
+    """
+    self._pickled_cache = pickle.dumps(cache, pickle.HIGHEST_PROTOCOL)
+    self._cache_id = sha1(self._pickled_cache).hexdigest()
+
+  def use_cached_files(self, requests):
+    """Calls `ArtifactCache.use_cached_files_many` for the given requests, in chunks.
+
+    :param list requests: A list of (CacheKey, results_dir) pairs.
+    :returns: An iterator of (index of the request, result) pairs, in the order they complete.
+    """
+    return self._map(_use_cached_files_chunk, requests)
+
+  def insert(self, inserts):
+    """Calls `ArtifactCache.insert` for the given inserts, in chunks.
+
+    :param list inserts: A list of (CacheKey, paths, overwrite) tuples.
+    :returns: An iterator of (index of the insert, result) pairs, in the order they complete.
+    """
+    return self._map(_insert_chunk, inserts)
+
+  def _map(self, func, items):
+    items = list(enumerate(items))
+    if not items:
+      return
+    num_chunks = min(len(items), self._CHUNKS_PER_WORKER * SubprocPool.num_processes())
+    chunk_size = int(math.ceil(len(items) / num_chunks))
+    chunks = [(self._cache_id, self._pickled_cache, func, items[i:i + chunk_size])
+              for i in range(0, len(items), chunk_size)]
+    try:
+      results = SubprocPool.foreground().imap_unordered(_call_chunk, chunks)
+      for _ in chunks:
+        # NB: Like `Context.subproc_map`, wait with a timeout so that we don't miss SIGINT.
+        while True:
+          try:
+            chunk_results = results.next(timeout=self._WAIT_SECS)
+            break
+          except multiprocessing.TimeoutError:
+            logger.debug('Artifact cache results still not ready...')
+        for index_and_result in chunk_results:
+          yield index_and_result
+    except KeyboardInterrupt:
+      SubprocPool.shutdown(True)
+      raise
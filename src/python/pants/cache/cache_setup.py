@@ -12,8 +12,11 @@ from collections import namedtuple
 from six.moves import range
 
 from pants.base.build_environment import get_buildroot
+from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import ArtifactCacheError
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
+from pants.cache.local_cache_index import LocalCacheIndex
 from pants.cache.pinger import BestUrlSelector, Pinger
 from pants.cache.resolver import NoopResolver, Resolver, RESTfulResolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -39,6 +42,9 @@ class RemoteCacheSpecRequiredError(ArtifactCacheError): pass
 class TooManyCacheSpecsError(ArtifactCacheError): pass
 
 
+class LocalStoreOptionsError(ArtifactCacheError): pass
+
+
 CacheSpec = namedtuple('CacheSpec', ['local', 'remote'])
 
 
@@ -77,12 +83,38 @@ class CacheSetup(Subsystem):
              help='The read timeout for any remote caches in use, in seconds.')
     register('--write-timeout', advanced=True, type=float, default=4.0,
              help='The write timeout for any remote caches in use, in seconds.')
+    register('--max-concurrent-requests', advanced=True, type=int, default=8,
+             help='The maximum number of concurrent requests made to a remote cache by each '
+                  'process when looking up many artifacts at once.')
     register('--compression-level', advanced=True, type=int, default=5,
-             help='The gzip compression level (0-9) for created artifacts.')
+             help='The compression level for created artifacts: 1-9 for gzip, 1-22 for zstd and '
+                  '0-16 for lz4.')
+    register('--compression-codec', advanced=True, choices=sorted(TarballArtifact.CODECS),
+             default=TarballArtifact.GZIP,
+             help='The compression codec for created artifacts. Artifacts are readable regardless '
+                  'of the codec they were created with, so this may be changed without '
+                  'invalidating existing caches.')
     register('--dereference-symlinks', type=bool, default=True, fingerprint=True,
              help='Dereference symlinks when creating cache tarball.')
     register('--max-entries-per-target', advanced=True, type=int, default=8,
              help='Maximum number of old cache files to keep per task target pair')
+    register('--local-max-size', advanced=True, type=int, default=None,
+             help='The maximum total size, in bytes, of the artifacts in a local tarball cache, '
+                  'across all tasks and targets. The least recently used artifacts are evicted '
+                  'first. Not supported with --local-store=content-addressed.')
+    register('--local-max-age', advanced=True, type=int, default=None,
+             help='The maximum time, in seconds, to keep an unused artifact in a local tarball '
+                  'cache. Not supported with --local-store=content-addressed.')
+    register('--local-store', advanced=True, choices=['tarball', 'content-addressed'],
+             default='tarball',
+             help='How local filesystem caches store artifacts. tarball: one compressed tarball '
+                  'per artifact. content-addressed: one blob per distinct file content, shared '
+                  'by all tasks using the same local cache root, plus a manifest per artifact.')
+    register('--local-restore-strategy', advanced=True, choices=['copy', 'hardlink'],
+             default='copy',
+             help='How a content-addressed local cache restores files. copy: clone files, using '
+                  'copy-on-write where the filesystem supports it. hardlink: hardlink files from '
+                  'the cache; only safe for tasks that never modify their outputs in place.')
     register('--pinger-timeout', advanced=True, type=float, default=0.5,
              help='number of seconds before pinger times out')
     register('--pinger-tries', advanced=True, type=int, default=2,
@@ -269,8 +301,11 @@ class CacheFactory(object):
       - A list or tuple of two specs, local, then remote, each as described above
     """
     compression = self._options.compression_level
-    if compression not in range(1, 10):
-      raise ValueError('compression_level must be an integer 1-9: {}'.format(compression))
+    codec = self._options.compression_codec
+    levels = TarballArtifact.LEVELS[codec]
+    if levels is not None and compression not in levels:
+      raise ValueError('compression_level must be an integer {}-{} for the {} codec: {}'.format(
+        levels[0], levels[-1], codec, compression))
 
     artifact_root = self._options.pants_workdir
 
@@ -278,10 +313,32 @@ class CacheFactory(object):
       path = os.path.join(parent_path, self._cache_dirname)
       self._log.debug('{0} {1} local artifact cache at {2}'
                       .format(self._task.stable_name(), action, path))
+      if self._options.local_store == 'content-addressed':
+        if self._options.local_max_size or self._options.local_max_age:
+          raise LocalStoreOptionsError('--local-max-size and --local-max-age are only supported '
+                                       'by the tarball local store, not by --local-store='
+                                       'content-addressed.')
+        # Blobs are shared by the caches of all tasks under the same local cache root.
+        return ContentAddressedArtifactCache(
+          artifact_root, path, compression,
+          blob_root=os.path.join(parent_path, 'blobs'),
+          max_entries_per_target=self._options.max_entries_per_target,
+          permissions=self._options.write_permissions,
+          dereference=self._options.dereference_symlinks,
+          restore_strategy=self._options.local_restore_strategy,
+          codec=codec)
+      index = None
+      if self._options.local_max_size or self._options.local_max_age:
+        # The index is shared by the caches of all tasks under the same local cache root.
+        index = LocalCacheIndex(os.path.realpath(os.path.expanduser(parent_path)),
+                                max_size=self._options.local_max_size,
+                                max_age=self._options.local_max_age)
       return LocalArtifactCache(artifact_root, path, compression,
                                 self._options.max_entries_per_target,
                                 permissions=self._options.write_permissions,
-                                dereference=self._options.dereference_symlinks)
+                                dereference=self._options.dereference_symlinks,
+                                codec=codec,
+                                index=index)
 
     def create_remote_cache(remote_spec, local_cache):
       urls = self.get_available_urls(remote_spec.split('|'))
@@ -290,13 +347,15 @@ class CacheFactory(object):
         best_url_selector = BestUrlSelector(
           ['{}/{}'.format(url.rstrip('/'), self._cache_dirname) for url in urls]
         )
-        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression)
+        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression,
+                                                            codec=codec)
         return RESTfulArtifactCache(
           artifact_root,
           best_url_selector,
           local_cache,
           read_timeout=self._options.read_timeout,
           write_timeout=self._options.write_timeout,
+          max_concurrent_requests=self._options.max_concurrent_requests,
         )
 
     local_cache = create_local_cache(spec.local) if spec.local else None
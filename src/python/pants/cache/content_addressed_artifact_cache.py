@@ -0,0 +1,410 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import stat
+import sys
+import uuid
+from contextlib import contextmanager
+
+from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact_cache import UnreadableArtifact
+from pants.cache.local_artifact_cache import BaseLocalArtifactCache
+from pants.util.contextutil import open_tar, temporary_file
+from pants.util.dirutil import (read_file, safe_concurrent_creation, safe_delete, safe_file_dump,
+                                safe_mkdir, safe_mkdir_for, safe_rmtree, safe_walk)
+
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedArtifactCache(BaseLocalArtifactCache):
+  """A local artifact cache that stores each distinct file content only once.
+
+  Rather than a tarball per cache key, each artifact is split into per-file blobs keyed by the
+  sha1 of their content, plus a small json manifest per cache key that maps artifact-relative
+  paths to blob digests. Identical files shared between targets, or between successive hashes
+  of the same target, are stored exactly once and are never recompressed.
+
+  The layout under the cache roots is:
+
+    <blob_root>/<digest[:2]>/<digest>            The interned blobs.
+    <blob_root>/refs.sqlite                      The index of the blobs each entry references.
+    <cache_root>/<id>/<hash>/manifest.json       The manifest for a cache key.
+    <cache_root>/<id>/<hash>/id                  The unique id of the entry in the index.
+    <cache_root>/<id>/<hash>/refs/<digest>       A hardlink to each blob the manifest references.
+
+  A blob is removed when the last entry referencing it in the index is pruned. (Its link count
+  can't serve as its reference count, as hardlinked restores add links to it from outside the
+  cache.) The `refs` hardlinks are what artifacts are restored from, so an entry remains readable
+  even if its blob is concurrently replaced or removed from the store before the entry's references
+  are recorded.
+
+  Artifacts are restored by cloning each file into place (using a copy-on-write clone where the
+  filesystem supports it, and a regular copy otherwise), or, with the `hardlink` restore strategy,
+  by hardlinking it. Hardlinked restores are nearly free, but tools that modify their outputs in
+  place (rather than replacing them) would modify the cached copy as well.
+  """
+
+  ID_NAME = 'id'
+  MANIFEST_NAME = 'manifest.json'
+  REFS_DIR = 'refs'
+  REFS_INDEX_NAME = 'refs.sqlite'
+
+  RESTORE_COPY = 'copy'
+  RESTORE_HARDLINK = 'hardlink'
+
+  _READ_SIZE_BYTES = 1024 * 1024
+
+  # The `FICLONE` ioctl request, from linux/fs.h.
+  _FICLONE = 0x40049409
+
+  def __init__(self, artifact_root, cache_root, compression, blob_root=None,
+               max_entries_per_target=None, permissions=None, dereference=True,
+               restore_strategy=RESTORE_COPY, codec=TarballArtifact.GZIP):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str cache_root: The manifests for each cache key are stored under this directory.
+    :param int compression: The gzip compression level for tarballs created for a remote cache.
+    :param str blob_root: The directory under which file contents are interned. May be shared
+                          between caches, but must be on the same filesystem as `cache_root`.
+                          Defaults to a `blobs` directory under the `cache_root`.
+    :param int max_entries_per_target: The maximum number of old entries to leave behind on a
+                                       cache miss.
+    :param str permissions: File permissions to use when creating manifest and blob files.
+    :param bool dereference: Dereference symlinks when collecting artifacts.
+    :param str restore_strategy: One of `copy` or `hardlink`.
+    :param str codec: The compression codec for tarballs created for a remote cache.
+    """
+    if restore_strategy not in (self.RESTORE_COPY, self.RESTORE_HARDLINK):
+      raise ValueError('Unknown restore strategy: {}'.format(restore_strategy))
+    super(ContentAddressedArtifactCache, self).__init__(
+      artifact_root,
+      compression,
+      permissions=int(permissions.strip(), base=8) if permissions else None,
+      dereference=dereference,
+      codec=codec
+    )
+    self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
+    self._blob_root = (os.path.realpath(os.path.expanduser(blob_root)) if blob_root
+                       else os.path.join(self._cache_root, 'blobs'))
+    self._max_entries_per_target = max_entries_per_target
+    self._restore_strategy = restore_strategy
+    self._clone_supported = sys.platform.startswith('linux')
+    safe_mkdir(self._cache_root)
+    safe_mkdir(self._blob_root)
+
+  def prune(self, root):
+    """Prune stale cache entries, and any blobs no longer referenced by an entry.
+
+    If the option --cache-max-entries-per-target is greater than zero, then prune will remove all
+    but n old entries for each target/task.
+
+    :param str root: The path under which cache entries will be cleaned.
+    """
+    max_entries_per_target = self._max_entries_per_target
+    if not os.path.isdir(root) or not max_entries_per_target:
+      return
+    entries = []
+    for name in os.listdir(root):
+      path = os.path.join(root, name)
+      entries.append((path, os.path.getmtime(path)))
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    for path, _ in entries[max_entries_per_target:]:
+      self._remove_entry(path)
+
+  def has(self, cache_key):
+    return os.path.isfile(self._manifest_for_key(cache_key))
+
+  def use_cached_files(self, cache_key, results_dir=None):
+    entry = self._entry_for_key(cache_key)
+    try:
+      manifest = self._read_manifest(entry)
+      if manifest is None:
+        return False
+      if results_dir is not None:
+        safe_rmtree(results_dir)
+      self._restore(entry, manifest)
+      return True
+    except Exception as e:
+      logger.warn('Error while reading {0} from local artifact cache: {1}'.format(entry, e))
+      self._remove_entry(entry)
+      return UnreadableArtifact(cache_key, e)
+
+  def try_insert(self, cache_key, paths):
+    self._store_paths(cache_key, paths)
+
+  @contextmanager
+  def insert_paths(self, cache_key, paths):
+    """Store the paths, and yield the path to a tarball of them for upload to a remote cache."""
+    self._store_paths(cache_key, paths)
+    with self._tmpfile(cache_key, 'write') as tmp:
+      self._artifact(tmp.name).collect(paths)
+      yield tmp.name
+
+  def delete(self, cache_key):
+    self._remove_entry(self._entry_for_key(cache_key))
+
+  def _store_tarball(self, cache_key, src):
+    """Intern the contents of a tarball fetched from elsewhere, and return it.
+
+    Failing to intern the tarball is not fatal: it has already been extracted by the caller.
+    """
+    try:
+      with self._new_entry(cache_key) as (entry, manifest):
+        with open_tar(src, 'r', errorlevel=2) as tarin:
+          digests_by_name = {}
+          for tarinfo in tarin:
+            if tarinfo.isdir():
+              manifest['dirs'].append(tarinfo.name)
+            elif tarinfo.issym():
+              manifest['symlinks'].append([tarinfo.name, tarinfo.linkname])
+            elif tarinfo.islnk():
+              # A hardlink names a file member earlier in the archive, whose content it shares.
+              if tarinfo.linkname not in digests_by_name:
+                raise ValueError('Hardlink {} to {} precedes its target in the archive.'
+                                 .format(tarinfo.name, tarinfo.linkname))
+              digest = digests_by_name[tarinfo.linkname]
+              digests_by_name[tarinfo.name] = digest
+              manifest['files'].append([tarinfo.name, digest, tarinfo.mode & 0o777])
+            elif tarinfo.isfile():
+              digest = self._intern(entry, tarin.extractfile(tarinfo))
+              digests_by_name[tarinfo.name] = digest
+              manifest['files'].append([tarinfo.name, digest, tarinfo.mode & 0o777])
+            else:
+              # Never intern an entry that is missing members.
+              raise ValueError('Unsupported member {} in the archive.'.format(tarinfo.name))
+    except Exception as e:
+      logger.warn('Error while storing {0} in local artifact cache: {1}'.format(cache_key, e))
+    return src
+
+  def _store_paths(self, cache_key, paths):
+    with self._new_entry(cache_key) as (entry, manifest):
+      for path in paths or ():
+        relpath = os.path.relpath(path, self.artifact_root)
+        if os.path.isdir(path) and (self._dereference or not os.path.islink(path)):
+          manifest['dirs'].append(relpath)
+          for root, dirs, files in safe_walk(path, followlinks=self._dereference):
+            for name in sorted(dirs):
+              self._store_path(entry, manifest, os.path.join(root, name), is_dir=True)
+            for name in sorted(files):
+              self._store_path(entry, manifest, os.path.join(root, name), is_dir=False)
+        else:
+          self._store_path(entry, manifest, path, is_dir=False)
+
+  def _store_path(self, entry, manifest, path, is_dir):
+    relpath = os.path.relpath(path, self.artifact_root)
+    if not self._dereference and os.path.islink(path):
+      manifest['symlinks'].append([relpath, os.readlink(path)])
+    elif is_dir:
+      manifest['dirs'].append(relpath)
+    else:
+      with open(path, 'rb') as fp:
+        digest = self._intern(entry, fp)
+      manifest['files'].append([relpath, digest, stat.S_IMODE(os.stat(path).st_mode)])
+
+  @contextmanager
+  def _new_entry(self, cache_key):
+    """Yield a temporary entry directory and an empty manifest to fill in.
+
+    On success the manifest is written and the entry is moved into place atomically.
+    """
+    final_entry = self._entry_for_key(cache_key)
+    with safe_concurrent_creation(final_entry) as entry:
+      safe_mkdir(os.path.join(entry, self.REFS_DIR))
+      safe_file_dump(os.path.join(entry, self.ID_NAME), uuid.uuid4().hex)
+      manifest = {'dirs': [], 'files': [], 'symlinks': []}
+      try:
+        yield entry, manifest
+        with open(os.path.join(entry, self.MANIFEST_NAME), 'wb') as fp:
+          json.dump(manifest, fp)
+        if self._permissions:
+          os.chmod(os.path.join(entry, self.MANIFEST_NAME), self._permissions)
+        self._add_refs(entry)
+      except Exception:
+        self._remove_entry(entry)
+        raise
+      # Replacing an existing entry must still release its blob references.
+      self._remove_entry(final_entry)
+    self.prune(os.path.dirname(final_entry))
+
+  def _intern(self, entry, fp):
+    """Copy the content of the given file object into the blob store, and reference it from entry.
+
+    :returns: The hex digest of the content.
+    """
+    with temporary_file(root_dir=self._blob_root, permissions=self._permissions or 0o644) as tmp:
+      hasher = hashlib.sha1()
+      for chunk in iter(lambda: fp.read(self._READ_SIZE_BYTES), b''):
+        hasher.update(chunk)
+        tmp.write(chunk)
+      tmp.close()
+      digest = hasher.hexdigest()
+
+      ref = os.path.join(entry, self.REFS_DIR, digest)
+      if os.path.exists(ref):
+        return digest
+      blob = self._blob_path(digest)
+      try:
+        os.link(blob, ref)
+      except OSError as e:
+        if e.errno == errno.ENOENT:
+          # We have the first copy of this content: reference it before publishing it, so that a
+          # concurrent prune never observes it unreferenced.
+          safe_mkdir_for(blob)
+          os.link(tmp.name, ref)
+          os.rename(tmp.name, blob)
+        elif e.errno == errno.EMLINK:
+          # The blob is referenced from too many entries for this filesystem: this entry gets its
+          # own copy of the content.
+          os.rename(tmp.name, ref)
+        else:
+          raise
+      return digest
+
+  def _add_refs(self, entry):
+    """Record the blobs the given entry references in the index."""
+    entry_id = self._read_entry_id(entry)
+    refs_dir = os.path.join(entry, self.REFS_DIR)
+    digests = os.listdir(refs_dir)
+    with self._refs_index() as c:
+      c.executemany("""INSERT OR IGNORE INTO refs VALUES (?, ?)""",
+                    [[digest, entry_id] for digest in digests])
+      for digest in digests:
+        blob = self._blob_path(digest)
+        if not os.path.exists(blob):
+          # The blob was removed by a concurrent prune after this entry linked it: publish it again.
+          safe_mkdir_for(blob)
+          try:
+            os.link(os.path.join(refs_dir, digest), blob)
+          except OSError as e:
+            if e.errno not in (errno.EEXIST, errno.EMLINK):
+              raise
+
+  def _restore(self, entry, manifest):
+    for relpath in manifest['dirs']:
+      safe_mkdir(os.path.join(self.artifact_root, relpath))
+    for relpath, digest, mode in manifest['files']:
+      dest = os.path.join(self.artifact_root, relpath)
+      safe_mkdir_for(dest)
+      # Never write through an existing file: it may be a hardlink to a cached blob.
+      safe_delete(dest)
+      self._materialize(os.path.join(entry, self.REFS_DIR, digest), dest, mode)
+    for relpath, target in manifest['symlinks']:
+      dest = os.path.join(self.artifact_root, relpath)
+      safe_mkdir_for(dest)
+      safe_delete(dest)
+      os.symlink(target, dest)
+
+  def _materialize(self, src, dest, mode):
+    hardlink = self._restore_strategy == self.RESTORE_HARDLINK
+    if hardlink and stat.S_IMODE(os.stat(src).st_mode) == mode:
+      try:
+        os.link(src, dest)
+        return
+      except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+          raise
+    with open(src, 'rb') as infile:
+      with open(dest, 'wb') as outfile:
+        if not self._clone(infile, outfile):
+          shutil.copyfileobj(infile, outfile, self._READ_SIZE_BYTES)
+    os.chmod(dest, mode)
+
+  def _clone(self, infile, outfile):
+    """Attempt a copy-on-write clone of infile to outfile, returning True if it succeeded."""
+    if not self._clone_supported:
+      return False
+    import fcntl
+    try:
+      fcntl.ioctl(outfile.fileno(), self._FICLONE, infile.fileno())
+      return True
+    except (IOError, OSError) as e:
+      if e.errno == errno.EXDEV:
+        return False
+      # The filesystem does not support cloning: don't try again.
+      self._clone_supported = False
+      return False
+
+  def _read_manifest(self, entry):
+    try:
+      with open(os.path.join(entry, self.MANIFEST_NAME), 'rb') as fp:
+        return json.load(fp)
+    except IOError as e:
+      if e.errno == errno.ENOENT:
+        return None
+      raise
+
+  def _remove_entry(self, entry):
+    """Remove the given entry, and any blobs that were referenced only by it."""
+    refs_dir = os.path.join(entry, self.REFS_DIR)
+    if os.path.isdir(refs_dir):
+      # Remove the manifest first, so that the entry is never observed with missing refs.
+      safe_delete(os.path.join(entry, self.MANIFEST_NAME))
+      entry_id = self._read_entry_id(entry)
+      with self._refs_index() as c:
+        if entry_id is not None:
+          c.execute("""DELETE FROM refs WHERE entry = ?""", [entry_id])
+        for digest in os.listdir(refs_dir):
+          if not c.execute("""SELECT 1 FROM refs WHERE digest = ? LIMIT 1""",
+                           [digest]).fetchone():
+            safe_delete(self._blob_path(digest))
+    safe_rmtree(entry)
+
+  def _read_entry_id(self, entry):
+    try:
+      return read_file(os.path.join(entry, self.ID_NAME))
+    except IOError as e:
+      if e.errno == errno.ENOENT:
+        return None
+      raise
+
+  @contextmanager
+  def _refs_index(self):
+    """Yield a cursor in an exclusive transaction on the index of the blobs entries reference.
+
+    The transaction also covers the changes to the blob store that depend on the index, so that a
+    blob is never removed while another entry is recording a reference to it.
+    """
+    # NB: Many processes, and caches sharing the blob root, may update the index concurrently.
+    conn = sqlite3.connect(os.path.join(self._blob_root, self.REFS_INDEX_NAME), timeout=60,
+                           isolation_level=None)
+    try:
+      conn.execute("""BEGIN IMMEDIATE""")
+      try:
+        c = conn.cursor()
+        c.execute("""
+          CREATE TABLE IF NOT EXISTS refs (
+            digest TEXT,
+            entry TEXT,
+            PRIMARY KEY (digest, entry)
+          )
+        """)
+        c.execute("""CREATE INDEX IF NOT EXISTS refs_entry_idx ON refs(entry)""")
+        yield c
+      except Exception:
+        conn.execute("""ROLLBACK""")
+        raise
+      conn.execute("""COMMIT""")
+    finally:
+      conn.close()
+
+  def _blob_path(self, digest):
+    return os.path.join(self._blob_root, digest[:2], digest)
+
+  def _entry_for_key(self, cache_key):
+    # Note: it's important to use the id as well as the hash, because two different targets
+    # may have the same hash if both have no sources, but we may still want to differentiate them.
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash)
+
+  def _manifest_for_key(self, cache_key):
+    return os.path.join(self._entry_for_key(cache_key), self.MANIFEST_NAME)
@@ -18,24 +18,75 @@ from pants.util.dirutil import (safe_delete, safe_mkdir, safe_mkdir_for,
 logger = logging.getLogger(__name__)
 
 
+class _TeeReader(object):
+  """A file-like object that reads from an iterator over chunks of bytes.
+
+  Each chunk is also written to `sink` (if any) as it is read.
+  """
+
+  def __init__(self, chunks, sink=None):
+    self._chunks = iter(chunks)
+    self._sink = sink
+    self._chunk = b''
+    self._offset = 0
+
+  def _next_chunk(self):
+    for chunk in self._chunks:
+      if self._sink is not None:
+        self._sink.write(chunk)
+      if chunk:
+        self._chunk = chunk
+        self._offset = 0
+        return True
+    return False
+
+  def read(self, size=-1):
+    parts = []
+    remaining = size
+    while size < 0 or remaining > 0:
+      if self._offset >= len(self._chunk) and not self._next_chunk():
+        break
+      end = len(self._chunk) if size < 0 else self._offset + remaining
+      part = self._chunk[self._offset:end]
+      self._offset += len(part)
+      remaining -= len(part)
+      parts.append(part)
+    return b''.join(parts)
+
+  def drain(self):
+    """Read (and so copy to the sink) any chunks that remain."""
+    while self._next_chunk():
+      pass
+    self._offset = len(self._chunk)
+
+
 class BaseLocalArtifactCache(ArtifactCache):
 
-  def __init__(self, artifact_root, compression, permissions=None, dereference=True):
+  # Whether artifacts passed to `store_and_use_artifact` are kept by `_store_tarball`, and so must
+  # be written to disk as they are extracted.
+  _stores_artifacts = True
+
+  def __init__(self, artifact_root, compression, permissions=None, dereference=True,
+               codec=TarballArtifact.GZIP):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param int compression: The gzip compression level for created artifacts.
                             Valid values are 0-9.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param str codec: The compression codec for created artifacts: see `TarballArtifact.CODECS`.
+                      Artifacts are readable regardless of the codec they were created with.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
     self._cache_root = None
     self._permissions = permissions
     self._dereference = dereference
+    self._codec = codec
 
   def _artifact(self, path):
-    return TarballArtifact(self.artifact_root, path, self._compression, dereference=self._dereference)
+    return TarballArtifact(self.artifact_root, path, self._compression,
+                           dereference=self._dereference, codec=self._codec)
 
   @contextmanager
   def _tmpfile(self, cache_key, use):
@@ -52,7 +103,10 @@ class BaseLocalArtifactCache(ArtifactCache):
       yield self._store_tarball(cache_key, tmp.name)
 
   def store_and_use_artifact(self, cache_key, src, results_dir=None):
-    """Store and then extract the artifact from the given `src` iterator for the given cache_key.
+    """Extract and then store the artifact from the given `src` iterator for the given cache_key.
+
+    The artifact is extracted while it is read from `src`, and is simultaneously written to a
+    temporary file which is stored only once extraction has succeeded.
 
     :param cache_key: Cache key for the artifact.
     :param src: Iterator over binary data to store for the artifact.
@@ -60,12 +114,6 @@ class BaseLocalArtifactCache(ArtifactCache):
       be cleared both before extraction, and after a failure to extract.
     """
     with self._tmpfile(cache_key, 'read') as tmp:
-      for chunk in src:
-        tmp.write(chunk)
-      tmp.close()
-      tarball = self._store_tarball(cache_key, tmp.name)
-      artifact = self._artifact(tarball)
-
       # NOTE(mateo): The two clean=True args passed in this method are likely safe, since the cache will by
       # definition be dealing with unique results_dir, as opposed to the stable vt.results_dir (aka 'current').
       # But if by chance it's passed the stable results_dir, safe_makedir(clean=True) will silently convert it
@@ -73,17 +121,22 @@ class BaseLocalArtifactCache(ArtifactCache):
       if results_dir is not None:
         safe_mkdir(results_dir, clean=True)
 
+      reader = _TeeReader(src, sink=tmp if self._stores_artifacts else None)
       try:
-        artifact.extract()
+        self._artifact(tmp.name).extract_stream(reader)
+        # Consume any trailing padding, so that the stored tarball is complete.
+        reader.drain()
       except Exception:
         # Do our best to clean up after a failed artifact extraction. If a results_dir has been
         # specified, it is "expected" to represent the output destination of the extracted
         # artifact, and so removing it should clear any partially extracted state.
         if results_dir is not None:
           safe_mkdir(results_dir, clean=True)
-        safe_delete(tarball)
         raise
 
+      tmp.close()
+      if self._stores_artifacts:
+        self._store_tarball(cache_key, tmp.name)
       return True
 
   def _store_tarball(self, cache_key, src):
@@ -94,8 +147,10 @@ class BaseLocalArtifactCache(ArtifactCache):
 class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
 
+  _SUFFIX = '.tgz'
+
   def __init__(self, artifact_root, cache_root, compression, max_entries_per_target=None,
-               permissions=None, dereference=True):
+               permissions=None, dereference=True, codec=TarballArtifact.GZIP, index=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
@@ -103,16 +158,23 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     :param int max_entries_per_target: The maximum number of old cache files to leave behind on a cache miss.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param str codec: The compression codec for created artifacts.
+    :param LocalCacheIndex index: An index which bounds the size and age of the artifacts in this
+                                  cache (and any other caches sharing the index).
     """
     super(LocalArtifactCache, self).__init__(
       artifact_root,
       compression,
       permissions=int(permissions.strip(), base=8) if permissions else None,
-      dereference=dereference
+      dereference=dereference,
+      codec=codec
     )
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
     self._max_entries_per_target = max_entries_per_target
+    self._index = index
     safe_mkdir(self._cache_root)
+    if self._index:
+      self._index.ensure_index(self._SUFFIX)
 
   def prune(self, root):
     """Prune stale cache files
@@ -125,7 +187,13 @@ class LocalArtifactCache(BaseLocalArtifactCache):
 
     max_entries_per_target = self._max_entries_per_target
     if os.path.isdir(root) and max_entries_per_target:
-      safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+      if self._index:
+        before = os.listdir(root)
+        safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+        removed = set(before) - set(os.listdir(root))
+        self._index.remove([os.path.join(root, name) for name in removed])
+      else:
+        safe_rm_oldest_items_in_dir(root, max_entries_per_target)
 
   def has(self, cache_key):
     return self._artifact_for(cache_key).exists()
@@ -141,11 +209,13 @@ class LocalArtifactCache(BaseLocalArtifactCache):
         if results_dir is not None:
           safe_rmtree(results_dir)
         artifact.extract()
+        if self._index:
+          self._index.touch(tarfile)
         return True
     except Exception as e:
       # TODO(davidt): Consider being more granular in what is caught.
       logger.warn('Error while reading {0} from local artifact cache: {1}'.format(tarfile, e))
-      safe_delete(tarfile)
+      self._delete_file(tarfile)
       return UnreadableArtifact(cache_key, e)
 
     return False
@@ -155,7 +225,12 @@ class LocalArtifactCache(BaseLocalArtifactCache):
       pass
 
   def delete(self, cache_key):
-    safe_delete(self._cache_file_for_key(cache_key))
+    self._delete_file(self._cache_file_for_key(cache_key))
+
+  def _delete_file(self, path):
+    safe_delete(path)
+    if self._index:
+      self._index.remove([path])
 
   def _store_tarball(self, cache_key, src):
     dest = self._cache_file_for_key(cache_key)
@@ -164,12 +239,14 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     if self._permissions:
       os.chmod(dest, self._permissions)
     self.prune(os.path.dirname(dest))  # Remove old cache files.
+    if self._index:
+      self._index.record(dest)  # Remove least recently used cache files.
     return dest
 
   def _cache_file_for_key(self, cache_key):
     # Note: it's important to use the id as well as the hash, because two different targets
     # may have the same hash if both have no sources, but we may still want to differentiate them.
-    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.tgz'
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + self._SUFFIX
 
 
 class TempLocalArtifactCache(BaseLocalArtifactCache):
@@ -179,12 +256,14 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
   actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
 
-  def __init__(self, artifact_root, compression, permissions=None):
+  _stores_artifacts = False
+
+  def __init__(self, artifact_root, compression, permissions=None, codec=TarballArtifact.GZIP):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     """
     super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
-                                                 permissions=permissions)
+                                                 permissions=permissions, codec=codec)
 
   def _store_tarball(self, cache_key, src):
     return src
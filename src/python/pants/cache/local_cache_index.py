@@ -0,0 +1,145 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from pants.util.dirutil import safe_delete, safe_mkdir_for, safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheIndex(object):
+  """An index of the artifacts under a local cache root, used to bound its size and age.
+
+  The cache root is typically the parent of the cache directories of many tasks.
+
+  Artifacts are recorded as they are stored, and their access time is updated on every cache hit,
+  so that least recently used artifacts can be evicted without rescanning the cache root. The
+  index is an sqlite database, so it may be shared by all the caches (and all the processes)
+  using the same cache root.
+
+  The index tolerates artifacts that have disappeared from disk, but artifacts stored without
+  it (eg, by an older version of pants) are only discovered when the index is first created.
+  """
+
+  INDEX_NAME = 'index.sqlite'
+
+  def __init__(self, cache_root, max_size=None, max_age=None):
+    """
+    :param str cache_root: The directory under which all indexed artifacts are stored.
+    :param int max_size: The maximum total size, in bytes, of the indexed artifacts.
+    :param int max_age: The maximum time, in seconds, since an artifact was last used.
+    """
+    self._cache_root = cache_root
+    self._path = os.path.join(cache_root, self.INDEX_NAME)
+    self._max_size = max_size
+    self._max_age = max_age
+
+  def ensure_index(self, suffix):
+    """Create the index if it does not exist, populating it from the existing cache root.
+
+    :param str suffix: The file suffix of the existing artifacts.
+    """
+    with self._cursor(exclusive=True) as c:
+      if c.execute("""SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artifacts'"""
+                   ).fetchone():
+        return
+      c.execute("""
+        CREATE TABLE artifacts (
+          path TEXT PRIMARY KEY,
+          size INTEGER,  -- Bytes.
+          atime REAL  -- Seconds since the epoch.
+        )
+      """)
+      c.execute("""CREATE INDEX artifacts_atime_idx ON artifacts(atime)""")
+      for root, _, files in safe_walk(self._cache_root):
+        for f in files:
+          if f.endswith(suffix):
+            path = os.path.join(root, f)
+            stat = os.stat(path)
+            c.execute("""INSERT OR IGNORE INTO artifacts VALUES (?, ?, ?)""",
+                      [path, stat.st_size, stat.st_mtime])
+
+  def record(self, path):
+    """Record that the artifact at `path` was stored, then evict other artifacts if needed."""
+    with self._cursor() as c:
+      c.execute("""INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?)""",
+                [path, os.path.getsize(path), time.time()])
+    self.evict(keep=path)
+
+  def touch(self, path):
+    """Record that the artifact at `path` was used."""
+    with self._cursor() as c:
+      c.execute("""UPDATE artifacts SET atime = ? WHERE path = ?""", [time.time(), path])
+
+  def remove(self, paths):
+    """Record that the artifacts at `paths` were removed."""
+    with self._cursor() as c:
+      c.executemany("""DELETE FROM artifacts WHERE path = ?""", [[path] for path in paths])
+
+  def total_size(self):
+    with self._cursor() as c:
+      return c.execute("""SELECT COALESCE(SUM(size), 0) FROM artifacts""").fetchone()[0]
+
+  def evict(self, keep=None):
+    """Remove artifacts older than the maximum age, then the least recently used artifacts until
+    the total size is under the maximum size.
+
+    :param str keep: The path of an artifact that must not be evicted by size, eg because it was
+                     just stored.
+    :returns: The paths of the evicted artifacts.
+    """
+    if not self._max_size and not self._max_age:
+      return []
+    evicted = []
+    with self._cursor(exclusive=True) as c:
+      if self._max_age:
+        cutoff = time.time() - self._max_age
+        evicted.extend(row[0] for row in c.execute(
+          """SELECT path FROM artifacts WHERE atime < ?""", [cutoff]))
+        c.execute("""DELETE FROM artifacts WHERE atime < ?""", [cutoff])
+      if self._max_size:
+        excess = c.execute("""SELECT COALESCE(SUM(size), 0) FROM artifacts""").fetchone()[0]
+        excess -= self._max_size
+        lru = []
+        if excess > 0:
+          for path, size in c.execute("""SELECT path, size FROM artifacts ORDER BY atime"""):
+            if excess <= 0:
+              break
+            if path == keep:
+              continue
+            excess -= size
+            lru.append(path)
+        c.executemany("""DELETE FROM artifacts WHERE path = ?""", [[path] for path in lru])
+        evicted.extend(lru)
+    for path in evicted:
+      safe_delete(path)
+    if evicted:
+      logger.debug('Evicted {} artifacts from {}'.format(len(evicted), self._cache_root))
+    return evicted
+
+  @contextmanager
+  def _cursor(self, exclusive=False):
+    safe_mkdir_for(self._path)
+    # NB: Many processes may update the index concurrently, so be patient when it is locked. We
+    # manage transactions explicitly, so that an exclusive transaction covers a read followed by a
+    # write.
+    conn = sqlite3.connect(self._path, timeout=60, isolation_level=None)
+    try:
+      conn.execute("""BEGIN IMMEDIATE""" if exclusive else """BEGIN""")
+      try:
+        yield conn.cursor()
+      except Exception:
+        conn.execute("""ROLLBACK""")
+        raise
+      conn.execute("""COMMIT""")
+    finally:
+      conn.close()
@@ -8,9 +8,11 @@ import logging
 import multiprocessing
 import Queue
 import threading
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
 from pants.cache.artifact_cache import ArtifactCache, NonfatalArtifactCacheError, UnreadableArtifact
 
@@ -25,10 +27,17 @@ logging.getLogger('requests').setLevel(logging.WARNING)
 class RequestsSession(object):
   _session = None
 
+  # The number of keep-alive connections retained per host: this bounds the useful concurrency
+  # of batched requests.
+  POOL_MAXSIZE = 32
+
   @classmethod
   def instance(cls):
     if cls._session is None:
       cls._session = requests.Session()
+      adapter = HTTPAdapter(pool_maxsize=cls.POOL_MAXSIZE)
+      cls._session.mount('http://', adapter)
+      cls._session.mount('https://', adapter)
     return cls._session
 
 
@@ -37,13 +46,16 @@ class RESTfulArtifactCache(ArtifactCache):
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, best_url_selector, local, read_timeout=4.0, write_timeout=4.0):
+  def __init__(self, artifact_root, best_url_selector, local, read_timeout=4.0, write_timeout=4.0,
+               max_concurrent_requests=8):
     """
     :param string artifact_root: The path under which cacheable products will be read/written.
     :param BestUrlSelector best_url_selector: Url selector that supports fail-over. Each returned
       url represents prefix for some RESTful service. We must be able to PUT and GET to any path
       under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param int max_concurrent_requests: The maximum number of requests in flight at once for
+      batched lookups (see `has_many` and `use_cached_files_many`).
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
 
@@ -51,6 +63,7 @@ class RESTfulArtifactCache(ArtifactCache):
     self._read_timeout_secs = read_timeout
     self._write_timeout_secs = write_timeout
     self._localcache = local
+    self._max_concurrent_requests = max_concurrent_requests
 
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
@@ -65,6 +78,29 @@ class RESTfulArtifactCache(ArtifactCache):
       return True
     return self._request('HEAD', cache_key) is not None
 
+  def has_many(self, cache_keys):
+    results = self._localcache.has_many(cache_keys)
+    missing = [i for i, found in enumerate(results) if not found]
+    found_remotely = self._map_concurrently(self._has_or_miss, [cache_keys[i] for i in missing])
+    for i, found in zip(missing, found_remotely):
+      results[i] = found
+    return results
+
+  def use_cached_files_many(self, requests):
+    return self._map_concurrently(self._use_cached_files_or_miss, requests)
+
+  def _map_concurrently(self, func, items):
+    """Map `func` over `items` on a bounded pool of threads, which share the keep-alive
+    connections of the session."""
+    if len(items) <= 1:
+      return [func(item) for item in items]
+    pool = ThreadPool(processes=min(len(items), self._max_concurrent_requests))
+    try:
+      return pool.map(func, items, chunksize=1)
+    finally:
+      pool.close()
+      pool.join()
+
   def use_cached_files(self, cache_key, results_dir=None):
     if self._localcache.has(cache_key):
       return self._localcache.use_cached_files(cache_key, results_dir)
@@ -0,0 +1,213 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import logging
+import os
+from collections import defaultdict, deque
+from hashlib import sha1
+
+from pants.base.build_environment import get_buildroot
+from pants.base.specs import SiblingAddresses, Specs
+from pants.build_graph.address import Address
+from pants.build_graph.injectables_mixin import InjectablesMixin
+from pants.engine.fs import PathGlobs, Snapshot
+from pants.engine.legacy.graph import HydratedTargets
+from pants.source.source_digest_cache import SourceDigestCache
+from pants.util.dirutil import read_file, safe_concurrent_creation, safe_file_dump
+
+
+logger = logging.getLogger(__name__)
+
+
+class DependentGraph(object):
+  """A graph for walking dependent addresses of TargetAdaptor objects.
+
+  This avoids/imitates constructing a v1 BuildGraph object, because that codepath results
+  in many references held in mutable global state (ie, memory leaks).
+  """
+
+  @classmethod
+  def from_iterable(cls, target_types, adaptor_iter):
+    """Create a new DependentGraph from an iterable of TargetAdaptor subclasses."""
+    inst = cls()
+    for target_adaptor in adaptor_iter:
+      inst.inject_target(target_types, target_adaptor)
+    return inst
+
+  @staticmethod
+  def dependencies_of(target_types, target_adaptor):
+    """Returns the addresses of all the dependencies of a target, declared or implicit."""
+    target_cls = target_types[target_adaptor.type_alias]
+    implicit_deps = (Address.parse(s)
+                     for s in target_cls.compute_dependency_specs(kwargs=target_adaptor.kwargs()))
+    return list(target_adaptor.dependencies) + list(implicit_deps)
+
+  def __init__(self):
+    self._dependent_address_map = defaultdict(set)
+
+  def inject_target(self, target_types, target_adaptor):
+    """Inject a target, respecting all sources of dependencies."""
+    self.inject_dependencies(target_adaptor.address,
+                             self.dependencies_of(target_types, target_adaptor))
+
+  def inject_dependencies(self, address, dependencies):
+    """Inject the given dependency addresses of the target at `address`."""
+    for dep in dependencies:
+      self._dependent_address_map[dep].add(address)
+
+  def dependents_of_addresses(self, addresses):
+    """Given an iterable of addresses, yield all of those addresses dependents."""
+    seen = set(addresses)
+    for address in addresses:
+      for dependent_address in self._dependent_address_map[address]:
+        if dependent_address not in seen:
+          seen.add(dependent_address)
+          yield dependent_address
+
+  def transitive_dependents_of_addresses(self, addresses):
+    """Given an iterable of addresses, yield all of those addresses dependents, transitively."""
+    seen = set(addresses)
+    to_visit = deque(seen)
+    while to_visit:
+      for dependent_address in self._dependent_address_map[to_visit.popleft()]:
+        if dependent_address not in seen:
+          seen.add(dependent_address)
+          to_visit.append(dependent_address)
+          yield dependent_address
+
+
+class DependeesIndex(object):
+  """A reverse-dependency index of every target in the repo, persisted between runs.
+
+  The index records the dependencies of the targets declared in each directory along with a
+  fingerprint of that directory's BUILD files, so an update only parses the BUILD files of
+  directories that changed since the last one. When run in the daemon, the engine keeps the
+  snapshot of BUILD files and the targets of unchanged directories warm, invalidating them via
+  watchman, so an update does not even re-read those.
+
+  Unlike walking `TransitiveHydratedTargets` for the whole repo, the index does not validate that
+  every dependency of a target exists.
+  """
+
+  # Bump this when the format of the persisted index changes.
+  _VERSION = 1
+
+  def __init__(self, scheduler, target_types, workdir, build_patterns=None,
+               build_ignore_patterns=None):
+    """
+    :param scheduler: The `Scheduler` session to parse BUILD files with.
+    :param dict target_types: The target types of the symbol table, by alias.
+    :param string workdir: The directory to persist the index in.
+    :param list build_patterns: The patterns identifying BUILD files.
+    :param list build_ignore_patterns: The patterns of paths to ignore when finding BUILD files.
+    """
+    self._scheduler = scheduler
+    self._target_types = target_types
+    self._index_path = os.path.join(workdir, 'dependees_index.json')
+    self._build_patterns = tuple(build_patterns or ('BUILD', 'BUILD.*'))
+    self._build_ignore_patterns = tuple(build_ignore_patterns or ())
+
+  def _build_files_by_dir(self):
+    include = self._build_patterns + tuple('**/{}'.format(p) for p in self._build_patterns)
+    snapshot, = self._scheduler.product_request(
+      Snapshot, [PathGlobs(include=include, exclude=self._build_ignore_patterns)])
+    build_files_by_dir = defaultdict(list)
+    for build_file in snapshot.files:
+      build_files_by_dir[os.path.dirname(build_file.path)].append(build_file.path)
+    return build_files_by_dir
+
+  def _fingerprint_dirs(self, build_files_by_dir):
+    """Returns a dict from directory to a fingerprint of the BUILD files in it."""
+    build_files = sorted(f for files in build_files_by_dir.values() for f in files)
+    buildroot = get_buildroot()
+    digests = dict(zip(build_files,
+                       SourceDigestCache.digests_for([os.path.join(buildroot, f)
+                                                      for f in build_files])))
+    fingerprints = {}
+    for directory, files in build_files_by_dir.items():
+      hasher = sha1()
+      for build_file in sorted(files):
+        hasher.update(build_file.encode('utf-8'))
+        hasher.update(digests[build_file].encode('utf-8'))
+      fingerprints[directory] = hasher.hexdigest()
+    return fingerprints
+
+  def _injectables(self):
+    """Returns the injectable specs of the subsystems of the target types, by subsystem scope.
+
+    Targets may depend implicitly on the injectables of their subsystems (see eg
+    `ScalaLibrary.compute_dependency_specs`), which are configured by options rather than by BUILD
+    files.
+    """
+    injectables = {}
+    for target_type in self._target_types.values():
+      for subsystem in target_type.subsystems():
+        if issubclass(subsystem, InjectablesMixin):
+          injectables[subsystem.options_scope] = (
+            subsystem.global_instance().injectables_spec_mapping)
+    return injectables
+
+  def _header(self):
+    return {
+      'version': self._VERSION,
+      'target_types': sorted(self._target_types.keys()),
+      'injectables': self._injectables(),
+    }
+
+  def _load(self):
+    """Returns the persisted index as a dict from directory to its fingerprint and targets."""
+    if not os.path.exists(self._index_path):
+      return {}
+    try:
+      stored = json.loads(read_file(self._index_path))
+    except ValueError as e:
+      logger.debug('Ignoring unreadable dependees index {}: {}'.format(self._index_path, e))
+      return {}
+    # An index recorded with other target types or injectables may have other implicit dependencies.
+    if stored.get('header') != self._header():
+      return {}
+    return stored['dirs']
+
+  def _store(self, dirs):
+    with safe_concurrent_creation(self._index_path) as tmp_path:
+      safe_file_dump(tmp_path, json.dumps({'header': self._header(), 'dirs': dirs}))
+
+  def _parse_dirs(self, directories):
+    """Returns a dict from directory to a dict from the specs of its targets to their deps."""
+    targets_by_dir = {directory: {} for directory in directories}
+    if directories:
+      specs = Specs(dependencies=tuple(SiblingAddresses(d) for d in sorted(directories)))
+      hydrated_targets, = self._scheduler.product_request(HydratedTargets, [specs])
+      for hydrated_target in hydrated_targets.dependencies:
+        address = hydrated_target.adaptor.address
+        dependencies = DependentGraph.dependencies_of(self._target_types, hydrated_target.adaptor)
+        targets_by_dir[address.spec_path][address.spec] = sorted(d.spec for d in dependencies)
+    return targets_by_dir
+
+  def update(self):
+    """Brings the index up to date with the BUILD files in the repo, and returns its graph.
+
+    :returns: A `DependentGraph` of every target in the repo.
+    """
+    stored_dirs = self._load()
+    fingerprints = self._fingerprint_dirs(self._build_files_by_dir())
+    changed = [d for d, fingerprint in fingerprints.items()
+               if stored_dirs.get(d, {}).get('fingerprint') != fingerprint]
+    logger.debug('Updating the dependees index for {} of {} directories.'
+                 .format(len(changed), len(fingerprints)))
+
+    dirs = {d: stored_dirs[d] for d in fingerprints if d not in changed}
+    for directory, targets in self._parse_dirs(changed).items():
+      dirs[directory] = {'fingerprint': fingerprints[directory], 'targets': targets}
+    if changed or len(dirs) != len(stored_dirs):
+      self._store(dirs)
+
+    graph = DependentGraph()
+    for entry in dirs.values():
+      for spec, dependencies in entry['targets'].items():
+        graph.inject_dependencies(Address.parse(spec), [Address.parse(d) for d in dependencies])
+    return graph
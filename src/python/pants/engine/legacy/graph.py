@@ -70,6 +70,11 @@ class LegacyBuildGraph(BuildGraph):
     self._target_types = target_types
     super(LegacyBuildGraph, self).__init__()
 
+  @property
+  def target_types(self):
+    """Returns the target types of the symbol table, by alias."""
+    return self._target_types
+
   def clone_new(self):
     """Returns a new BuildGraph instance of the same type and with the same __init__ params."""
     return LegacyBuildGraph(self._scheduler, self._target_types)
@@ -134,6 +139,7 @@ class LegacyBuildGraph(BuildGraph):
       # Link its declared dependencies, which will be indexed independently.
       self._target_dependencies_by_address[address].add(dependency)
       self._target_dependees_by_address[dependency].add(address)
+      self._dependencies_revision += 1
     return target
 
   def _instantiate_target(self, target_adaptor):
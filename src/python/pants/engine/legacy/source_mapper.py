@@ -5,15 +5,18 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import os
+import re
+from collections import defaultdict
 
-import six
+from twitter.common.collections import OrderedSet
 
+from pants.base.build_file import BuildFile
 from pants.base.specs import AscendantAddresses, SingleAddress, Specs
 from pants.build_graph.address import parse_spec
 from pants.build_graph.source_mapper import SourceMapper
-from pants.engine.legacy.address_mapper import LegacyAddressMapper
 from pants.engine.legacy.graph import HydratedTargets
-from pants.source.filespec import any_matches_filespec
+from pants.source.filespec import glob_to_regex
+from pants.util.memo import memoized
 
 
 def iter_resolve_and_parse_specs(rel_path, specs):
@@ -31,6 +34,101 @@ def resolve_and_parse_specs(*args, **kwargs):
   return list(iter_resolve_and_parse_specs(*args, **kwargs))
 
 
+@memoized
+def _compile_glob(pattern):
+  # NB: Memoized for the life of the process, so the daemon compiles each glob of the repo once.
+  return re.compile(glob_to_regex(pattern))
+
+
+class SourceOwnerIndex(object):
+  """An index of the files owned by targets, for finding the owners of many files at once.
+
+  The literal sources of targets are indexed by path, and their source globs by the directory the
+  glob is rooted in (the longest leading path of the glob without a wildcard), so finding the
+  owners of a file only tests the globs rooted in one of its ancestor directories rather than
+  every glob of every target.
+  """
+
+  def __init__(self):
+    # Source paths and glob directories to lists of (address, exclude regexes, regex) entries.
+    self._literal_owners = defaultdict(list)
+    self._glob_owners_by_dir = defaultdict(list)
+    # BUILD files and directories to the addresses of the targets declared in them.
+    self._declaring_files = defaultdict(set)
+    self._build_file_owners_by_dir = defaultdict(set)
+
+  @staticmethod
+  def _glob_dir(pattern):
+    """Returns the directory a glob is rooted in, or None if the glob is a literal path."""
+    components = pattern.strip('/').split('/')
+    for i, component in enumerate(components):
+      if '*' in component:
+        return '/'.join(components[:i])
+    return None
+
+  def add(self, hydrated_target):
+    """Indexes the files owned by the given `HydratedTarget`."""
+    address = hydrated_target.adaptor.address
+    # A precise declaring file for a BuildFileAddress, or else any BUILD file in its directory.
+    rel_path = getattr(address, 'rel_path', None)
+    if rel_path:
+      self._declaring_files[rel_path].add(address)
+    else:
+      self._build_file_owners_by_dir[address.spec_path].add(address)
+
+    target_kwargs = hydrated_target.adaptor.kwargs()
+
+    # Handle targets like `python_binary` which have a singular `source='main.py'` declaration.
+    target_source = target_kwargs.get('source')
+    if target_source:
+      self._literal_owners[os.path.join(address.spec_path, target_source)].append(
+        (address, (), None))
+
+    # Handle `sources`-declaring targets.
+    # NB: Deleted files can only be matched against the 'filespec' (ie, `PathGlobs`) for a target,
+    # so we don't actually consult the matched files of the fileset here.
+    target_sources = target_kwargs.get('sources')
+    filespec = target_sources.filespec if target_sources else None
+    if not filespec:
+      return
+    excludes = tuple(_compile_glob(pattern)
+                     for exclude_spec in filespec.get('exclude', [])
+                     for pattern in exclude_spec.get('globs', []))
+    for pattern in filespec.get('globs', []):
+      glob_dir = self._glob_dir(pattern)
+      if glob_dir is None and not pattern.startswith('/'):
+        self._literal_owners[pattern.strip('/')].append((address, excludes, None))
+      else:
+        # NB: The rare glob rooted at `/` is tested against every path.
+        glob_dir = '' if pattern.startswith('/') else glob_dir
+        self._glob_owners_by_dir[glob_dir].append((address, excludes, _compile_glob(pattern)))
+
+  @staticmethod
+  def _ancestor_dirs(path):
+    directory = os.path.dirname(path)
+    while directory and directory != '/':
+      yield directory
+      directory = os.path.dirname(directory)
+    yield ''
+
+  def owners_of(self, path):
+    """Returns the set of addresses of the indexed targets that own the file at `path`."""
+    owners = set(self._declaring_files.get(path, ()))
+    if BuildFile._is_buildfile_name(os.path.basename(path)):
+      owners.update(self._build_file_owners_by_dir.get(os.path.dirname(path), ()))
+
+    candidates = list(self._literal_owners.get(path, ()))
+    for directory in self._ancestor_dirs(path):
+      candidates.extend(self._glob_owners_by_dir.get(directory, ()))
+
+    for address, excludes, regex in candidates:
+      if address in owners:
+        continue
+      if (regex is None or regex.match(path)) and not any(ex.match(path) for ex in excludes):
+        owners.add(address)
+    return owners
+
+
 class EngineSourceMapper(SourceMapper):
   """A v2 engine backed SourceMapper that supports pre-`BuildGraph` cache warming in the daemon."""
 
@@ -49,46 +147,19 @@ class EngineSourceMapper(SourceMapper):
   def target_addresses_for_source(self, source):
     return list(self.iter_target_addresses_for_sources([source]))
 
-  def _match_sources(self, sources_set, fileset):
-    # NB: Deleted files can only be matched against the 'filespec' (ie, `PathGlobs`) for a target,
-    # so we don't actually call `fileset.matches` here.
-    # TODO: This call should be pushed down into the engine to match directly against
-    # `PathGlobs` as we erode the `AddressMapper`/`SourceMapper` split.
-    return any_matches_filespec(sources_set, fileset.filespec)
-
-  def _owns_any_source(self, sources_set, legacy_target):
-    """Given a `HydratedTarget` instance, check if it owns the given source file."""
-    target_kwargs = legacy_target.adaptor.kwargs()
-
-    # Handle targets like `python_binary` which have a singular `source='main.py'` declaration.
-    target_source = target_kwargs.get('source')
-    if target_source:
-      path_from_build_root = os.path.join(legacy_target.adaptor.address.spec_path, target_source)
-      if path_from_build_root in sources_set:
-        return True
-
-    # Handle `sources`-declaring targets.
-    target_sources = target_kwargs.get('sources', [])
-    if target_sources and self._match_sources(sources_set, target_sources):
-      return True
-
-    return False
-
   def iter_target_addresses_for_sources(self, sources):
     """Bulk, iterable form of `target_addresses_for_source`."""
     # Walk up the buildroot looking for targets that would conceivably claim changed sources.
     sources_set = set(sources)
     dependencies = tuple(AscendantAddresses(directory=d) for d in self._unique_dirs_for_sources(sources_set))
 
-    # Uniqify all transitive hydrated targets.
-    hydrated_target_to_address = {}
     hydrated_targets, = self._scheduler.product_request(HydratedTargets, [Specs(dependencies=dependencies)])
-    for hydrated_target in hydrated_targets.dependencies:
-      if hydrated_target not in hydrated_target_to_address:
-        hydrated_target_to_address[hydrated_target] = hydrated_target.adaptor.address
-
-    for hydrated_target, legacy_address in six.iteritems(hydrated_target_to_address):
-      # Handle BUILD files.
-      if (LegacyAddressMapper.any_is_declaring_file(legacy_address, sources_set) or
-          self._owns_any_source(sources_set, hydrated_target)):
-        yield legacy_address
+    index = SourceOwnerIndex()
+    for hydrated_target in set(hydrated_targets.dependencies):
+      index.add(hydrated_target)
+
+    owners = OrderedSet()
+    for source in sorted(sources_set):
+      owners.update(index.owners_of(source))
+    for address in owners:
+      yield address
@@ -147,6 +147,14 @@ class Context(object):
     """Returns the current workspace, if any."""
     return self._workspace
 
+  @property
+  def scheduler(self):
+    """Returns the v2 engine `Scheduler` session for the current run, if any.
+
+    :API: public
+    """
+    return self._scheduler
+
   @property
   def invalidation_report(self):
     return self._invalidation_report
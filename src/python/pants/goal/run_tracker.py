@@ -23,6 +23,7 @@ from pants.base.workunit import WorkUnit
 from pants.goal.aggregated_timings import AggregatedTimings
 from pants.goal.artifact_cache_stats import ArtifactCacheStats
 from pants.goal.pantsd_stats import PantsDaemonStats
+from pants.goal.scheduling_stats import SchedulingStats
 from pants.reporting.report import Report
 from pants.stats.statsdb import StatsDBFactory
 from pants.subsystem.subsystem import Subsystem
@@ -92,6 +93,7 @@ class RunTracker(Subsystem):
     self.self_timings = None
     self.artifact_cache_stats = None
     self.pantsd_stats = None
+    self.scheduling_stats = None
 
     # Initialized in `start()`.
     self.report = None
@@ -193,6 +195,9 @@ class RunTracker(Subsystem):
     # Daemon stats.
     self.pantsd_stats = PantsDaemonStats()
 
+    # How the jobs of parallel executions were scheduled onto workers.
+    self.scheduling_stats = SchedulingStats()
+
     return run_id
 
   def start(self, report, run_start_time=None):
@@ -353,6 +358,7 @@ class RunTracker(Subsystem):
       'critical_path_timings': self.get_critical_path_timings().get_all(),
       'artifact_cache_stats': self.artifact_cache_stats.get_all(),
       'pantsd_stats': self.pantsd_stats.get_all(),
+      'scheduling_stats': self.scheduling_stats.get_all(),
       'outcomes': self.outcomes
     }
     # Dump individual stat file.
@@ -0,0 +1,36 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+
+class SchedulingStats(object):
+  """Tracks how the jobs of parallel executions (eg, of compiles) were scheduled onto workers.
+
+  Each execution is reported as a dict by the task that ran it, including at least its critical
+  path, the idle gaps of each of its workers, and the speedup it would have had given unlimited
+  workers. See `pants.backend.jvm.tasks.jvm_compile.execution_graph.ExecutionStats.get_all`.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._executions = []
+
+  def add_execution(self, scope, stats):
+    """Record the stats of an execution run by the task in the given options scope.
+
+    :param string scope: The options scope of the task that ran the execution.
+    :param dict stats: The stats of the execution.
+    """
+    execution = dict(stats)
+    execution['scope'] = scope
+    with self._lock:
+      self._executions.append(execution)
+
+  def get_all(self):
+    """Returns the stats of each execution as a list of dicts, in the order they were added."""
+    with self._lock:
+      return list(self._executions)
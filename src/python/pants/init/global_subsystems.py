@@ -10,6 +10,7 @@ from pants.init.repro import Reproducer
 from pants.init.subprocess import Subprocess
 from pants.reporting.reporting import Reporting
 from pants.scm.subsystems.changed import Changed
+from pants.source.source_digest_cache import SourceDigestCache
 from pants.source.source_root import SourceRootConfig
 
 
@@ -19,6 +20,7 @@ class GlobalSubsystems(object):
     """Subsystems used outside of any task."""
     return {
       SourceRootConfig,
+      SourceDigestCache,
       Reporting,
       Reproducer,
       RunTracker,
@@ -71,10 +71,29 @@ class BuildConfigInitializer(object):
 
 
 class OptionsInitializer(object):
-  """Initializes options."""
+  """Initializes options.
+
+  This class uses a class-level cache of the options registered by every optionable, keyed by the
+  known scopes (and so the optionable classes of the loaded backends and plugins), the bootstrap
+  option values they may register with and the pants version. Repeated invocations in the same
+  runtime context (ie, pantsd) replay those registrations rather than re-registering each option.
+  """
+
+  _registration_states = {}
+  _max_registration_states = 8
+
+  @classmethod
+  def reset(cls):
+    cls._registration_states.clear()
 
   @staticmethod
-  def _construct_options(options_bootstrapper, build_configuration):
+  def _registration_key(known_scope_infos, bootstrap_option_values):
+    bootstrap_values = tuple((name, repr(bootstrap_option_values[name]))
+                             for name in bootstrap_option_values or ())
+    return pants_version(), tuple(known_scope_infos), bootstrap_values
+
+  @classmethod
+  def _construct_options(cls, options_bootstrapper, build_configuration):
     """Parse and register options.
 
     :returns: An Options object representing the full set of runtime options.
@@ -97,11 +116,20 @@ class OptionsInitializer(object):
     # Now that we have the known scopes we can get the full options.
     options = options_bootstrapper.get_full_options(known_scope_infos)
 
+    key = cls._registration_key(known_scope_infos, options.bootstrap_option_values())
+    registration_state = cls._registration_states.get(key)
+    if registration_state is not None:
+      options.restore_registration_state(registration_state)
+      return options
+
     distinct_optionable_classes = sorted({si.optionable_cls for si in known_scope_infos},
                                          key=lambda o: o.options_scope)
     for optionable_cls in distinct_optionable_classes:
       optionable_cls.register_options_on_scope(options)
 
+    if len(cls._registration_states) >= cls._max_registration_states:
+      cls._registration_states.clear()
+    cls._registration_states[key] = options.registration_state()
     return options
 
   @classmethod
@@ -4,18 +4,17 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import itertools
 import logging
-from collections import defaultdict
+import os
 
 from twitter.common.collections import OrderedSet
 
 from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
-from pants.base.specs import DescendantAddresses, SingleAddress, Specs
+from pants.base.specs import SingleAddress, Specs
 from pants.base.target_roots import TargetRoots
-from pants.build_graph.address import Address
-from pants.engine.legacy.graph import TransitiveHydratedTargets, target_types_from_symbol_table
+from pants.engine.legacy.dependees_index import DependeesIndex
+from pants.engine.legacy.graph import target_types_from_symbol_table
 from pants.engine.legacy.source_mapper import EngineSourceMapper
 from pants.goal.workspace import ScmWorkspace
 from pants.scm.subsystems.changed import ChangedRequest
@@ -24,74 +23,6 @@ from pants.scm.subsystems.changed import ChangedRequest
 logger = logging.getLogger(__name__)
 
 
-class _DependentGraph(object):
-  """A graph for walking dependent addresses of TargetAdaptor objects.
-
-  This avoids/imitates constructing a v1 BuildGraph object, because that codepath results
-  in many references held in mutable global state (ie, memory leaks).
-
-  The long term goal is to deprecate the `changed` goal in favor of sufficiently good cache
-  hit rates, such that rather than running:
-
-    ./pants --changed-parent=master test
-
-  ...you would always be able to run:
-
-    ./pants test ::
-
-  ...and have it complete in a similar amount of time by hitting relevant caches.
-  """
-
-  @classmethod
-  def from_iterable(cls, target_types, adaptor_iter):
-    """Create a new DependentGraph from an iterable of TargetAdaptor subclasses."""
-    inst = cls(target_types)
-    for target_adaptor in adaptor_iter:
-      inst.inject_target(target_adaptor)
-    return inst
-
-  def __init__(self, target_types):
-    self._dependent_address_map = defaultdict(set)
-    self._target_types = target_types
-
-  def inject_target(self, target_adaptor):
-    """Inject a target, respecting all sources of dependencies."""
-    target_cls = self._target_types[target_adaptor.type_alias]
-
-    declared_deps = target_adaptor.dependencies
-    implicit_deps = (Address.parse(s)
-                     for s in target_cls.compute_dependency_specs(kwargs=target_adaptor.kwargs()))
-
-    for dep in itertools.chain(declared_deps, implicit_deps):
-      self._dependent_address_map[dep].add(target_adaptor.address)
-
-  def dependents_of_addresses(self, addresses):
-    """Given an iterable of addresses, yield all of those addresses dependents."""
-    seen = set(addresses)
-    for address in addresses:
-      for dependent_address in self._dependent_address_map[address]:
-        if dependent_address not in seen:
-          seen.add(dependent_address)
-          yield dependent_address
-
-  def transitive_dependents_of_addresses(self, addresses):
-    """Given an iterable of addresses, yield all of those addresses dependents, transitively."""
-    addresses_to_visit = set(addresses)
-    while 1:
-      dependents = set(self.dependents_of_addresses(addresses))
-      # If we've exhausted all dependencies or visited all remaining nodes, break.
-      if (not dependents) or dependents.issubset(addresses_to_visit):
-        break
-      addresses = dependents.difference(addresses_to_visit)
-      addresses_to_visit.update(dependents)
-
-    transitive_set = itertools.chain(
-      *(self._dependent_address_map[address] for address in addresses_to_visit)
-    )
-    for dep in transitive_set:
-      yield dep
-
-
 class InvalidSpecConstraint(Exception):
   """Raised when invalid constraints are given via target specs and arguments like --changed*."""
 
@@ -146,7 +77,12 @@ class TargetRootsCalculator(object):
     logger.debug('changed_request is: %s', changed_request)
     logger.debug('owned_files are: %s', owned_files)
     scm = get_scm()
-    change_calculator = ChangeCalculator(scheduler=session, symbol_table=symbol_table, scm=scm) if scm else None
+    global_options = options.for_global_scope()
+    change_calculator = ChangeCalculator(scheduler=session,
+                                         symbol_table=symbol_table,
+                                         scm=scm,
+                                         workdir=global_options.pants_workdir,
+                                         build_ignore_patterns=global_options.build_ignore) if scm else None
     owner_calculator = OwnerCalculator(scheduler=session, symbol_table=symbol_table) if owned_files else None
     targets_specified = sum(1 for item
                          in (changed_request.is_actionable(), owned_files, spec_roots)
@@ -182,11 +118,13 @@ class ChangeCalculator(object):
   """A ChangeCalculator that finds the target addresses of changed files based on scm."""
 
   def __init__(self, scheduler, symbol_table, scm, workspace=None, changes_since=None,
-               diffspec=None):
+               diffspec=None, workdir=None, build_ignore_patterns=None):
     """
     :param scheduler: The `Scheduler` instance to use for computing file to target mappings.
     :param symbol_table: The symbol table.
     :param scm: The `Scm` instance to use for change determination.
+    :param string workdir: The pants workdir, to persist the index of dependees in.
+    :param list build_ignore_patterns: The patterns of paths to ignore when finding BUILD files.
     """
     self._scm = scm or get_scm()
     self._scheduler = scheduler
@@ -195,6 +133,8 @@ class ChangeCalculator(object):
     self._workspace = workspace or ScmWorkspace(scm)
     self._changes_since = changes_since
     self._diffspec = diffspec
+    self._workdir = workdir or os.path.join(get_buildroot(), '.pants.d')
+    self._build_ignore_patterns = build_ignore_patterns
 
   def changed_files(self, changes_since=None, diffspec=None):
     """Determines the files changed according to SCM/workspace and options."""
@@ -221,17 +161,13 @@ class ChangeCalculator(object):
     if changed_request.include_dependees not in ('direct', 'transitive'):
       return
 
-    # TODO: For dependee finding, we technically only need to parse all build files to collect target
-    # dependencies. But in order to fully validate the graph and account for the fact that deleted
-    # targets do not show up as changed roots, we use the `TransitiveHydratedTargets` product.
+    # NB: The index only parses the BUILD files that changed since it was last updated, but unlike
+    # a walk of the `TransitiveHydratedTargets` of the whole repo, does not validate the graph.
     #   see https://github.com/pantsbuild/pants/issues/382
-    specs = (DescendantAddresses(''),)
-    adaptor_iter = (t.adaptor
-                    for targets in self._scheduler.product_request(TransitiveHydratedTargets,
-                                                                   [Specs(specs)])
-                    for t in targets.roots)
-    graph = _DependentGraph.from_iterable(target_types_from_symbol_table(self._symbol_table),
-                                          adaptor_iter)
+    graph = DependeesIndex(self._scheduler,
+                           target_types_from_symbol_table(self._symbol_table),
+                           os.path.join(self._workdir, 'dependees'),
+                           build_ignore_patterns=self._build_ignore_patterns).update()
 
     if changed_request.include_dependees == 'direct':
       for address in graph.dependents_of_addresses(changed_addresses):
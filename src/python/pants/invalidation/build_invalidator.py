@@ -7,6 +7,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import errno
 import hashlib
 import os
+import sqlite3
+import threading
 from abc import abstractmethod
 from collections import namedtuple
 
@@ -121,11 +123,26 @@ class UncacheableCacheKeyGenerator(CacheKeyGeneratorInterface):
 # the inputs to the current version of that target set. That cache key can then be used
 # to look up build artifacts in an artifact cache.
 class BuildInvalidator(object):
-  """Invalidates build targets based on the SHA1 hash of source files and other inputs."""
+  """Invalidates build targets based on the SHA1 hash of source files and other inputs.
+
+  Each fingerprint is stored in its own file.
+  """
 
   class Factory(Subsystem):
     options_scope = 'build-invalidator'
 
+    STORE_FILES = 'files'
+    STORE_SQLITE = 'sqlite'
+
+    @classmethod
+    def register_options(cls, register):
+      super(BuildInvalidator.Factory, cls).register_options(register)
+      register('--store', advanced=True, choices=[cls.STORE_FILES, cls.STORE_SQLITE],
+               default=cls.STORE_FILES,
+               help='How to store fingerprints. `files` stores one small file per target per task. '
+                    '`sqlite` stores all the fingerprints for a task in a single database, which '
+                    'is much cheaper to check and update in bulk for large numbers of targets.')
+
     @classmethod
     def create(cls, build_task=None):
       """Creates a build invalidator optionally scoped to a task.
@@ -134,7 +151,10 @@ class BuildInvalidator(object):
                              supplied the build invalidator will act globally across all build
                              tasks.
       """
-      root = os.path.join(cls.global_instance().get_options().pants_workdir, 'build_invalidator')
+      options = cls.global_instance().get_options()
+      root = os.path.join(options.pants_workdir, 'build_invalidator')
+      if options.store == cls.STORE_SQLITE:
+        return SqliteBuildInvalidator(root, scope=build_task)
       return BuildInvalidator(root, scope=build_task)
 
   @staticmethod
@@ -164,14 +184,21 @@ class BuildInvalidator(object):
     :param cache_key: A CacheKey object (as returned by CacheKeyGenerator.key_for().
     :returns: The previous cache_key, or None if there was not a previous build.
     """
-    if not self.cacheable(cache_key):
-      # We should never successfully cache an uncacheable CacheKey.
-      return None
+    return self.previous_keys([cache_key])[0]
 
-    previous_hash = self._read_sha(cache_key)
-    if not previous_hash:
-      return None
-    return CacheKey(cache_key.id, previous_hash)
+  def previous_keys(self, cache_keys):
+    """Like `previous_key`, but for many keys at once.
+
+    :param cache_keys: A list of CacheKey objects.
+    :returns: A list of the previous cache_keys (or None), in the same order as `cache_keys`.
+    """
+    # We should never successfully cache an uncacheable CacheKey.
+    shas = self._read_shas([cache_key for cache_key in cache_keys if self.cacheable(cache_key)])
+    previous_keys = []
+    for cache_key in cache_keys:
+      previous_hash = shas.get(cache_key.id) if self.cacheable(cache_key) else None
+      previous_keys.append(CacheKey(cache_key.id, previous_hash) if previous_hash else None)
+    return previous_keys
 
   def needs_update(self, cache_key):
     """Check if the given cached item is invalid.
@@ -179,19 +206,40 @@ class BuildInvalidator(object):
     :param cache_key: A CacheKey object (as returned by CacheKeyGenerator.key_for().
     :returns: True if the cached version of the item is out of date.
     """
-    if not self.cacheable(cache_key):
-      # An uncacheable CacheKey is always out of date.
-      return True
+    return self.needs_update_many([cache_key])[0]
 
-    return self._read_sha(cache_key) != cache_key.hash
+  def needs_update_many(self, cache_keys):
+    """Like `needs_update`, but for many keys at once.
+
+    :param cache_keys: A list of CacheKey objects.
+    :returns: A list of booleans, in the same order as `cache_keys`.
+    """
+    # An uncacheable CacheKey is always out of date, and never has a previous key.
+    return [previous_key is None or previous_key.hash != cache_key.hash
+            for cache_key, previous_key in zip(cache_keys, self.previous_keys(cache_keys))]
 
   def update(self, cache_key):
     """Makes cache_key the valid version of the corresponding target set.
 
     :param cache_key: A CacheKey object (typically returned by CacheKeyGenerator.key_for()).
     """
-    if self.cacheable(cache_key):
-      self._write_sha(cache_key)
+    self.update_many([cache_key])
+
+  def update_many(self, cache_keys):
+    """Makes each of the cache_keys the valid version of its corresponding target set.
+
+    :param cache_keys: A list of CacheKey objects.
+    """
+    cacheable_keys = [cache_key for cache_key in cache_keys if self.cacheable(cache_key)]
+    if cacheable_keys:
+      self._write_shas(cacheable_keys)
+
+  def flush(self):
+    """Records any updates which have not been recorded yet.
+
+    Invalidators may buffer the updates made with `update`, `update_many` and `force_invalidate`
+    until this is called.
+    """
 
   def force_invalidate_all(self):
     """Force-invalidates all cached items."""
@@ -199,12 +247,8 @@ class BuildInvalidator(object):
 
   def force_invalidate(self, cache_key):
     """Force-invalidate the cached item."""
-    try:
-      if self.cacheable(cache_key):
-        os.unlink(self._sha_file(cache_key))
-    except OSError as e:
-      if e.errno != errno.ENOENT:
-        raise
+    if self.cacheable(cache_key):
+      self._delete_sha(cache_key)
 
   def _sha_file(self, cache_key):
     return self._sha_file_by_id(cache_key.id)
@@ -212,12 +256,19 @@ class BuildInvalidator(object):
   def _sha_file_by_id(self, id):
     return os.path.join(self._root, safe_filename(id, extension='.hash'))
 
-  def _write_sha(self, cache_key):
-    with open(self._sha_file(cache_key), 'w') as fd:
-      fd.write(cache_key.hash)
+  def _write_shas(self, cache_keys):
+    for cache_key in cache_keys:
+      with open(self._sha_file(cache_key), 'w') as fd:
+        fd.write(cache_key.hash)
 
-  def _read_sha(self, cache_key):
-    return self._read_sha_by_id(cache_key.id)
+  def _read_shas(self, cache_keys):
+    """Returns a dict from cache key id to the stored hash, for the ids that have one."""
+    shas = {}
+    for cache_key in cache_keys:
+      sha = self._read_sha_by_id(cache_key.id)
+      if sha:
+        shas[cache_key.id] = sha
+    return shas
 
   def _read_sha_by_id(self, id):
     try:
@@ -227,3 +278,124 @@ class BuildInvalidator(object):
       if e.errno != errno.ENOENT:
         raise
       return None  # File doesn't exist.
+
+  def _delete_sha(self, cache_key):
+    try:
+      os.unlink(self._sha_file(cache_key))
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+
+
+class SqliteBuildInvalidator(BuildInvalidator):
+  """A BuildInvalidator that stores all of the fingerprints for its scope in a single sqlite file.
+
+  Checking many keys at once costs a single query, rather than a file open per key. Updates are
+  buffered in memory until the next `flush`, which records all of them in a single transaction on
+  the connection that is kept open for the life of the invalidator.
+
+  The database lives in the same directory as the fingerprint files of a `BuildInvalidator` for
+  the same root and scope, so `force_invalidate_all` on a global invalidator also clears the
+  databases of all scoped invalidators.
+  """
+
+  DB_NAME = 'fingerprints.sqlite'
+
+  # Stay well below sqlite's default limit of 999 bound parameters per statement.
+  _MAX_BATCH_SIZE = 500
+
+  def __init__(self, root, scope=None):
+    super(SqliteBuildInvalidator, self).__init__(root, scope=scope)
+    self._db_path = os.path.join(self._root, self.DB_NAME)
+    # NB: Tasks may update their targets from the threads of a worker pool.
+    self._lock = threading.Lock()
+    self._conn = None
+    self._db_file_id = None
+    # The hashes written since the last flush by cache key id, or None for a deleted hash.
+    self._pending = {}
+
+  def flush(self):
+    with self._lock:
+      conn = self._connection()
+      if not self._pending:
+        return
+      with conn:
+        conn.executemany("""INSERT OR REPLACE INTO fingerprints VALUES (?, ?)""",
+                         [[id, sha] for id, sha in self._pending.items() if sha is not None])
+        conn.executemany("""DELETE FROM fingerprints WHERE id = ?""",
+                         [[id] for id, sha in self._pending.items() if sha is None])
+      self._pending.clear()
+
+  def force_invalidate_all(self):
+    with self._lock:
+      self._close()
+      self._pending.clear()
+    super(SqliteBuildInvalidator, self).force_invalidate_all()
+
+  def _write_shas(self, cache_keys):
+    with self._lock:
+      self._connection()
+      for cache_key in cache_keys:
+        self._pending[cache_key.id] = cache_key.hash
+
+  def _read_shas(self, cache_keys):
+    ids = sorted({cache_key.id for cache_key in cache_keys})
+    shas = {}
+    if not ids:
+      return shas
+    with self._lock:
+      conn = self._connection()
+      for i in range(0, len(ids), self._MAX_BATCH_SIZE):
+        batch = ids[i:i + self._MAX_BATCH_SIZE]
+        query = """SELECT id, hash FROM fingerprints WHERE id IN ({})""".format(
+          ', '.join('?' * len(batch)))
+        shas.update(conn.execute(query, batch))
+      for id in ids:
+        if id in self._pending:
+          sha = self._pending[id]
+          if sha is None:
+            shas.pop(id, None)
+          else:
+            shas[id] = sha
+    return shas
+
+  def _delete_sha(self, cache_key):
+    with self._lock:
+      self._connection()
+      self._pending[cache_key.id] = None
+
+  def _connection(self):
+    """Returns the connection to the database, (re)opening it if the database has been removed.
+
+    The database (along with the rest of the root) is removed by a `force_invalidate_all` of this
+    invalidator, or of the global invalidator. The pending updates are discarded along with it.
+
+    Must be called with the lock held.
+    """
+    db_file_id = self._file_id()
+    if self._conn is not None and db_file_id == self._db_file_id:
+      return self._conn
+    self._close()
+    self._pending.clear()
+    safe_mkdir(self._root)
+    # NB: Concurrent pants runs may share a workdir, so be patient when the database is locked.
+    self._conn = sqlite3.connect(self._db_path, timeout=60, check_same_thread=False)
+    with self._conn:
+      self._conn.execute(
+        """CREATE TABLE IF NOT EXISTS fingerprints (id TEXT PRIMARY KEY, hash TEXT)""")
+    self._db_file_id = self._file_id()
+    return self._conn
+
+  def _file_id(self):
+    try:
+      stat = os.stat(self._db_path)
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      return None
+    return stat.st_dev, stat.st_ino
+
+  def _close(self):
+    if self._conn is not None:
+      self._conn.close()
+      self._conn = None
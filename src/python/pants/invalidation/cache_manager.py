@@ -47,7 +47,10 @@ class VersionedTargetSet(object):
                                                                  versioned_target._cache_manager))
     return VersionedTargetSet(cache_manager, versioned_targets)
 
-  def __init__(self, cache_manager, versioned_targets):
+  # Indicates that the previous cache key of a VersionedTargetSet should be looked up on creation.
+  _UNKNOWN_PREVIOUS_KEY = object()
+
+  def __init__(self, cache_manager, versioned_targets, previous_cache_key=_UNKNOWN_PREVIOUS_KEY):
     self._cache_manager = cache_manager
     self.versioned_targets = versioned_targets
     self.targets = [vt.target for vt in versioned_targets]
@@ -55,7 +58,9 @@ class VersionedTargetSet(object):
     # The following line is a no-op if cache_key was set in the VersionedTarget __init__ method.
     self.cache_key = CacheKey.combine_cache_keys([vt.cache_key for vt in versioned_targets])
     # NB: previous_cache_key may be None on the first build of a target.
-    self.previous_cache_key = cache_manager.previous_key(self.cache_key)
+    if previous_cache_key is self._UNKNOWN_PREVIOUS_KEY:
+      previous_cache_key = cache_manager.previous_key(self.cache_key)
+    self.previous_cache_key = previous_cache_key
     self.valid = self.previous_cache_key == self.cache_key
 
     if cache_manager.invalidation_report:
@@ -171,9 +176,13 @@ class VersionedTarget(VersionedTargetSet):
   :API: public
   """
 
-  def __init__(self, cache_manager, target, cache_key):
+  def __init__(self, cache_manager, target, cache_key,
+               previous_cache_key=VersionedTargetSet._UNKNOWN_PREVIOUS_KEY):
     """
     :API: public
+
+    :param previous_cache_key: The previous cache key of the target, if it is already known (eg,
+                               because it was looked up in bulk with those of other targets).
     """
     if not isinstance(target, Target):
       raise ValueError("The target {} must be an instance of Target but is not.".format(target.id))
@@ -181,7 +190,8 @@ class VersionedTarget(VersionedTargetSet):
     self.target = target
     self.cache_key = cache_key
     # Must come after the assignments above, as they are used in the parent's __init__.
-    super(VersionedTarget, self).__init__(cache_manager, [self])
+    super(VersionedTarget, self).__init__(cache_manager, [self],
+                                          previous_cache_key=previous_cache_key)
     self.id = target.id
 
   @property
@@ -295,17 +305,18 @@ class InvalidationCacheManager(object):
 
   def update(self, vts):
     """Mark a changed or invalidated VersionedTargetSet as successfully processed."""
+    invalid_vts = [vt for vt in vts.versioned_targets if not vt.valid]
     for vt in vts.versioned_targets:
       vt.ensure_legal()
-      if not vt.valid:
-        self._invalidator.update(vt.cache_key)
-        vt.valid = True
-        self._artifact_write_callback(vt)
     if not vts.valid:
       vts.ensure_legal()
-      self._invalidator.update(vts.cache_key)
-      vts.valid = True
-      self._artifact_write_callback(vts)
+      if vts not in invalid_vts:
+        invalid_vts.append(vts)
+    # Record all of the new fingerprints at once, which is much cheaper for some invalidators.
+    self._invalidator.update_many([vt.cache_key for vt in invalid_vts])
+    for vt in invalid_vts:
+      vt.valid = True
+      self._artifact_write_callback(vt)
 
   def force_invalidate(self, vts):
     """Force invalidation of a VersionedTargetSet."""
@@ -315,6 +326,10 @@ class InvalidationCacheManager(object):
     self._invalidator.force_invalidate(vts.cache_key)
     vts.valid = False
 
+  def flush(self):
+    """Records any fingerprint updates and invalidations that the invalidator has buffered."""
+    self._invalidator.flush()
+
   def check(self,
             targets,
             topological_order=False):
@@ -363,10 +378,12 @@ class InvalidationCacheManager(object):
         sorted_targets = [t for t in reversed(sort_targets(targets)) if t in target_set]
       else:
         sorted_targets = sorted(targets)
-      for target in sorted_targets:
-        target_key = self._key_for(target)
-        if target_key is not None:
-          yield VersionedTarget(self, target, target_key)
+      target_keys = [(target, self._key_for(target)) for target in sorted_targets]
+      target_keys = [(target, key) for target, key in target_keys if key is not None]
+      # Look up the previous keys of all of the targets at once, rather than one by one.
+      previous_keys = self._invalidator.previous_keys([key for _, key in target_keys])
+      for (target, target_key), previous_key in zip(target_keys, previous_keys):
+        yield VersionedTarget(self, target, target_key, previous_cache_key=previous_key)
     return list(vt_iter())
 
   def cacheable(self, cache_key):
@@ -11,6 +11,7 @@ import re
 import select
 import threading
 import time
+from collections import defaultdict
 from contextlib import closing
 
 from six import string_types
@@ -19,8 +20,10 @@ from twitter.common.collections import maybe_list
 from pants.base.build_environment import get_buildroot
 from pants.java.executor import Executor, SubprocessExecutor
 from pants.java.nailgun_client import NailgunClient
-from pants.pantsd.process_manager import FingerprintedProcessManager, ProcessGroup
+from pants.pantsd.process_manager import (FingerprintedProcessManager, ProcessGroup,
+                                          swallow_psutil_exceptions)
 from pants.util.dirutil import read_file, safe_file_dump, safe_open
+from pants.util.process_handler import subprocess
 
 
 logger = logging.getLogger(__name__)
@@ -56,6 +59,53 @@ class NailgunProcessGroup(ProcessGroup):
         proc.terminate()
 
 
+class NailgunProcess(object):
+  """A `subprocess.Popen`-like handle to a java program run asynchronously in a nailgun server.
+
+  The program runs to completion in a thread of this process. Terminating or killing it terminates
+  the nailgun server running it.
+  """
+
+  def __init__(self, executor, run, cmd):
+    """
+    :param executor: The NailgunExecutor whose server runs the program.
+    :param run: A no-arg callable that runs the program and returns its exit code.
+    :param string cmd: The command line of the program, for error messages.
+    """
+    self._executor = executor
+    self._cmd = cmd
+    self._returncode = None
+    self._error = None
+    self._thread = threading.Thread(target=self._run, args=(run,))
+    self._thread.daemon = True
+    self._thread.start()
+
+  def _run(self, run):
+    try:
+      self._returncode = run()
+    except Exception as e:
+      self._error = e
+
+  def poll(self):
+    return None if self._thread.is_alive() else self._returncode
+
+  def wait(self, timeout=None):
+    # NB: We join with a timeout even when there is none, because otherwise python ignores SIGINT
+    # while waiting, so we won't be able to ctrl-c out.
+    self._thread.join(timeout if timeout is not None else 1000000000)
+    if self._thread.is_alive():
+      raise subprocess.TimeoutExpired(self._cmd, timeout)
+    if self._error:
+      raise self._error
+    return self._returncode
+
+  def terminate(self):
+    self._executor.terminate()
+
+  def kill(self):
+    self._executor.terminate()
+
+
 # TODO: Once we integrate standard logging into our reporting framework, we can consider making
 # some of the log.debug() below into log.info(). Right now it just looks wrong on the console.
 class NailgunExecutor(Executor, FingerprintedProcessManager):
@@ -63,6 +113,10 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
 
      If a nailgun is not available for a given set of jvm args and classpath, one is launched and
      re-used for the given jvm args and classpath on subsequent runs.
+
+     A server may also be relaunched after it has run `max_runs` programs, or once its resident
+     memory exceeds `max_rss` bytes, or, if `health_check` is set, once it stops accepting
+     connections.
   """
 
   # 'NGServer 0.9.1 started on 127.0.0.1, port 53785.'
@@ -79,7 +133,8 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
   _PROCESS_NAME = b'java'
 
   def __init__(self, identity, workdir, nailgun_classpath, distribution,
-               connect_timeout=10, connect_attempts=5, metadata_base_dir=None):
+               connect_timeout=10, connect_attempts=5, metadata_base_dir=None, max_runs=None,
+               max_rss=None, health_check=False):
     Executor.__init__(self, distribution=distribution)
     FingerprintedProcessManager.__init__(self,
                                          name=identity,
@@ -96,6 +151,9 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
     self._nailgun_classpath = maybe_list(nailgun_classpath)
     self._connect_timeout = connect_timeout
     self._connect_attempts = connect_attempts
+    self._max_runs = max_runs
+    self._max_rss = max_rss
+    self._health_check = health_check
 
   def __str__(self):
     return 'NailgunExecutor({identity}, dist={dist}, pid={pid} socket={socket})'.format(
@@ -127,6 +185,7 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
   def _runner(self, classpath, main, jvm_options, args, cwd=None):
     """Runner factory. Called via Executor.execute()."""
     command = self._create_command(classpath, main, jvm_options, args)
+    runner_cwd = cwd
 
     class Runner(self.Runner):
       @property
@@ -141,17 +200,37 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
         nailgun = self._get_nailgun_client(jvm_options, classpath, stdout, stderr, stdin)
         try:
           logger.debug('Executing via {ng_desc}: {cmd}'.format(ng_desc=nailgun, cmd=this.cmd))
-          return nailgun.execute(main, cwd, *args)
+          return nailgun.execute(main, cwd or runner_cwd, *args)
         except nailgun.NailgunError as e:
           self.terminate()
           raise self.Error('Problem launching via {ng_desc} command {main} {args}: {msg}'
                            .format(ng_desc=nailgun, main=main, args=' '.join(args), msg=e))
 
+      def spawn(this, stdout=None, stderr=None, stdin=None, cwd=None):
+        return NailgunProcess(self, lambda: this.run(stdout, stderr, stdin, cwd), this.cmd)
+
     return Runner()
 
+  def _needs_recycling(self):
+    """Returns True if the running server has run too many programs or grown too large."""
+    if self._max_runs:
+      runs = self.read_metadata_by_name(self.name, 'runs', int) or 0
+      if runs >= self._max_runs:
+        logger.debug('Nailgun {} has run {} programs, recycling it.'.format(self._identity, runs))
+        return True
+    if self._max_rss:
+      with swallow_psutil_exceptions():
+        rss = self._as_process().memory_info().rss
+        if rss > self._max_rss:
+          logger.debug('Nailgun {} uses {} bytes of memory, recycling it.'
+                       .format(self._identity, rss))
+          return True
+    return False
+
   def _check_nailgun_state(self, new_fingerprint):
     running = self.is_alive()
-    updated = self.needs_restart(new_fingerprint) or self.cmd != self._distribution.java
+    updated = (self.needs_restart(new_fingerprint) or self.cmd != self._distribution.java or
+               (running and self._needs_recycling()))
     logging.debug('Nailgun {nailgun} state: updated={up!s} running={run!s} fingerprint={old_fp} '
                   'new_fingerprint={new_fp} distribution={old_dist} new_distribution={new_dist}'
                   .format(nailgun=self._identity, up=updated, run=running,
@@ -168,15 +247,31 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
     with self._NAILGUN_SPAWN_LOCK:
       running, updated = self._check_nailgun_state(new_fingerprint)
 
+      if running and not updated and self._health_check:
+        try:
+          self.ensure_connectable(self._create_ngclient(self.socket, stdout, stderr, stdin))
+        except NailgunClient.NailgunConnectionError:
+          logger.debug('Nailgun {} is not accepting connections, restarting it.'
+                       .format(self._identity))
+          updated = True
+
       if running and updated:
         logger.debug('Found running nailgun server that needs updating, killing {server}'
                      .format(server=self._identity))
         self.terminate()
 
       if (not running) or (running and updated):
-        return self._spawn_nailgun_server(new_fingerprint, jvm_options, classpath, stdout, stderr, stdin)
+        client = self._spawn_nailgun_server(new_fingerprint, jvm_options, classpath, stdout, stderr,
+                                            stdin)
+        runs = 0
+      else:
+        client = self._create_ngclient(self.socket, stdout, stderr, stdin)
+        runs = self.read_metadata_by_name(self.name, 'runs', int) or 0
 
-    return self._create_ngclient(self.socket, stdout, stderr, stdin)
+      if self._max_runs:
+        self.write_metadata_by_name(self.name, 'runs', str(runs + 1))
+
+    return client
 
   def _await_socket(self, timeout):
     """Blocks for the nailgun subprocess to bind and emit a listening port in the nailgun stdout."""
@@ -279,3 +374,88 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
                          close_fds=True)
 
     self.write_pid(subproc.pid)
+
+
+class NailgunExecutorPool(Executor):
+  """Executes java programs in the least loaded of several equivalent nailgun servers.
+
+  Each program is dispatched when it runs to the server of the pool that is running the fewest
+  programs for this process, so that programs run concurrently (eg, by parallel compile workers)
+  are spread across JVMs rather than all contending for one.
+  """
+
+  _LOAD_LOCK = threading.Lock()
+
+  # The number of programs running in each nailgun server for this process, by server identity.
+  # NB: This is shared by all pools, since a pool is usually created for each program run.
+  _loads = defaultdict(int)
+
+  def __init__(self, executors):
+    """
+    :param list executors: The `NailgunExecutor`s for the servers of the pool, which should all
+                           have the same distribution.
+    """
+    if not executors:
+      raise ValueError('A nailgun executor pool needs at least one executor.')
+    Executor.__init__(self, distribution=executors[0].distribution)
+    self._executors = list(executors)
+
+  def __str__(self):
+    return 'NailgunExecutorPool({})'.format(', '.join(str(e) for e in self._executors))
+
+  @property
+  def executors(self):
+    """Returns the `NailgunExecutor`s of the servers of this pool."""
+    return list(self._executors)
+
+  def _acquire(self):
+    with self._LOAD_LOCK:
+      # NB: min() picks the first of equally loaded servers, so a lightly used pool keeps reusing
+      # the same warm servers.
+      executor = min(self._executors, key=lambda e: self._loads[e.name])
+      self._loads[executor.name] += 1
+      return executor
+
+  def _release(self, executor):
+    with self._LOAD_LOCK:
+      self._loads[executor.name] -= 1
+
+  def terminate(self):
+    """Terminates all the servers of this pool."""
+    for executor in self._executors:
+      executor.terminate()
+
+  def _runner(self, classpath, main, jvm_options, args, cwd=None):
+    """Runner factory. Called via Executor.execute()."""
+    command = self._create_command(classpath, main, jvm_options, args)
+
+    def runner_for(executor):
+      return executor._runner(classpath, main, jvm_options, args, cwd=cwd)
+
+    class Runner(self.Runner):
+      @property
+      def executor(this):
+        return self
+
+      @property
+      def command(this):
+        return list(command)
+
+      def run(this, stdout=None, stderr=None, stdin=None, cwd=None):
+        executor = self._acquire()
+        try:
+          return runner_for(executor).run(stdout, stderr, stdin, cwd)
+        finally:
+          self._release(executor)
+
+      def spawn(this, stdout=None, stderr=None, stdin=None, cwd=None):
+        executor = self._acquire()
+
+        def run():
+          try:
+            return runner_for(executor).run(stdout, stderr, stdin, cwd)
+          finally:
+            self._release(executor)
+        return NailgunProcess(executor, run, this.cmd)
+
+    return Runner()
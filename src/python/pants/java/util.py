@@ -13,7 +13,7 @@ from zipfile import ZIP_STORED
 from pants.base.workunit import WorkUnit, WorkUnitLabel
 from pants.java.executor import Executor, SubprocessExecutor
 from pants.java.jar.manifest import Manifest
-from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_executor import NailgunExecutor, NailgunExecutorPool
 from pants.util.contextutil import open_zip, temporary_file
 from pants.util.dirutil import safe_concurrent_rename, safe_mkdir, safe_mkdtemp
 from pants.util.process_handler import ProcessHandler, SubprocessProcessHandler
@@ -22,6 +22,10 @@ from pants.util.process_handler import ProcessHandler, SubprocessProcessHandler
 logger = logging.getLogger(__name__)
 
 
+def _is_nailgun(executor):
+  return isinstance(executor, (NailgunExecutor, NailgunExecutorPool))
+
+
 def _get_runner(classpath, main, jvm_options, args, executor,
                cwd, distribution,
                create_synthetic_jar, synthetic_jar_dir):
@@ -145,7 +149,7 @@ def execute_runner(runner, workunit_factory=None, workunit_name=None, workunit_l
   else:
     workunit_labels = [
         WorkUnitLabel.TOOL,
-        WorkUnitLabel.NAILGUN if isinstance(runner.executor, NailgunExecutor) else WorkUnitLabel.JVM
+        WorkUnitLabel.NAILGUN if _is_nailgun(runner.executor) else WorkUnitLabel.JVM
     ] + (workunit_labels or [])
 
     with workunit_factory(name=workunit_name, labels=workunit_labels,
@@ -190,7 +194,7 @@ def execute_runner_async(runner, workunit_factory=None, workunit_name=None, work
   else:
     workunit_labels = [
                         WorkUnitLabel.TOOL,
-                        WorkUnitLabel.NAILGUN if isinstance(runner.executor, NailgunExecutor) else WorkUnitLabel.JVM
+                        WorkUnitLabel.NAILGUN if _is_nailgun(runner.executor) else WorkUnitLabel.JVM
                       ] + (workunit_labels or [])
 
     workunit_generator = workunit_factory(name=workunit_name, labels=workunit_labels,
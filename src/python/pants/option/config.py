@@ -9,6 +9,7 @@ import io
 import itertools
 import os
 from contextlib import contextmanager
+from hashlib import sha1
 
 import six
 from six.moves import configparser
@@ -33,6 +34,16 @@ class Config(AbstractClass):
   class ConfigValidationError(ConfigError):
     pass
 
+  # Single-file configs loaded from contents, keyed by path, content digest and seed values. Loaded
+  # configs are never mutated, so a long-lived process (ie, pantsd) shares them across runs rather
+  # than re-parsing unchanged config files every run.
+  _cached_single_file_configs = {}
+  _max_cached_single_file_configs = 64
+
+  @classmethod
+  def reset_cache(cls):
+    cls._cached_single_file_configs.clear()
+
   @classmethod
   def load_file_contents(cls, file_contents, seed_values=None):
     """Loads config from the given string payloads.
@@ -53,7 +64,10 @@ class Config(AbstractClass):
       with io.StringIO(file_content.content.decode('utf-8')) as fh:
         yield fh
 
-    return cls._meta_load(opener, file_contents, seed_values)
+    def cache_key(file_content):
+      return file_content.path, sha1(file_content.content).hexdigest()
+
+    return cls._meta_load(opener, file_contents, seed_values, cache_key=cache_key)
 
   @classmethod
   def load(cls, config_paths, seed_values=None):
@@ -77,27 +91,36 @@ class Config(AbstractClass):
     return cls._meta_load(opener, config_paths, seed_values)
 
   @classmethod
-  def _meta_load(cls, open_ctx, config_items, seed_values=None):
+  def _meta_load(cls, open_ctx, config_items, seed_values=None, cache_key=None):
     if not config_items:
       return _EmptyConfig()
 
+    all_seed_values = cls._all_seed_values(seed_values)
+    seed_key = tuple(sorted(all_seed_values.items()))
     single_file_configs = []
     for config_item in config_items:
-      parser = cls._create_parser(seed_values)
-      with open_ctx(config_item) as ini:
-        parser.readfp(ini)
-      config_path = config_item.path if hasattr(config_item, 'path') else config_item
-      single_file_configs.append(_SingleFileConfig(config_path, parser))
+      key = (cache_key(config_item), seed_key) if cache_key else None
+      single_file_config = cls._cached_single_file_configs.get(key) if key else None
+      if single_file_config is None:
+        parser = configparser.SafeConfigParser(all_seed_values)
+        with open_ctx(config_item) as ini:
+          parser.readfp(ini)
+        config_path = config_item.path if hasattr(config_item, 'path') else config_item
+        single_file_config = _SingleFileConfig(config_path, parser)
+        if key:
+          if len(cls._cached_single_file_configs) >= cls._max_cached_single_file_configs:
+            cls._cached_single_file_configs.clear()
+          cls._cached_single_file_configs[key] = single_file_config
+      single_file_configs.append(single_file_config)
 
     return _ChainedConfig(single_file_configs)
 
   @classmethod
-  def _create_parser(cls, seed_values=None):
-    """Creates a config parser that supports %([key-name])s value substitution.
+  def _all_seed_values(cls, seed_values=None):
+    """Returns the values that act as if specified in the DEFAULT section of each config file.
 
-    A handful of seed values will be set to act as if specified in the loaded config file's DEFAULT
-    section, and be available for use in substitutions.  The caller may override some of these
-    seed values.
+    They are available for use in %([key-name])s value substitutions.  The caller may override some
+    of these seed values.
 
     :param seed_values: A dict with optional override seed values for buildroot, pants_workdir,
                         pants_supportdir and pants_distdir.
@@ -120,7 +143,7 @@ class Config(AbstractClass):
     update_dir_from_seed_values('pants_supportdir', 'build-support')
     update_dir_from_seed_values('pants_distdir', 'dist')
 
-    return configparser.SafeConfigParser(all_seed_values)
+    return all_seed_values
 
   def get(self, section, option, type_=six.string_types, default=None):
     """Retrieves option from the specified section (or 'DEFAULT') and attempts to parse it as type.
@@ -214,6 +237,8 @@ class _SingleFileConfig(Config):
     super(_SingleFileConfig, self).__init__()
     self.configpath = configpath
     self.configparser = configparser
+    # Interpolated values, by section and option.
+    self._values = {}
 
   def configs(self):
     return [self]
@@ -231,7 +256,10 @@ class _SingleFileConfig(Config):
     return self.configparser.has_option(section, option)
 
   def get_value(self, section, option):
-    return self.configparser.get(section, option)
+    key = (section, option)
+    if key not in self._values:
+      self._values[key] = self.configparser.get(section, option)
+    return self._values[key]
 
   def get_source_for_option(self, section, option):
     if self.has_option(section, option):
@@ -275,6 +275,19 @@ class Options(object):
     register.scope = optionable_class.options_scope
     return register
 
+  def registration_state(self):
+    """Returns all the options registered so far, for `restore_registration_state`."""
+    self._assert_not_frozen()
+    return self._parser_hierarchy.registration_state()
+
+  def restore_registration_state(self, state):
+    """Registers the options of a `registration_state` of an Options instance for the same scopes.
+
+    This is much cheaper than re-running the registration of every optionable.
+    """
+    self._assert_not_frozen()
+    self._parser_hierarchy.restore_registration_state(state)
+
   def get_parser(self, scope):
     """Returns the parser for the given scope, so code can register on it directly."""
     self._assert_not_frozen()
@@ -327,6 +327,22 @@ class Parser(object):
         raise OptionAlreadyRegistered(self.scope, arg)
     self._known_args.update(args)
 
+  def registration_state(self):
+    """Returns the options registered on this parser, for `restore_registration_state`."""
+    return tuple(self._option_registrations), self._frozen
+
+  def restore_registration_state(self, state):
+    """Restores the registered options of a parser for the same scope.
+
+    Registrations are not checked for shadowing again: they were checked when first registered.
+
+    :param state: A `registration_state` of a parser whose ancestors registered the same options.
+    """
+    registrations, frozen = state
+    self._option_registrations = list(registrations)
+    self._known_args = {arg for args, _ in registrations for arg in args}
+    self._frozen = frozen
+
   def _check_deprecated(self, dest, kwargs):
     """Checks option for deprecation and issues a warning/error if necessary."""
     removal_version = kwargs.get('removal_version', None)
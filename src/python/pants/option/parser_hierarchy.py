@@ -77,3 +77,12 @@ class ParserHierarchy(object):
   def walk(self, callback):
     """Invoke callback on each parser, in pre-order depth-first order."""
     self._parser_by_scope[GLOBAL_SCOPE].walk(callback)
+
+  def registration_state(self):
+    """Returns the options registered on each parser, for `restore_registration_state`."""
+    return {scope: parser.registration_state() for scope, parser in self._parser_by_scope.items()}
+
+  def restore_registration_state(self, state):
+    """Restores the registered options of a hierarchy for the same scopes."""
+    for scope, parser_state in state.items():
+      self.get_parser_by_scope(scope).restore_registration_state(parser_state)
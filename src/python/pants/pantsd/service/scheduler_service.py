@@ -8,6 +8,7 @@ import logging
 import os
 import Queue
 import threading
+import time
 
 from twitter.common.dirutil import Fileset
 
@@ -24,6 +25,10 @@ class SchedulerService(PantsService):
 
   QUEUE_SIZE = 64
 
+  # Events that arrive within this many seconds of the first event of a batch (eg, during a large
+  # `git checkout`) are coalesced into a single invalidation of the product graph.
+  INVALIDATION_DEBOUNCE_SECS = 0.1
+
   def __init__(
     self,
     fs_event_service,
@@ -53,6 +58,13 @@ class SchedulerService(PantsService):
     self._event_queue = Queue.Queue(maxsize=self.QUEUE_SIZE)
     self._watchman_is_running = threading.Event()
     self._invalidating_files = set()
+    self._invalidation_metrics = {
+      'batches': 0,
+      'events': 0,
+      'files': 0,
+      'invalidated_nodes': 0,
+      'last_batch_invalidated_nodes': 0,
+    }
 
   @staticmethod
   def _combined_invalidating_fileset_from_globs(glob_strs, root):
@@ -117,38 +129,82 @@ class SchedulerService(PantsService):
       self._maybe_invalidate_scheduler_batch(files)
 
     with self.fork_lock:
-      self._scheduler.invalidate_files(files)
+      invalidated = self._scheduler.invalidate_files(files)
 
-  def _process_event_queue(self):
-    """File event notification queue processor."""
-    try:
-      event = self._event_queue.get(timeout=1)
-    except Queue.Empty:
-      return
+    self._invalidation_metrics['batches'] += 1
+    self._invalidation_metrics['files'] += len(files)
+    self._invalidation_metrics['invalidated_nodes'] += invalidated
+    self._invalidation_metrics['last_batch_invalidated_nodes'] = invalidated
+    self._logger.debug('invalidated %d nodes for %d files, invalidation metrics: %s',
+                       invalidated, len(files), self.invalidation_metrics())
+
+  def invalidation_metrics(self):
+    """Returns counts of the filesystem events and product graph invalidations handled so far.
+
+    :returns: A dict of metric name to count.
+    """
+    return dict(self._invalidation_metrics)
 
+  def _get_events(self):
+    """Returns the events that arrive within the debounce window of the next event, if any."""
     try:
-      subscription, is_initial_event, files = (event['subscription'],
-                                               event['is_fresh_instance'],
-                                               [f.decode('utf-8') for f in event['files']])
-    except (KeyError, UnicodeDecodeError) as e:
-      self._logger.warn('%r raised by invalid watchman event: %s', e, event)
-      return
+      events = [self._event_queue.get(timeout=1)]
+    except Queue.Empty:
+      return []
+
+    deadline = time.time() + self.INVALIDATION_DEBOUNCE_SECS
+    while True:
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        return events
+      try:
+        events.append(self._event_queue.get(timeout=remaining))
+      except Queue.Empty:
+        return events
 
-    self._logger.debug('processing {} files for subscription {} (first_event={})'
-                       .format(len(files), subscription, is_initial_event))
+  def _process_event_queue(self):
+    """File event notification queue processor.
 
-    # The first watchman event is a listing of all files - ignore it.
-    if not is_initial_event:
-      if subscription == self._fs_event_service.PANTS_PID_SUBSCRIPTION_NAME:
-        self._maybe_invalidate_scheduler_pidfile()
-      else:
-        self._handle_batch_event(files)
+    Coalesces the events of each debounce window, so that a storm of events takes the fork lock to
+    invalidate the product graph once, for the deduplicated files of all of them.
+    """
+    events = self._get_events()
+    if not events:
+      return
 
-    if not self._watchman_is_running.is_set():
+    files = set()
+    pidfile_changed = False
+    processed = False
+    for event in events:
+      self._event_queue.task_done()
+      try:
+        subscription, is_initial_event, event_files = (event['subscription'],
+                                                       event['is_fresh_instance'],
+                                                       [f.decode('utf-8') for f in event['files']])
+      except (KeyError, UnicodeDecodeError) as e:
+        self._logger.warn('%r raised by invalid watchman event: %s', e, event)
+        continue
+
+      self._logger.debug('processing {} files for subscription {} (first_event={})'
+                         .format(len(event_files), subscription, is_initial_event))
+      self._invalidation_metrics['events'] += 1
+      processed = True
+
+      # The first watchman event is a listing of all files - ignore it.
+      if not is_initial_event:
+        if subscription == self._fs_event_service.PANTS_PID_SUBSCRIPTION_NAME:
+          pidfile_changed = True
+        else:
+          files.update(event_files)
+
+    if pidfile_changed:
+      self._maybe_invalidate_scheduler_pidfile()
+    if files:
+      self._handle_batch_event(sorted(files))
+
+    if processed and not self._watchman_is_running.is_set():
       self._watchman_is_running.set()
 
-    self._event_queue.task_done()
-
   def product_graph_len(self):
     """Provides the size of the captive product graph.
 
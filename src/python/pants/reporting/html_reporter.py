@@ -303,6 +303,38 @@ class HtmlReporter(Reporter):
                     lambda: render_cache_stats(self.run_tracker.artifact_cache_stats),
                     force=force_overwrite)
 
+    # Update the scheduling stats.
+    def render_scheduling_stats(scheduling_stats):
+      res = []
+      for execution in scheduling_stats.get_all():
+        res.append("""<p>[{scope}] {num_jobs} jobs on {num_workers} workers in {wall_time:.3f}s,
+                      {utilization:.0%} utilization. With unlimited workers: {ideal_time:.3f}s,
+                      {ideal_speedup:.2f}x faster.</p>""".format(**execution))
+        res.append('<table><tr><th>start</th><th>finish</th><th>queue wait</th><th>worker</th>'
+                   '<th>critical path</th></tr>')
+        for job in execution['critical_path']:
+          res.append("""<tr><td class="timing-string">{start:.3f}</td>
+                            <td class="timing-string">{finish:.3f}</td>
+                            <td class="timing-string">{queue_wait:.3f}</td>
+                            <td>{worker}</td><td>{key}</td></tr>""".format(
+            key=cgi.escape(job['key']), worker=cgi.escape(job['worker']), start=job['start'],
+            finish=job['finish'], queue_wait=job['queue_wait']))
+        res.append('</table>')
+        res.append('<table><tr><th>worker</th><th>jobs</th><th>idle time</th>'
+                   '<th>idle gaps</th></tr>')
+        for worker, stats in sorted(execution['workers'].items()):
+          gaps = ', '.join('{:.3f}-{:.3f}'.format(start, end) for start, end in stats['idle_gaps'])
+          res.append("""<tr><td>{worker}</td><td>{jobs}</td>
+                            <td class="timing-string">{idle_time:.3f}</td>
+                            <td>{gaps}</td></tr>""".format(
+            worker=cgi.escape(worker), jobs=stats['jobs'], idle_time=stats['idle_time'], gaps=gaps))
+        res.append('</table>')
+      return ''.join(res)
+
+    self._overwrite('scheduling_stats',
+                    lambda: render_scheduling_stats(self.run_tracker.scheduling_stats),
+                    force=force_overwrite)
+
     for f in self._output_files[workunit.id].values():
       f.close()
 
@@ -22,6 +22,9 @@ class PlainTextReporterBase(Reporter):
       ret += b'\nCritical Path Timings\n=====================\n{}\n'.format(
         self._format_aggregated_timings(self.run_tracker.get_critical_path_timings())
       )
+      if self.run_tracker.scheduling_stats.get_all():
+        ret += b'\nScheduling Stats\n================\n{}\n'.format(
+          self._format_scheduling_stats(self.run_tracker.scheduling_stats))
     if settings.cache_stats:
       ret += b'\nCache Stats\n===========\n{}\n'.format(
         self._format_artifact_cache_stats(self.run_tracker.artifact_cache_stats))
@@ -31,6 +34,12 @@ class PlainTextReporterBase(Reporter):
   def _format_aggregated_timings(self, aggregated_timings):
     return b'\n'.join([b'{timing:.3f} {label}'.format(**x) for x in aggregated_timings.get_all()])
 
+  def _format_scheduling_stats(self, scheduling_stats):
+    return b'\n'.join(
+      [b'{scope}: {num_jobs} jobs on {num_workers} workers in {wall_time:.3f}s, {utilization:.0%} '
+       b'utilization, {ideal_speedup:.2f}x faster with unlimited workers'.format(**x)
+       for x in scheduling_stats.get_all()])
+
   def _format_artifact_cache_stats(self, artifact_cache_stats):
     stats = artifact_cache_stats.get_all()
     return b'No artifact cache reads.' if not stats else b'\n'.join(
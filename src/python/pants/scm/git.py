@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import logging
 import os
 import StringIO
+import threading
 import traceback
 from contextlib import contextmanager
 
@@ -115,6 +116,12 @@ class Git(Scm):
     self._remote = remote
     self._branch = branch
 
+    self._cat_file = GitCatFile(self)
+    # Parsed tree listings by tree sha, and merge-bases by pairs of commit shas. These are
+    # immutable, so they remain valid for as long as this object lives (eg, in pantsd).
+    self._trees = {}
+    self._merge_bases = {}
+
   def current_rev_identifier(self):
     return 'HEAD'
 
@@ -166,12 +173,9 @@ class Git(Scm):
 
     files = set(uncommitted_changes.split())
     if from_commit:
-      # Grab the diff from the merge-base to HEAD using ... syntax.  This ensures we have just
-      # the changes that have occurred on the current branch.
-      committed_cmd = ['diff', '--name-only', from_commit + '...HEAD'] + rel_suffix
-      committed_changes = self._check_output(committed_cmd,
-                                             raise_type=Scm.LocalException)
-      files.update(committed_changes.split())
+      # Grab the diff from the merge-base to HEAD.  This ensures we have just the changes that
+      # have occurred on the current branch.
+      files.update(self._committed_changes(from_commit, relative_to))
     if include_untracked:
       untracked_cmd = ['ls-files', '--other', '--exclude-standard'] + rel_suffix
       untracked = self._check_output(untracked_cmd,
@@ -180,6 +184,78 @@ class Git(Scm):
     # git will report changed files relative to the worktree: re-relativize to relative_to
     return set(self.fix_git_relative_path(f, relative_to) for f in files)
 
+  def _committed_changes(self, from_commit, relative_to):
+    """Returns the files changed between the merge-base of `from_commit` and HEAD, and HEAD.
+
+    The files are found by diffing cached tree listings read through `git cat-file`, so once the
+    merge-base of a pair of commits is known, repeated queries do not fork git.
+    """
+    head = self._cat_file.sha('HEAD^{commit}')
+    base = self._cat_file.sha('{}^{{commit}}'.format(from_commit))
+    if not head or not base:
+      # Let git diff report the bad revision.
+      committed_cmd = ['diff', '--name-only', from_commit + '...HEAD', '--', relative_to]
+      return self._check_output(committed_cmd, raise_type=Scm.LocalException).split()
+
+    merge_base = self._merge_bases.get((base, head))
+    if merge_base is None:
+      merge_base = self._merge_bases[(base, head)] = self.merge_base(base, head)
+
+    prefix = os.path.relpath(os.path.realpath(relative_to), self._worktree)
+    files = [f.decode('utf-8')
+             for f in self._diff_trees(self._cat_file.sha('{}^{{tree}}'.format(merge_base)),
+                                       self._cat_file.sha('{}^{{tree}}'.format(head)))]
+    if prefix == os.curdir:
+      return files
+    return [f for f in files if f == prefix or f.startswith(prefix + '/')]
+
+  def _diff_trees(self, left_sha, right_sha, path=EMPTY_STRING):
+    """Returns the paths of the files that differ between two trees, skipping shared subtrees.
+
+    :returns: a list of binary paths relative to the root of the trees.
+    """
+    if left_sha == right_sha:
+      return []
+    left = self._read_tree(left_sha) if left_sha else {}
+    right = self._read_tree(right_sha) if right_sha else {}
+    changed = []
+    for name in sorted(set(left) | set(right)):
+      left_entry, right_entry = left.get(name), right.get(name)
+      entry_path = path + SLASH + name if path else name
+      left_dir = left_entry.sha if isinstance(left_entry, GitRepositoryReader.Dir) else None
+      right_dir = right_entry.sha if isinstance(right_entry, GitRepositoryReader.Dir) else None
+      if left_dir or right_dir:
+        changed.extend(self._diff_trees(left_dir, right_dir, entry_path))
+        if left_dir and right_dir:
+          continue
+        # A file replaced a directory, or vice versa.
+        left_entry = None if left_dir else left_entry
+        right_entry = None if right_dir else right_entry
+      if left_entry is None and right_entry is None:
+        continue
+      if (left_entry is None or right_entry is None or
+          (left_entry.mode, left_entry.sha) != (right_entry.mode, right_entry.sha)):
+        changed.append(entry_path)
+    return changed
+
+  # Tree listings are small, but a daemon may read many trees over its lifetime.
+  _MAX_CACHED_TREES = 100000
+
+  def _read_tree(self, sha):
+    """Returns the parsed listing of the tree with the given sha, from the cache if possible.
+
+    :returns: a dict from filename -> Symlink, Dir or File object
+    """
+    tree = self._trees.get(sha)
+    if tree is None:
+      object_type, tree_data = self._cat_file.read(sha)
+      assert object_type == 'tree'
+      tree = _parse_tree(tree_data)
+      if len(self._trees) >= self._MAX_CACHED_TREES:
+        self._trees.clear()
+      self._trees[sha] = tree
+    return tree
+
   def changes_in(self, diffspec, relative_to=None):
     relative_to = relative_to or self._worktree
     cmd = ['diff-tree', '--no-commit-id', '--name-only', '-r', diffspec]
@@ -297,6 +373,107 @@ class Git(Scm):
     return GitRepositoryReader(self, rev)
 
 
+class GitCatFile(object):
+  """Reads objects from a git repository through long-lived `git cat-file` processes.
+
+  One `git cat-file --batch` and one `git cat-file --batch-check` process are started lazily and
+  shared by all readers of the repository, so that reading many objects, or answering many scm
+  queries in a long-lived process like pantsd, does not fork git for each.
+  """
+
+  def __init__(self, scm):
+    self._scm = scm
+    self._lock = threading.Lock()
+    # Processes by mode, along with the pid of the process that started them.
+    self._processes = {}
+
+  def _process(self, mode):
+    pid, process = self._processes.get(mode, (None, None))
+    # NB: A process forked from the one that started git (eg, a pantsd run) must not share its
+    # pipes, so starts its own.
+    if pid != os.getpid() or process.poll() is not None:
+      cmdline = self._scm._create_git_cmdline(['cat-file', mode])
+      process = subprocess.Popen(cmdline, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+      self._processes[mode] = (os.getpid(), process)
+    return process
+
+  def _request(self, mode, spec):
+    """Writes a request and returns the process and the parts of its response header."""
+    process = self._process(mode)
+    process.stdin.write(spec + NEWLINE)
+    process.stdin.flush()
+    header = None
+    while not header:
+      header = process.stdout.readline()
+      if process.poll() is not None:
+        raise GitRepositoryReader.GitDiedException(
+          "Git cat-file died while trying to read '{}'.".format(spec))
+    parts = header.rstrip().rsplit(SPACE, 2)
+    if len(parts) == 2:
+      assert parts[1] == 'missing'
+      return process, None
+    return process, parts
+
+  def sha(self, spec):
+    """Returns the sha of the object named by `spec`, or None if there is no such object."""
+    with self._lock:
+      _, parts = self._request('--batch-check', spec)
+    return parts[0] if parts else None
+
+  def read(self, spec):
+    """Returns the type and content of the object named by `spec`, or None if it is missing."""
+    with self._lock:
+      process, parts = self._request('--batch', spec)
+      if not parts:
+        return None
+      _, object_type, object_len = parts
+
+      # Read the object data
+      blob = process.stdout.read(int(object_len))
+
+      # Read the trailing newline
+      assert process.stdout.read(1) == '\n'
+    assert len(blob) == int(object_len)
+    return object_type, blob
+
+  def close(self):
+    """Stops the processes started by this process."""
+    with self._lock:
+      for pid, process in self._processes.values():
+        if pid == os.getpid() and process.poll() is None:
+          process.communicate()
+      self._processes.clear()
+
+
+def _parse_tree(tree_data):
+  """Parses the content of a git tree object.
+
+  :returns: a dict from filename -> Symlink, Dir or File object
+  """
+  tree = {}
+  # The tree data here is (mode ' ' filename \0 20-byte-sha)*
+  i = 0
+  while i < len(tree_data):
+    start = i
+    while tree_data[i] != ' ':
+      i += 1
+    mode = tree_data[start:i]
+    i += 1  # skip space
+    start = i
+    while tree_data[i] != NUL:
+      i += 1
+    name = tree_data[start:i]
+    sha = tree_data[i + 1:i + 1 + GIT_HASH_LENGTH].encode('hex')
+    i += 1 + GIT_HASH_LENGTH
+    if mode == '120000':
+      tree[name] = GitRepositoryReader.Symlink(name, sha, mode)
+    elif mode == '40000':
+      tree[name] = GitRepositoryReader.Dir(name, sha, mode)
+    else:
+      tree[name] = GitRepositoryReader.File(name, sha, mode)
+  return tree
+
+
 class GitRepositoryReader(object):
   """
   Allows reading from files and directory information from an arbitrary git
@@ -307,17 +484,10 @@ class GitRepositoryReader(object):
   def __init__(self, scm, rev):
     self.scm = scm
     self.rev = rev
-    self._cat_file_process = None
     # Trees is a dict from path to [list of Dir, Symlink or File objects]
     self._trees = {}
     self._realpath_cache = {'.': './', '': './'}
 
-  def _maybe_start_cat_file_process(self):
-    if not self._cat_file_process:
-      cmdline = self.scm._create_git_cmdline(['cat-file', '--batch'])
-      self._cat_file_process = subprocess.Popen(cmdline,
-                                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-
   class MissingFileException(Exception):
 
     def __init__(self, rev, relpath):
@@ -417,21 +587,24 @@ class GitRepositoryReader(object):
 
   class Symlink(object):
 
-    def __init__(self, name, sha):
+    def __init__(self, name, sha, mode=None):
       self.name = name
       self.sha = sha
+      self.mode = mode
 
   class Dir(object):
 
-    def __init__(self, name, sha):
+    def __init__(self, name, sha, mode=None):
       self.name = name
       self.sha = sha
+      self.mode = mode
 
   class File(object):
 
-    def __init__(self, name, sha):
+    def __init__(self, name, sha, mode=None):
       self.name = name
       self.sha = sha
+      self.mode = mode
 
   def listdir(self, relpath):
     """Like os.listdir, but reads from the git repository.
@@ -556,6 +729,9 @@ class GitRepositoryReader(object):
   def _read_tree(self, path):
     """Given a revision and path, parse the tree data out of git cat-file output.
 
+    Trees are read by sha, descending from the root tree of the revision, so their listings are
+    shared with all the other readers of the repository.
+
     :returns: a dict from filename -> [list of Symlink, Dir, and File objects]
     """
 
@@ -564,29 +740,19 @@ class GitRepositoryReader(object):
     tree = self._trees.get(path)
     if tree:
       return tree
-    tree = {}
-    object_type, tree_data = self._read_object_from_repo(rev=self.rev, relpath=path)
-    assert object_type == 'tree'
-    # The tree data here is (mode ' ' filename \0 20-byte-sha)*
-    i = 0
-    while i < len(tree_data):
-      start = i
-      while tree_data[i] != ' ':
-        i += 1
-      mode = tree_data[start:i]
-      i += 1  # skip space
-      start = i
-      while tree_data[i] != NUL:
-        i += 1
-      name = tree_data[start:i]
-      sha = tree_data[i + 1:i + 1 + GIT_HASH_LENGTH].encode('hex')
-      i += 1 + GIT_HASH_LENGTH
-      if mode == '120000':
-        tree[name] = self.Symlink(name, sha)
-      elif mode == '40000':
-        tree[name] = self.Dir(name, sha)
-      else:
-        tree[name] = self.File(name, sha)
+    if path:
+      parent_path, _, name = path.rpartition('/')
+      obj = self._read_tree(parent_path).get(name)
+      if obj is None:
+        raise self.MissingFileException(self.rev, path)
+      if not isinstance(obj, self.Dir):
+        raise self.UnexpectedGitObjectTypeException()
+      sha = obj.sha
+    else:
+      sha = self.scm._cat_file.sha('{}^{{tree}}'.format(self.rev))
+      if sha is None:
+        raise self.MissingFileException(self.rev, path)
+    tree = self.scm._read_tree(sha)
     self._trees[path] = tree
     return tree
 
@@ -595,38 +761,14 @@ class GitRepositoryReader(object):
     This is implemented via a pipe to git cat-file --batch
     """
     if sha:
-      spec = sha + '\n'
+      spec = sha
     else:
       assert rev is not None
       assert relpath is not None
       relpath = self._fixup_dot_relative(relpath)
-      spec = '{}:{}\n'.format(rev, relpath)
+      spec = '{}:{}'.format(rev, relpath)
 
-    self._maybe_start_cat_file_process()
-    self._cat_file_process.stdin.write(spec)
-    self._cat_file_process.stdin.flush()
-    header = None
-    while not header:
-      header = self._cat_file_process.stdout.readline()
-      if self._cat_file_process.poll() is not None:
-        raise self.GitDiedException("Git cat-file died while trying to read '{}'.".format(spec))
-
-    header = header.rstrip()
-    parts = header.rsplit(SPACE, 2)
-    if len(parts) == 2:
-      assert parts[1] == 'missing'
+    obj = self.scm._cat_file.read(spec)
+    if obj is None:
       raise self.MissingFileException(rev, relpath)
-
-    _, object_type, object_len = parts
-
-    # Read the object data
-    blob = self._cat_file_process.stdout.read(int(object_len))
-
-    # Read the trailing newline
-    assert self._cat_file_process.stdout.read(1) == '\n'
-    assert len(blob) == int(object_len)
-    return object_type, blob
-
-  def __del__(self):
-    if self._cat_file_process:
-      self._cat_file_process.communicate()
+    return obj
@@ -0,0 +1,133 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sqlite3
+import threading
+import time
+from hashlib import sha1
+
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_mkdir_for
+from pants.util.memo import memoized_property
+
+
+def digest_file(path):
+  """Returns the hex SHA1 digest of the content of the file at `path`."""
+  hasher = sha1()
+  with open(path, 'rb') as fp:
+    for chunk in iter(lambda: fp.read(64 * 1024), b''):
+      hasher.update(chunk)
+  return hasher.hexdigest()
+
+
+class SourceDigestCache(Subsystem):
+  """Remembers the digests of source files across runs, so unchanged files are not rehashed.
+
+  A digest is keyed by the path of the file and its inode, size and modification time, so any
+  ordinary change to the file invalidates it. Files modified too recently for their modification
+  time to be trusted (eg, by an editor saving twice within the resolution of the filesystem's
+  timestamps) are always rehashed, and their digests are not remembered.
+  """
+
+  options_scope = 'source-digest-cache'
+
+  # Files modified less than this many seconds before they are hashed have ambiguous metadata:
+  # they may be modified again without a visible change to their modification time.
+  _RACY_WINDOW_SECS = 2.0
+
+  # Stay well below sqlite's default limit of 999 bound parameters per statement.
+  _MAX_BATCH_SIZE = 500
+
+  @classmethod
+  def register_options(cls, register):
+    super(SourceDigestCache, cls).register_options(register)
+    register('--enabled', advanced=True, type=bool, default=True,
+             help='Remember the digests of source files across runs, and only rehash files whose '
+                  'inode, size or modification time has changed.')
+
+  @classmethod
+  def digests_for(cls, paths):
+    """Returns the hex SHA1 digests of the contents of the files at the given absolute `paths`.
+
+    Uses the global instance when options are available, and otherwise simply hashes the files.
+    """
+    # TODO: The is_initialized() check is primarily for tests and would be nice to do away with.
+    if cls.is_initialized():
+      return cls.global_instance().digests(paths)
+    return [digest_file(path) for path in paths]
+
+  def __init__(self, *args, **kwargs):
+    super(SourceDigestCache, self).__init__(*args, **kwargs)
+    # NB: Sources may be fingerprinted from the threads of a worker pool.
+    self._lock = threading.Lock()
+    self._conn = None
+    self._conn_pid = None
+
+  @memoized_property
+  def _db_path(self):
+    return os.path.join(self.get_options().pants_workdir, 'source_digests', 'digests.sqlite')
+
+  def digests(self, paths):
+    """Returns the hex SHA1 digests of the contents of the files at the given absolute `paths`."""
+    if not self.get_options().enabled or not paths:
+      return [digest_file(path) for path in paths]
+
+    stats = [os.stat(path) for path in paths]
+    keys = [(stat.st_ino, stat.st_size, stat.st_mtime) for stat in stats]
+    with self._lock:
+      conn = self._connection()
+      known = self._lookup(conn, sorted(set(paths)))
+
+      digests = []
+      new_entries = []
+      racy_cutoff = time.time() - self._RACY_WINDOW_SECS
+      for path, key in zip(paths, keys):
+        entry = known.get(path)
+        if entry and entry[:3] == key:
+          digests.append(entry[3])
+        else:
+          digest = digest_file(path)
+          digests.append(digest)
+          if key[2] < racy_cutoff:
+            new_entries.append((path,) + key + (digest,))
+      if new_entries:
+        with conn:
+          conn.executemany("""INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)""",
+                           new_entries)
+    return digests
+
+  def _lookup(self, conn, paths):
+    """Returns a dict from path to (inode, size, mtime, digest) for the known `paths`."""
+    known = {}
+    for i in range(0, len(paths), self._MAX_BATCH_SIZE):
+      batch = paths[i:i + self._MAX_BATCH_SIZE]
+      query = """SELECT path, inode, size, mtime, digest FROM digests WHERE path IN ({})"""
+      for row in conn.execute(query.format(', '.join('?' * len(batch))), batch):
+        known[row[0]] = tuple(row[1:])
+    return known
+
+  def _connection(self):
+    """Returns the connection to the database, which is kept open for the life of this instance.
+
+    A connection must not be used across a fork, so a forked process opens its own.
+    """
+    if self._conn is None or self._conn_pid != os.getpid():
+      safe_mkdir_for(self._db_path)
+      # NB: Concurrent pants runs may share a workdir, so be patient when the database is locked.
+      self._conn = sqlite3.connect(self._db_path, timeout=60, check_same_thread=False)
+      self._conn_pid = os.getpid()
+      with self._conn:
+        self._conn.execute("""
+          CREATE TABLE IF NOT EXISTS digests (
+            path TEXT PRIMARY KEY,
+            inode INTEGER,
+            size INTEGER,
+            mtime REAL,  -- Seconds since the epoch.
+            digest TEXT
+          )
+        """)
+    return self._conn
@@ -13,6 +13,7 @@ from twitter.common.dirutil.fileset import Fileset
 
 from pants.base.build_environment import get_buildroot
 from pants.engine.fs import EMPTY_SNAPSHOT
+from pants.source.source_digest_cache import SourceDigestCache
 from pants.util.dirutil import fast_relpath, fast_relpath_optional
 from pants.util.memo import memoized_property
 from pants.util.meta import AbstractClass
@@ -135,10 +136,12 @@ class LazyFilesetWithSpec(FilesetWithSpec):
   @property
   def files_hash(self):
     h = sha1()
-    for path in sorted(self.files):
+    paths = sorted(self.files)
+    root = os.path.join(get_buildroot(), self.rel_root)
+    digests = SourceDigestCache.digests_for([os.path.join(root, path) for path in paths])
+    for path, digest in zip(paths, digests):
       h.update(path)
-      with open(os.path.join(get_buildroot(), self.rel_root, path), 'rb') as f:
-        h.update(f.read())
+      h.update(digest)
     return h.digest()
 
   def matches(self, path_from_buildroot):
@@ -13,7 +13,8 @@ from itertools import repeat
 
 from pants.base.exceptions import TaskError
 from pants.base.worker_pool import Work
-from pants.cache.artifact_cache import UnreadableArtifact, call_insert, call_use_cached_files
+from pants.cache.artifact_cache import UnreadableArtifact
+from pants.cache.artifact_cache_executor import ArtifactCacheExecutor
 from pants.cache.cache_setup import CacheSetup
 from pants.invalidation.build_invalidator import (BuildInvalidator, CacheKeyGenerator,
                                                   UncacheableCacheKeyGenerator)
@@ -363,10 +364,10 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
     :returns: Yields an InvalidationCheck object reflecting the targets.
     :rtype: InvalidationCheck
     """
-    invalidation_check = self._do_invalidation_check(fingerprint_strategy,
-                                                     invalidate_dependents,
-                                                     targets,
-                                                     topological_order)
+    cache_manager, invalidation_check = self._do_invalidation_check(fingerprint_strategy,
+                                                                    invalidate_dependents,
+                                                                    targets,
+                                                                    topological_order)
 
     self._maybe_create_results_dirs(invalidation_check.all_vts)
 
@@ -426,14 +427,20 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
     # we're in a valid state.
     for vts in invalidation_check.invalid_vts:
       vts.force_invalidate()
+    # Record the invalidations (and the updates of any cached targets) before the work is done.
+    cache_manager.flush()
 
-    # Yield the result, and then mark the targets as up to date.
-    yield invalidation_check
+    try:
+      # Yield the result, and then mark the targets as up to date.
+      yield invalidation_check
 
-    self._update_invalidation_report(invalidation_check, 'post-check')
+      self._update_invalidation_report(invalidation_check, 'post-check')
 
-    for vt in invalidation_check.invalid_vts:
-      vt.update()
+      for vt in invalidation_check.invalid_vts:
+        vt.update()
+    finally:
+      # Record all of the updates made in the block at once, including those made before a failure.
+      cache_manager.flush()
 
     # Background work to clean up previous builds.
     if self.context.options.for_global_scope().workdir_max_build_entries is not None:
@@ -474,7 +481,12 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       self.invalidate()
       self._force_invalidated = True
 
-    return cache_manager.check(targets, topological_order=topological_order)
+    if invalidate_dependents and not self._cache_factory.ignore:
+      # Compute the fingerprints of all of the targets in one pass, rather than one by one.
+      self.context.build_graph.transitive_invalidation_hashes(
+        targets, fingerprint_strategy=fingerprint_strategy)
+
+    return cache_manager, cache_manager.check(targets, topological_order=topological_order)
 
   def maybe_write_artifact(self, vt):
     if self._should_cache_target_dir(vt):
@@ -533,16 +545,27 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
   def do_check_artifact_cache(self, vts, post_process_cached_vts=None):
     """Checks the artifact cache for the specified list of VersionedTargetSets.
 
-    Returns a pair (cached, uncached) of VersionedTargets that were
-    satisfied/unsatisfied from the cache.
+    Returns a tuple (cached, uncached, uncached_causes) of VersionedTargets that were
+    satisfied/unsatisfied from the cache, once every lookup has completed. Unless
+    `post_process_cached_vts` is given, cached VersionedTargets are marked valid as soon as
+    their lookups complete, rather than once all of them have.
     """
     if not vts:
       return [], [], []
 
     read_cache = self._cache_factory.get_read_cache()
-    items = [(read_cache, vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
-             for vt in vts]
-    res = self.context.subproc_map(call_use_cached_files, items)
+    requests = [(vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
+                for vt in vts]
+    # The lookups are chunked across the subprocesses, so that caches which can amortize lookups
+    # across many keys (eg, by pipelining remote requests) get to do so.
+    res = [None] * len(requests)
+    for index, was_in_cache in ArtifactCacheExecutor(read_cache).use_cached_files(requests):
+      res[index] = was_in_cache
+      if was_in_cache and not post_process_cached_vts:
+        # Nothing else needs to see the cached vts first: mark them valid as their chunk completes,
+        # while the remaining lookups are still in flight.
+        for vt in vts[index].versioned_targets:
+          vt.update()
 
     cached_vts = []
     uncached_vts = []
@@ -563,8 +586,8 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
 
     if post_process_cached_vts:
       post_process_cached_vts(cached_vts)
-    for vt in cached_vts:
-      vt.update()
+      for vt in cached_vts:
+        vt.update()
     return cached_vts, uncached_vts, uncached_causes
 
   def update_artifact_cache(self, vts_artifactfiles_pairs):
@@ -605,12 +628,13 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       always_overwrite = self._cache_factory.overwrite()
 
       # Cache the artifacts.
-      args_tuples = []
+      inserts = []
       for vts, artifactfiles in vts_artifactfiles_pairs:
         overwrite = always_overwrite or vts.cache_key in self._cache_key_errors
-        args_tuples.append((cache, vts.cache_key, artifactfiles, overwrite))
+        inserts.append((vts.cache_key, artifactfiles, overwrite))
 
-      return Work(lambda x: self.context.subproc_map(call_insert, x), [(args_tuples,)], 'insert')
+      executor = ArtifactCacheExecutor(cache)
+      return Work(lambda x: list(executor.insert(x)), [(inserts,)], 'insert')
     else:
       return None
 
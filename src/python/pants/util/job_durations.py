@@ -0,0 +1,78 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import threading
+
+from pants.util.dirutil import safe_concurrent_creation
+
+
+class JobDurations(object):
+  """The durations of jobs measured in previous runs, used to prioritize jobs in later runs.
+
+  Durations are keyed by job key, so they are only useful for jobs whose keys are stable across
+  runs.
+  """
+
+  def __init__(self, path):
+    """
+    :param string path: The file to persist durations to.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._durations = self._load(path)
+
+  @staticmethod
+  def _load(path):
+    try:
+      with open(path, 'rb') as fp:
+        durations = json.load(fp)
+    except (IOError, ValueError):
+      # The durations are only used as a hint, so it's fine to start over if they are unreadable.
+      return {}
+    return durations if isinstance(durations, dict) else {}
+
+  def get(self, key):
+    """Returns the last measured duration in seconds of the job with the given key, or None."""
+    return self._durations.get(key)
+
+  def record(self, key, duration):
+    """Records the duration in seconds of the job with the given key.
+
+    May be called concurrently from worker threads.
+    """
+    with self._lock:
+      self._durations[key] = duration
+
+  def save(self):
+    with self._lock:
+      payload = json.dumps(self._durations, sort_keys=True)
+    with safe_concurrent_creation(self._path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        fp.write(payload)
+
+  def apply_to(self, jobs):
+    """Sets the size of each of the given jobs to its measured duration, if it has one.
+
+    The estimated sizes of the remaining jobs are scaled by the average ratio of measured duration
+    to estimated size of the other jobs, so that all of the sizes are comparable.
+
+    :param list jobs: The jobs to size: objects with a `key` and a mutable estimated `size`, such as
+                      the `Job`s of an `ExecutionGraph`.
+    """
+    measured = [(job, self._durations[job.key]) for job in jobs if job.key in self._durations]
+    if not measured:
+      return
+    total_estimated_size = sum(job.size for job, _ in measured)
+    total_duration = sum(duration for _, duration in measured)
+    for job in jobs:
+      duration = self._durations.get(job.key)
+      if duration is not None:
+        job.size = duration
+      elif total_estimated_size:
+        job.size = job.size * total_duration / total_estimated_size
+      else:
+        job.size = total_duration / len(measured)
@@ -407,6 +407,40 @@ class ClasspathProductsTest(TestBase):
                       ('default', ClasspathEntry(self.path('b/loose/classes/dir')))],
                      classpath)
 
+  def test_memoized_classpath_invalidated(self):
+    b = self.make_target('b', JvmTarget, excludes=[Exclude('com.example', 'lib')])
+    c = self.make_target('c', JvmTarget)
+    a = self.make_target('a', JvmTarget, dependencies=[c])
+
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    resolved_jar = self.add_jar_classpath_element_for_path(classpath_product,
+                                                           a,
+                                                           self._example_jar_path())
+    self.add_excludes_for_targets(classpath_product, b, c, a)
+    self.assertEqual([('default', resolved_jar.pants_path)], classpath_product.get_for_target(a))
+
+    # Adding products invalidates the memoized classpath.
+    classpath_product.add_for_target(a, [('default', self.path('a/path'))])
+    self.assertEqual([('default', resolved_jar.pants_path), ('default', self.path('a/path'))],
+                     classpath_product.get_for_target(a))
+
+    # As does injecting a dependency, which brings the excludes of `b` into the closure of `a`.
+    self.build_graph.inject_dependency(c.address, b.address)
+    self.assertEqual([('default', self.path('a/path'))], classpath_product.get_for_target(a))
+
+  def test_excludes_ignored_for_iterator_of_targets(self):
+    a = self.make_target('a', JvmTarget, excludes=[Exclude('com.example', 'lib')])
+
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    resolved_jar = self.add_jar_classpath_element_for_path(classpath_product,
+                                                           a,
+                                                           self._example_jar_path())
+    self.add_excludes_for_targets(classpath_product, a)
+
+    self.assertEqual([], classpath_product.get_for_targets([a]))
+    self.assertEqual([('default', resolved_jar.pants_path)],
+                     classpath_product.get_for_targets(iter([a])))
+
   def test_create_canonical_classpath(self):
     a = self.make_target('a/b', JvmTarget)
 
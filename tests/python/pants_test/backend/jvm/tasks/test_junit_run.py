@@ -5,6 +5,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import os
+import threading
 from contextlib import contextmanager
 from textwrap import dedent
 
@@ -25,6 +26,7 @@ from pants.ivy.bootstrapper import Bootstrapper
 from pants.ivy.ivy_subsystem import IvySubsystem
 from pants.java.distribution.distribution import DistributionLocator
 from pants.java.executor import SubprocessExecutor
+from pants.java.junit.junit_xml_parser import Test
 from pants.util.contextutil import environment_as, temporary_dir
 from pants.util.dirutil import safe_file_dump, touch
 from pants.util.process_handler import subprocess
@@ -563,6 +565,55 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
                                  target_name='tests/java/org/pantsbuild/foo:bar_test',
                                  create_some_resources=False)
 
+  def test_balanced_batches(self):
+    self.set_options(batch_size=2, balance_batches=True)
+    junit_run = self.prepare_execute(self.context())
+    for classname, duration in [('A', 10.0), ('B', 9.0), ('C', 1.0), ('D', 2.0)]:
+      junit_run._test_durations.record(classname, duration)
+
+    # E has not run before, so it is assumed to take the average time.
+    tests = [Test('A'), Test('B'), Test('C'), Test('D'), Test('E')]
+    self.assertEqual([[Test('A')], [Test('B'), Test('C')], [Test('D'), Test('E')]],
+                     list(junit_run._balanced_batches(tests)))
+
+  def test_nailgun_strategy_falls_back_to_subprocess_outside_buildroot(self):
+    self.set_options(execution_strategy=JUnitRun.NAILGUN)
+    junit_run = self.prepare_execute(self.context())
+    distribution = DistributionLocator.cached(jdk=True)
+    with temporary_dir() as cwd:
+      with junit_run._test_runner_executor(distribution, [], [], {}, cwd) as executor:
+        self.assertIsInstance(executor, SubprocessExecutor)
+    with junit_run._test_runner_executor(distribution, [], [], {'A': 'a'},
+                                         self.build_root) as executor:
+      self.assertIsInstance(executor, SubprocessExecutor)
+
+  def test_nailgun_jvms_are_leased_per_batch(self):
+    self.set_options(batch_concurrency=2)
+    junit_run = self.prepare_execute(self.context())
+    with junit_run._lease_nailgun_jvm('fp') as first:
+      # A concurrent batch with the same fingerprint gets a JVM of its own.
+      with junit_run._lease_nailgun_jvm('fp') as second:
+        self.assertNotEqual(first, second)
+    # A later batch reuses the warmest JVM.
+    with junit_run._lease_nailgun_jvm('fp') as third:
+      self.assertEqual(first, third)
+
+  def test_run_batches_yields_as_batches_complete(self):
+    self.set_options(batch_concurrency=2)
+    junit_run = self.prepare_execute(self.context())
+    first_reported = threading.Event()
+
+    def run_batch(batch_id, properties, batch):
+      if batch_id == 0:
+        # The second batch's result must be reported while this one is still running.
+        self.assertTrue(first_reported.wait(10))
+      return 0, {batch_id: {}}
+
+    results = junit_run._run_batches(run_batch, [({}, ['A']), ({}, ['B'])], fail_fast=False)
+    self.assertEqual((0, {1: {}}), next(results))
+    first_reported.set()
+    self.assertEqual([(0, {0: {}})], list(results))
+
   @contextmanager
   def _coverage_engine(self):
     junit_run = self.prepare_execute(self.context())
@@ -54,6 +54,11 @@ class TestContext(Context):
 
     artifact_cache_stats = DummyArtifactCacheStats()
 
+    class DummySchedulingStats(object):
+      def add_execution(self, scope, stats): pass
+
+    scheduling_stats = DummySchedulingStats()
+
     def report_target_info(self, scope, target, keys, val): pass
 
 
@@ -29,6 +29,7 @@ from pants.build_graph.target import Target
 from pants.init.util import clean_global_runtime_state
 from pants.option.options_bootstrapper import OptionsBootstrapper
 from pants.option.scope import GLOBAL_SCOPE
+from pants.source.source_digest_cache import SourceDigestCache
 from pants.source.source_root import SourceRootConfig
 from pants.subsystem.subsystem import Subsystem
 from pants.task.goal_options_mixin import GoalOptionsMixin
@@ -286,12 +287,14 @@ class BaseTest(unittest.TestCase):
     """
     # Many tests use source root functionality via the SourceRootConfig.global_instance().
     # (typically accessed via Target.target_base), so we always set it up, for convenience.
+    # Likewise, the SourceDigestCache is used to fingerprint the sources of targets.
     for_subsystems = set(for_subsystems or ())
     for subsystem in for_subsystems:
       if subsystem.options_scope is None:
         raise TaskError('You must set a scope on your subsystem type before using it in tests.')
 
-    optionables = {SourceRootConfig} | self._build_configuration.subsystems() | for_subsystems
+    optionables = ({SourceRootConfig, SourceDigestCache} | self._build_configuration.subsystems() |
+                   for_subsystems)
 
     for_task_types = for_task_types or ()
     for task_type in for_task_types:
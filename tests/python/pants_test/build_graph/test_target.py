@@ -211,6 +211,26 @@ class TargetTest(TestBase):
     hash_value = '{}.{}'.format(target_hash, dep_hash)
     self.assertEqual(hash_value, target_c.transitive_invalidation_hash(fingerprint_strategy=fingerprint_strategy))
 
+  def test_transitive_invalidation_hash_deep(self):
+    targets = [self.make_target('t0', Target)]
+    for i in range(1, 1000):
+      targets.append(self.make_target('t{}'.format(i), Target, dependencies=[targets[-1]]))
+    self.assertIsNotNone(targets[-1].transitive_invalidation_hash())
+
+  def test_transitive_invalidation_hashes(self):
+    target_a = self.make_target('a', Target)
+    target_b = self.make_target('b', Target, dependencies=[target_a])
+    target_c = self.make_target('c', Target, dependencies=[target_b])
+    target_d = self.make_target('d', Target, dependencies=[target_a])
+
+    hashes = self.build_graph.transitive_invalidation_hashes([target_c, target_d])
+    self.assertEqual({target_c, target_d}, set(hashes))
+    expected = {}
+    for target in (target_c, target_d):
+      target.mark_transitive_invalidation_hash_dirty()
+      expected[target] = target.transitive_invalidation_hash()
+    self.assertEqual(expected, hashes)
+
   def test_has_sources(self):
     def sources(rel_path, *args):
       return Globs.create_fileset_with_spec(rel_path, *args)
@@ -4,12 +4,14 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import io
 import os
+import tarfile
 import unittest
 
-from pants.cache.artifact import DirectoryArtifact, TarballArtifact
+from pants.cache.artifact import ArtifactError, DirectoryArtifact, TarballArtifact
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
 
 
 class TarballArtifactTest(unittest.TestCase):
@@ -48,6 +50,86 @@ class TarballArtifactTest(unittest.TestCase):
 
       self.assertTrue(artifact.exists())
 
+  def test_extract_stream(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      tarball = os.path.join(tmpdir, 'some.tar.gz')
+      path = os.path.join(artifact_root, 'a', 'b', 'some.file')
+      with safe_open(path, 'w') as f:
+        f.write('contents')
+
+      TarballArtifact(artifact_root, tarball).collect([os.path.join(artifact_root, 'a')])
+      safe_rmtree(artifact_root)
+
+      artifact = TarballArtifact(artifact_root, os.path.join(tmpdir, 'nonexistent.tar'))
+      with open(tarball, 'rb') as f:
+        artifact.extract_stream(f)
+
+      with open(path) as f:
+        self.assertEquals('contents', f.read())
+      self.assertIn(path, list(artifact.get_paths()))
+
+  def test_uncompressed_codec(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      tarball = os.path.join(tmpdir, 'some.tar')
+      path = self.touch_file_in(artifact_root)
+
+      TarballArtifact(artifact_root, tarball, codec=TarballArtifact.UNCOMPRESSED).collect([path])
+      self.assertTrue(tarfile.is_tarfile(tarball))
+      with open(tarball, 'rb') as f:
+        self.assertNotEqual(b'\x1f\x8b', f.read(2))
+
+      os.unlink(path)
+      TarballArtifact(artifact_root, tarball).extract()
+      self.assertTrue(os.path.exists(path))
+
+  def test_codecs(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      path = os.path.join(artifact_root, 'a', 'some.file')
+      for codec in TarballArtifact.CODECS:
+        with safe_open(path, 'w') as f:
+          f.write(codec)
+        tarball = os.path.join(tmpdir, 'some.tgz')
+        TarballArtifact(artifact_root, tarball, compression=1, codec=codec).collect(
+          [os.path.join(artifact_root, 'a')])
+        safe_rmtree(artifact_root)
+
+        # The codec needn't be known to read the tarball.
+        artifact = TarballArtifact(artifact_root, tarball)
+        artifact.extract()
+        with open(path) as f:
+          self.assertEquals(codec, f.read())
+        self.assertIn(path, list(artifact.get_paths()))
+        safe_rmtree(artifact_root)
+
+        artifact = TarballArtifact(artifact_root, os.path.join(tmpdir, 'nonexistent.tar'))
+        with open(tarball, 'rb') as f:
+          artifact.extract_stream(f)
+        with open(path) as f:
+          self.assertEquals(codec, f.read())
+
+  def test_extract_stream_corrupt(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      tarball = os.path.join(tmpdir, 'some.tgz')
+      path = self.touch_file_in(artifact_root)
+      for codec in (TarballArtifact.LZ4, TarballArtifact.ZSTD):
+        TarballArtifact(artifact_root, tarball, compression=1, codec=codec).collect([path])
+        with open(tarball, 'rb') as f:
+          content = f.read()
+
+        artifact = TarballArtifact(artifact_root, tarball)
+        with self.assertRaises(ArtifactError):
+          artifact.extract_stream(io.BytesIO(content[:4] + b'not a compressed frame'))
+        with self.assertRaises(ArtifactError):
+          artifact.extract_stream(io.BytesIO(content[:len(content) // 2]))
+
+  def test_unknown_codec(self):
+    with self.assertRaises(ValueError):
+      TarballArtifact('artifacts', 'some.tar', codec='zip')
+
   def touch_file_in(self, artifact_root):
     path = os.path.join(artifact_root, 'some.file')
     with safe_open(path, 'w') as f:
@@ -8,8 +8,11 @@ import os
 import unittest
 from contextlib import contextmanager
 
+import mock
+
+from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import (NonfatalArtifactCacheError, call_insert,
-                                        call_use_cached_files)
+                                        call_use_cached_files, call_use_cached_files_many)
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.pinger import BestUrlSelector, InvalidRESTfulCacheProtoError
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -178,6 +181,70 @@ class TestArtifactCache(unittest.TestCase):
             self.assertTrue(os.path.exists(results_dir))
             self.assertTrue(len(os.listdir(results_dir)) == 0)
 
+  def test_store_and_use_artifact_streams(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_local_cache() as local:
+      tmp = TempLocalArtifactCache(local.artifact_root, compression=1)
+      with self.setup_test_file(local.artifact_root) as path:
+        with tmp.insert_paths(key, [path]) as tarball:
+          with open(tarball, 'rb') as f:
+            content = f.read()
+
+        with open(path, 'w') as outfile:
+          outfile.write(TEST_CONTENT2)
+
+        # Deliver the artifact in small chunks, as a slow download would.
+        chunks = (content[i:i + 7] for i in range(0, len(content), 7))
+        self.assertTrue(local.store_and_use_artifact(key, chunks))
+
+        with open(path, 'r') as infile:
+          self.assertEquals(TEST_CONTENT1, infile.read())
+        with open(local._cache_file_for_key(key), 'rb') as f:
+          self.assertEquals(content, f.read())
+
+  def test_codecs(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        with self.setup_test_file(artifact_root) as path:
+          for codec in TarballArtifact.CODECS:
+            key = CacheKey('{}_key'.format(codec), 'fake_hash')
+            cache = LocalArtifactCache(artifact_root, cache_root, compression=1, codec=codec)
+            cache.insert(key, [path])
+
+            # Changing the codec does not orphan the artifacts created with the previous one.
+            for other_codec in TarballArtifact.CODECS:
+              other_cache = LocalArtifactCache(artifact_root, cache_root, compression=1,
+                                               codec=other_codec)
+              with open(path, 'w') as outfile:
+                outfile.write(TEST_CONTENT2)
+              self.assertTrue(other_cache.use_cached_files(key))
+              with open(path, 'r') as infile:
+                self.assertEquals(TEST_CONTENT1, infile.read())
+
+  def test_store_and_use_artifact_mixed_codecs(self):
+    with self.setup_local_cache() as local:
+      with self.setup_test_file(local.artifact_root) as path:
+        for codec in TarballArtifact.CODECS:
+          key = CacheKey('{}_key'.format(codec), 'fake_hash')
+          tmp = TempLocalArtifactCache(local.artifact_root, compression=1, codec=codec)
+          with tmp.insert_paths(key, [path]) as tarball:
+            with open(tarball, 'rb') as f:
+              content = f.read()
+
+          with open(path, 'w') as outfile:
+            outfile.write(TEST_CONTENT2)
+          self.assertTrue(local.store_and_use_artifact(key, [content]))
+          with open(path, 'r') as infile:
+            self.assertEquals(TEST_CONTENT1, infile.read())
+
+  def test_restful_cache_url_suffix(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with temporary_dir() as artifact_root:
+      for codec in TarballArtifact.CODECS:
+        local = TempLocalArtifactCache(artifact_root, 1, codec=codec)
+        cache = RESTfulArtifactCache(artifact_root, BestUrlSelector(['http://localhost']), local)
+        self.assertEquals('muppet_key/fake_hash.tgz', cache._url_suffix_for_key(key))
+
   def test_multiproc(self):
     key = CacheKey('muppet_key', 'fake_hash')
 
@@ -193,6 +260,71 @@ class TestArtifactCache(unittest.TestCase):
         map(call_insert, [(cache, key, [path], False)])
       self.assertEquals(map(call_use_cached_files, [(cache, key, None)]), [True])
 
+  def test_many(self):
+    with self.setup_local_cache() as cache:
+      self._do_test_many(cache)
+
+    with self.setup_rest_cache() as cache:
+      self._do_test_many(cache)
+
+  def _do_test_many(self, cache):
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(4)]
+    with self.setup_test_file(cache.artifact_root) as path:
+      cache.insert(keys[1], [path])
+      cache.insert(keys[3], [path])
+
+      self.assertEquals([False, True, False, True], cache.has_many(keys))
+      results = call_use_cached_files_many((cache, [(key, None) for key in keys]))
+      self.assertEquals([False, True, False, True], [bool(res) for res in results])
+
+  def test_many_errors_are_per_key(self):
+    with self.setup_local_cache() as cache:
+      self._do_test_many_errors_are_per_key(cache)
+
+    with self.setup_rest_cache() as cache:
+      self._do_test_many_errors_are_per_key(cache)
+
+  def _do_test_many_errors_are_per_key(self, cache):
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(3)]
+    with self.setup_test_file(cache.artifact_root) as path:
+      for key in keys:
+        cache.insert(key, [path])
+
+    def fail_for_second_key(method):
+      def wrapped(cache_key, *args):
+        if cache_key == keys[1]:
+          raise NonfatalArtifactCacheError('Failed to read {}.'.format(cache_key))
+        return method(cache_key, *args)
+      return wrapped
+
+    with mock.patch.object(cache, 'has', fail_for_second_key(cache.has)):
+      self.assertEquals([True, False, True], cache.has_many(keys))
+    with mock.patch.object(cache, 'use_cached_files', fail_for_second_key(cache.use_cached_files)):
+      results = call_use_cached_files_many((cache, [(key, None) for key in keys]))
+      self.assertEquals([True, False, True], [bool(res) for res in results])
+
+  def test_local_backed_remote_cache_many(self):
+    with self.setup_server() as server:
+      with self.setup_local_cache() as local:
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        remote = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), tmp)
+        combined = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), local)
+
+        local_key = CacheKey('local_key', 'fake_hash')
+        remote_key = CacheKey('remote_key', 'fake_hash')
+        missing_key = CacheKey('missing_key', 'fake_hash')
+        with self.setup_test_file(local.artifact_root) as path:
+          local.insert(local_key, [path])
+          remote.insert(remote_key, [path])
+
+          keys = [local_key, remote_key, missing_key]
+          self.assertEquals([True, True, False], combined.has_many(keys))
+          self.assertEquals([True, True, False],
+                            [bool(res) for res in combined.use_cached_files_many(
+                              [(key, None) for key in keys])])
+          # The remote hit was backfilled.
+          self.assertTrue(local.has(remote_key))
+
   def test_failed_multiproc(self):
     key = CacheKey('muppet_key', 'fake_hash')
 
@@ -202,6 +334,7 @@ class TestArtifactCache(unittest.TestCase):
       with self.setup_test_file(cache.artifact_root) as path:
         map(call_insert, [(cache, key, [path], False)])
       self.assertFalse(map(call_use_cached_files, [(cache, key, None)])[0])
+      self.assertFalse(any(call_use_cached_files_many((cache, [(key, None)] * 2))))
 
   def test_successful_request_cleans_result_dir(self):
     key = CacheKey('muppet_key', 'fake_hash')
@@ -0,0 +1,66 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import unittest
+from contextlib import contextmanager
+
+from pants.cache import artifact_cache_executor
+from pants.cache.artifact_cache_executor import ArtifactCacheExecutor
+from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class ArtifactCacheExecutorTest(unittest.TestCase):
+
+  @contextmanager
+  def local_cache(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        yield LocalArtifactCache(artifact_root, cache_root, compression=1)
+
+  def keys(self, count):
+    return [CacheKey('key{}'.format(i), 'fake_hash') for i in range(count)]
+
+  def test_insert_and_use_cached_files(self):
+    with self.local_cache() as cache:
+      keys = self.keys(12)
+      inserts = []
+      for i, key in enumerate(keys[:8]):
+        path = os.path.join(cache.artifact_root, 'file{}'.format(i))
+        safe_file_dump(path, 'content{}'.format(i))
+        inserts.append((key, [path], False))
+
+      executor = ArtifactCacheExecutor(cache)
+      self.assertEqual([(i, True) for i in range(8)], sorted(executor.insert(inserts)))
+
+      results = sorted(executor.use_cached_files([(key, None) for key in keys]))
+      self.assertEqual(list(range(12)), [index for index, _ in results])
+      self.assertEqual([True] * 8 + [False] * 4, [bool(result) for _, result in results])
+
+  def test_no_work(self):
+    with self.local_cache() as cache:
+      self.assertEqual([], list(ArtifactCacheExecutor(cache).use_cached_files([])))
+
+  def test_worker_keeps_cache(self):
+    calls = []
+
+    def record(cache, chunk):
+      calls.append(cache)
+      return chunk
+
+    with self.local_cache() as cache:
+      executor = ArtifactCacheExecutor(cache)
+      args = (executor._cache_id, executor._pickled_cache, record, [(0, 'item')])
+      try:
+        self.assertEqual([(0, 'item')], artifact_cache_executor._call_chunk(args))
+        artifact_cache_executor._call_chunk(args)
+        self.assertIs(calls[0], calls[1])
+        self.assertEqual(cache.artifact_root, calls[0].artifact_root)
+      finally:
+        artifact_cache_executor._caches_by_id.clear()
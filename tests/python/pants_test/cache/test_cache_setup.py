@@ -10,8 +10,9 @@ from mock import Mock
 
 from pants.cache.cache_setup import (CacheFactory, CacheSetup, CacheSpec, CacheSpecFormatError,
                                      EmptyCacheSpecError, InvalidCacheSpecError,
-                                     LocalCacheSpecRequiredError, RemoteCacheSpecRequiredError,
-                                     TooManyCacheSpecsError)
+                                     LocalCacheSpecRequiredError, LocalStoreOptionsError,
+                                     RemoteCacheSpecRequiredError, TooManyCacheSpecsError)
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache
 from pants.cache.resolver import Resolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -82,7 +83,13 @@ class TestCacheSetup(TestBase):
       'write_to': [self.EMPTY_URI],
       'write': False,
       'compression_level': 1,
+      'compression_codec': 'gzip',
       'max_entries_per_target': 1,
+      'local_store': 'tarball',
+      'local_max_size': None,
+      'local_max_age': None,
+      'local_restore_strategy': 'copy',
+      'max_concurrent_requests': 8,
       'write_permissions': None,
       'dereference_symlinks': True,
       # Usually read from global scope.
@@ -161,10 +168,10 @@ class TestCacheSetup(TestBase):
                       cache_factory._resolve(self.CACHE_SPEC_LOCAL_RESOLVE))
 
   def test_cache_spec_parsing(self):
-    def mk_cache(spec, resolver=None):
+    def mk_cache(spec, resolver=None, **options):
       Subsystem.reset()
       self.set_options_for_scope(CacheSetup.subscope(DummyTask.options_scope),
-                                 read_from=spec, compression=1)
+                                 read_from=spec, compression=1, **options)
       self.context(for_task_types=[DummyTask])  # Force option initialization.
       cache_factory = CacheSetup.create_cache_factory_for_task(
         self.create_task(),
@@ -172,14 +179,15 @@ class TestCacheSetup(TestBase):
         resolver=resolver)
       return cache_factory.get_read_cache()
 
-    def check(expected_type, spec, resolver=None):
-      cache = mk_cache(spec, resolver=resolver)
+    def check(expected_type, spec, resolver=None, **options):
+      cache = mk_cache(spec, resolver=resolver, **options)
       self.assertIsInstance(cache, expected_type)
       self.assertEquals(cache.artifact_root, self.pants_workdir)
 
     with temporary_dir() as tmpdir:
       cachedir = os.path.join(tmpdir, 'cachedir')  # Must be a real path, so we can safe_mkdir it.
       check(LocalArtifactCache, [cachedir])
+      check(ContentAddressedArtifactCache, [cachedir], local_store='content-addressed')
       check(RESTfulArtifactCache, ['http://localhost/bar'])
       check(RESTfulArtifactCache, ['https://localhost/bar'])
       check(RESTfulArtifactCache, [cachedir, 'http://localhost/bar'])
@@ -200,6 +208,12 @@ class TestCacheSetup(TestBase):
       with self.assertRaises(TooManyCacheSpecsError):
         mk_cache([tmpdir, self.REMOTE_URI_1, self.REMOTE_URI_2])
 
+      with self.assertRaises(LocalStoreOptionsError):
+        mk_cache([cachedir], local_store='content-addressed', local_max_size=1024)
+
+      with self.assertRaises(LocalStoreOptionsError):
+        mk_cache([cachedir], local_store='content-addressed', local_max_age=60)
+
   def test_read_cache_available(self):
     self.assertFalse(self.cache_factory(ignore=True, read=True, read_from=[self.EMPTY_URI])
                      .read_cache_available())
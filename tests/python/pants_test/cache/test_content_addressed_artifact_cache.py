@@ -0,0 +1,189 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import unittest
+from contextlib import contextmanager
+
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
+from pants.cache.local_artifact_cache import TempLocalArtifactCache
+from pants.cache.pinger import BestUrlSelector
+from pants.cache.restful_artifact_cache import RESTfulArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import open_tar, temporary_dir
+from pants.util.dirutil import chmod_plus_x, safe_file_dump, safe_rmtree, safe_walk
+from pants_test.cache.cache_server import cache_server
+
+
+TEST_CONTENT1 = b'muppet'
+TEST_CONTENT2 = b'kermit'
+
+
+class ContentAddressedArtifactCacheTest(unittest.TestCase):
+
+  @contextmanager
+  def setup_cache(self, **kwargs):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        yield ContentAddressedArtifactCache(artifact_root, cache_root, compression=1, **kwargs)
+
+  def write(self, cache, relpath, content):
+    path = os.path.join(cache.artifact_root, relpath)
+    safe_file_dump(path, content)
+    return path
+
+  def read(self, path):
+    with open(path, 'rb') as fp:
+      return fp.read()
+
+  def blobs(self, cache):
+    # The blobs are stored in subdirectories of the blob root, next to the index of their references.
+    return [os.path.join(root, f) for root, _, files in safe_walk(cache._blob_root) for f in files
+            if root != cache._blob_root]
+
+  def test_round_trip(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      path = self.write(cache, 'a/b/muppet.txt', TEST_CONTENT1)
+      self.assertFalse(cache.has(key))
+      self.assertFalse(cache.use_cached_files(key))
+
+      cache.insert(key, [os.path.join(cache.artifact_root, 'a')])
+      self.assertTrue(cache.has(key))
+
+      safe_file_dump(path, TEST_CONTENT2)
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEquals(TEST_CONTENT1, self.read(path))
+
+      cache.delete(key)
+      self.assertFalse(cache.has(key))
+      self.assertEquals([], self.blobs(cache))
+
+  def test_identical_content_is_stored_once(self):
+    key1 = CacheKey('target1', 'fake_hash')
+    key2 = CacheKey('target2', 'fake_hash')
+    with self.setup_cache() as cache:
+      cache.insert(key1, [self.write(cache, 'one/a.txt', TEST_CONTENT1),
+                          self.write(cache, 'one/b.txt', TEST_CONTENT1)])
+      cache.insert(key2, [self.write(cache, 'two/a.txt', TEST_CONTENT1)])
+      self.assertEquals(1, len(self.blobs(cache)))
+
+      # The blob survives until the last entry referencing it is deleted.
+      cache.delete(key1)
+      self.assertEquals(1, len(self.blobs(cache)))
+      cache.delete(key2)
+      self.assertEquals([], self.blobs(cache))
+
+  def test_prune_removes_unreferenced_blobs(self):
+    with self.setup_cache(max_entries_per_target=1) as cache:
+      path = self.write(cache, 'muppet.txt', TEST_CONTENT1)
+      cache.insert(CacheKey('muppet_key', 'hash1'), [path])
+      safe_file_dump(path, TEST_CONTENT2)
+      cache.insert(CacheKey('muppet_key', 'hash2'), [path])
+
+      self.assertFalse(cache.has(CacheKey('muppet_key', 'hash1')))
+      self.assertTrue(cache.has(CacheKey('muppet_key', 'hash2')))
+      blobs = self.blobs(cache)
+      self.assertEquals(1, len(blobs))
+      self.assertEquals(TEST_CONTENT2, self.read(blobs[0]))
+
+  def test_mode_is_restored(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      path = self.write(cache, 'bin/muppet', TEST_CONTENT1)
+      chmod_plus_x(path)
+      cache.insert(key, [path])
+      os.unlink(path)
+
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertTrue(os.access(path, os.X_OK))
+
+  def test_hardlink_restore(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache(restore_strategy=ContentAddressedArtifactCache.RESTORE_HARDLINK) as cache:
+      path = self.write(cache, 'muppet.txt', TEST_CONTENT1)
+      os.chmod(path, 0o644)
+      cache.insert(key, [path])
+      os.unlink(path)
+
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEquals(TEST_CONTENT1, self.read(path))
+      blob, = self.blobs(cache)
+      self.assertEquals(os.stat(blob).st_ino, os.stat(path).st_ino)
+
+  def test_prune_after_hardlink_restore(self):
+    key1 = CacheKey('muppet_key', 'hash1')
+    key2 = CacheKey('muppet_key', 'hash2')
+    with self.setup_cache(restore_strategy=ContentAddressedArtifactCache.RESTORE_HARDLINK,
+                          max_entries_per_target=1) as cache:
+      results_dir = os.path.join(cache.artifact_root, 'results')
+      path = self.write(cache, 'results/muppet.txt', TEST_CONTENT1)
+      os.chmod(path, 0o644)
+      cache.insert(key1, [results_dir])
+      self.assertTrue(cache.use_cached_files(key1, results_dir=results_dir))
+
+      # Storing the next entry prunes the first, while its restored outputs still link its blob.
+      cache.insert(key2, [self.write(cache, 'other/kermit.txt', TEST_CONTENT2)])
+      self.assertFalse(cache.has(key1))
+      self.assertEquals(TEST_CONTENT1, self.read(path))
+
+      safe_rmtree(results_dir)
+      cache.delete(key2)
+      self.assertEquals([], self.blobs(cache))
+
+  def test_unreadable_entry_is_removed(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      cache.insert(key, [self.write(cache, 'muppet.txt', TEST_CONTENT1)])
+      refs_dir = os.path.join(cache._entry_for_key(key), ContentAddressedArtifactCache.REFS_DIR)
+      for ref in os.listdir(refs_dir):
+        os.unlink(os.path.join(refs_dir, ref))
+
+      result = cache.use_cached_files(key)
+      self.assertFalse(result)
+      self.assertIsNotNone(result.err)
+      self.assertFalse(cache.has(key))
+
+  def test_backfill_from_remote_cache(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with cache_server() as server:
+      with self.setup_cache() as local:
+        remote = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]),
+                                      TempLocalArtifactCache(local.artifact_root, compression=1))
+        combined = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), local)
+
+        path = self.write(local, 'muppet.txt', TEST_CONTENT1)
+        remote.insert(key, [path])
+        self.assertFalse(local.has(key))
+
+        safe_file_dump(path, TEST_CONTENT2)
+        self.assertTrue(combined.use_cached_files(key))
+        self.assertEquals(TEST_CONTENT1, self.read(path))
+        self.assertTrue(local.has(key))
+
+        safe_file_dump(path, TEST_CONTENT2)
+        self.assertTrue(local.use_cached_files(key))
+        self.assertEquals(TEST_CONTENT1, self.read(path))
+
+  def test_store_tarball_with_hardlinks(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      path = self.write(cache, 'a/muppet.txt', TEST_CONTENT1)
+      link = os.path.join(cache.artifact_root, 'a/kermit.txt')
+      os.link(path, link)
+      with temporary_dir() as tmpdir:
+        tarball = os.path.join(tmpdir, 'artifact.tar')
+        with open_tar(tarball, 'w', dereference=False) as tarout:
+          tarout.add(os.path.join(cache.artifact_root, 'a'), arcname='a')
+        with open_tar(tarball, 'r') as tarin:
+          self.assertTrue(any(tarinfo.islnk() for tarinfo in tarin))
+        cache._store_tarball(key, tarball)
+
+      os.unlink(path)
+      os.unlink(link)
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEquals(TEST_CONTENT1, self.read(path))
+      self.assertEquals(TEST_CONTENT1, self.read(link))
@@ -0,0 +1,79 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import time
+import unittest
+from contextlib import contextmanager
+
+from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.cache.local_cache_index import LocalCacheIndex
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class LocalCacheIndexTest(unittest.TestCase):
+
+  @contextmanager
+  def setup_caches(self, num_caches=2, **index_kwargs):
+    """Yield caches for several tasks, sharing an index over their common cache root."""
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        index = LocalCacheIndex(cache_root, **index_kwargs)
+        yield index, [LocalArtifactCache(artifact_root, os.path.join(cache_root, 'task{}'.format(i)),
+                                         compression=0, index=index)
+                      for i in range(num_caches)]
+
+  def insert(self, cache, name, size=1000):
+    path = os.path.join(cache.artifact_root, name)
+    safe_file_dump(path, os.urandom(size))
+    key = CacheKey(name, 'fake_hash')
+    cache.insert(key, [path])
+    return key
+
+  def test_evicts_least_recently_used_across_caches(self):
+    with self.setup_caches(max_size=250000) as (index, (cache1, cache2)):
+      first = self.insert(cache1, 'first', size=100000)
+      second = self.insert(cache2, 'second', size=100000)
+      # Use the first artifact, so that the second is the least recently used.
+      self.assertTrue(cache1.use_cached_files(first))
+
+      third = self.insert(cache1, 'third', size=100000)
+      self.assertTrue(cache1.has(first))
+      self.assertFalse(cache2.has(second))
+      self.assertTrue(cache1.has(third))
+      self.assertLessEqual(index.total_size(), 250000)
+
+  def test_evicts_by_age(self):
+    with self.setup_caches(max_age=60) as (index, (cache1, cache2)):
+      old = self.insert(cache1, 'old')
+      with index._cursor() as c:
+        c.execute("""UPDATE artifacts SET atime = ?""", [time.time() - 120])
+
+      new = self.insert(cache2, 'new')
+      self.assertFalse(cache1.has(old))
+      self.assertTrue(cache2.has(new))
+
+  def test_removal_is_recorded(self):
+    with self.setup_caches() as (index, (cache1, _)):
+      key = self.insert(cache1, 'artifact')
+      self.assertGreater(index.total_size(), 0)
+      cache1.delete(key)
+      self.assertEquals(0, index.total_size())
+
+  def test_indexes_existing_artifacts(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = LocalArtifactCache(artifact_root, os.path.join(cache_root, 'task'), compression=0)
+        key = self.insert(cache, 'artifact')
+
+        index = LocalCacheIndex(cache_root, max_size=1)
+        indexed = LocalArtifactCache(artifact_root, os.path.join(cache_root, 'task'),
+                                     compression=0, index=index)
+        self.assertGreater(index.total_size(), 0)
+        self.assertEquals([cache._cache_file_for_key(key)], index.evict())
+        self.assertFalse(indexed.has(key))
@@ -0,0 +1,153 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import unittest
+
+import mock
+
+from pants.base.build_root import BuildRoot
+from pants.build_graph.address import Address
+from pants.build_graph.injectables_mixin import InjectablesMixin
+from pants.build_graph.target import Target
+from pants.engine.fs import Snapshot
+from pants.engine.legacy.dependees_index import DependeesIndex, DependentGraph
+from pants.engine.legacy.graph import HydratedTargets
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_delete, safe_file_dump
+
+
+class DependentGraphTest(unittest.TestCase):
+
+  def setUp(self):
+    self.graph = DependentGraph()
+    # a <- b <- c <- d, and a <- d
+    self.graph.inject_dependencies(Address.parse('b'), [Address.parse('a')])
+    self.graph.inject_dependencies(Address.parse('c'), [Address.parse('b')])
+    self.graph.inject_dependencies(Address.parse('d'), [Address.parse('c'), Address.parse('a')])
+
+  def dependents(self, method, *specs):
+    return sorted(a.spec for a in method([Address.parse(s) for s in specs]))
+
+  def test_dependents(self):
+    self.assertEqual(['b:b', 'd:d'], self.dependents(self.graph.dependents_of_addresses, 'a'))
+
+  def test_transitive_dependents(self):
+    self.assertEqual(['b:b', 'c:c', 'd:d'],
+                     self.dependents(self.graph.transitive_dependents_of_addresses, 'a'))
+    self.assertEqual(['c:c', 'd:d'],
+                     self.dependents(self.graph.transitive_dependents_of_addresses, 'a', 'b'))
+
+
+class FakeInjectables(InjectablesMixin):
+  options_scope = 'fake-injectables'
+  spec_mapping = {'library': ['//:library']}
+
+  @classmethod
+  def global_instance(cls):
+    return cls()
+
+  @property
+  def injectables_spec_mapping(self):
+    return self.spec_mapping
+
+
+class InjectingTarget(Target):
+  @classmethod
+  def subsystems(cls):
+    return super(InjectingTarget, cls).subsystems() + (FakeInjectables,)
+
+
+class FakeScheduler(object):
+  """Serves BUILD files and targets from dicts, recording the directories it parses."""
+
+  def __init__(self, targets_by_dir):
+    self.targets_by_dir = targets_by_dir
+    self.parsed_dirs = []
+
+  def product_request(self, product, subjects):
+    if product is Snapshot:
+      return [mock.Mock(files=[mock.Mock(path=os.path.join(d, 'BUILD'))
+                               for d in self.targets_by_dir])]
+    assert product is HydratedTargets
+    directories = [spec.directory for spec in subjects[0].dependencies]
+    self.parsed_dirs.extend(directories)
+    return [mock.Mock(dependencies=[self.hydrated_target(Address(d, name), deps)
+                                    for d in directories
+                                    for name, deps in self.targets_by_dir[d].items()])]
+
+  def hydrated_target(self, address, dependencies):
+    adaptor = mock.Mock(address=address,
+                        type_alias='target',
+                        dependencies=[Address.parse(d) for d in dependencies])
+    adaptor.kwargs.return_value = {}
+    return mock.Mock(adaptor=adaptor)
+
+
+class DependeesIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self.buildroot = self.enter(temporary_dir())
+    self.enter(BuildRoot().temporary(self.buildroot))
+    self.workdir = self.enter(temporary_dir())
+    self.scheduler = FakeScheduler({'a': {'a': []},
+                                    'b': {'b': ['a']},
+                                    'c': {'c': ['b'], 'other': []}})
+    for directory in self.scheduler.targets_by_dir:
+      self.write_build_file(directory)
+
+  def enter(self, context):
+    value = context.__enter__()
+    self.addCleanup(context.__exit__, None, None, None)
+    return value
+
+  def write_build_file(self, directory, content=None):
+    safe_file_dump(os.path.join(self.buildroot, directory, 'BUILD'), content or directory)
+
+  def update(self, target_types=None):
+    self.scheduler.parsed_dirs = []
+    return DependeesIndex(self.scheduler, target_types or {'target': Target}, self.workdir).update()
+
+  def transitive_dependents(self, graph, spec):
+    return sorted(a.spec for a in graph.transitive_dependents_of_addresses([Address.parse(spec)]))
+
+  def test_parses_only_changed_dirs(self):
+    graph = self.update()
+    self.assertEqual(['a', 'b', 'c'], sorted(self.scheduler.parsed_dirs))
+    self.assertEqual(['b:b', 'c:c'], self.transitive_dependents(graph, 'a'))
+
+    graph = self.update()
+    self.assertEqual([], self.scheduler.parsed_dirs)
+    self.assertEqual(['b:b', 'c:c'], self.transitive_dependents(graph, 'a'))
+
+    self.scheduler.targets_by_dir['c'] = {'c': [], 'other': ['a']}
+    self.write_build_file('c', 'changed')
+    graph = self.update()
+    self.assertEqual(['c'], self.scheduler.parsed_dirs)
+    self.assertEqual(['b:b', 'c:other'], self.transitive_dependents(graph, 'a'))
+
+  def test_removed_dirs(self):
+    self.update()
+    del self.scheduler.targets_by_dir['b']
+    safe_delete(os.path.join(self.buildroot, 'b', 'BUILD'))
+    graph = self.update()
+    self.assertEqual([], self.scheduler.parsed_dirs)
+    self.assertEqual([], self.transitive_dependents(graph, 'a'))
+
+  def test_reparses_for_other_target_types(self):
+    self.update()
+    self.update(target_types={'target': Target, 'other': Target})
+    self.assertEqual(['a', 'b', 'c'], sorted(self.scheduler.parsed_dirs))
+
+  def test_reparses_for_other_injectables(self):
+    target_types = {'target': InjectingTarget}
+    self.update(target_types=target_types)
+    self.update(target_types=target_types)
+    self.assertEqual([], self.scheduler.parsed_dirs)
+
+    with mock.patch.object(FakeInjectables, 'spec_mapping', {'library': ['//:other-library']}):
+      self.update(target_types=target_types)
+    self.assertEqual(['a', 'b', 'c'], sorted(self.scheduler.parsed_dirs))
@@ -0,0 +1,62 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+
+import mock
+
+from pants.build_graph.address import Address, BuildFileAddress
+from pants.engine.legacy.source_mapper import SourceOwnerIndex
+
+
+class SourceOwnerIndexTest(unittest.TestCase):
+
+  def hydrated_target(self, address, source=None, globs=None, excludes=None):
+    kwargs = {}
+    if source:
+      kwargs['source'] = source
+    if globs:
+      filespec = {'globs': globs}
+      if excludes:
+        filespec['exclude'] = [{'globs': excludes}]
+      kwargs['sources'] = mock.Mock(filespec=filespec)
+    adaptor = mock.Mock(address=address)
+    adaptor.kwargs.return_value = kwargs
+    return mock.Mock(adaptor=adaptor)
+
+  def setUp(self):
+    self.index = SourceOwnerIndex()
+    self.index.add(self.hydrated_target(Address.parse('a:literal'), globs=['a/Foo.java']))
+    self.index.add(self.hydrated_target(Address.parse('a:glob'),
+                                        globs=['a/*.java'], excludes=['a/Bar.java']))
+    self.index.add(self.hydrated_target(Address.parse('a:recursive'), globs=['a/**/*.py']))
+    self.index.add(self.hydrated_target(Address.parse('b:bin'), source='main.py'))
+    self.index.add(self.hydrated_target(BuildFileAddress(rel_path='c/BUILD.c', target_name='c')))
+    self.index.add(self.hydrated_target(Address.parse('d:d')))
+
+  def owners(self, path):
+    return sorted(a.spec for a in self.index.owners_of(path))
+
+  def test_literal_and_glob_sources(self):
+    self.assertEqual(['a:glob', 'a:literal'], self.owners('a/Foo.java'))
+    self.assertEqual([], self.owners('a/b/Foo.java'))
+
+  def test_excludes(self):
+    self.assertEqual([], self.owners('a/Bar.java'))
+
+  def test_recursive_globs(self):
+    self.assertEqual(['a:recursive'], self.owners('a/foo.py'))
+    self.assertEqual(['a:recursive'], self.owners('a/b/c/foo.py'))
+    self.assertEqual([], self.owners('b/foo.py'))
+
+  def test_source(self):
+    self.assertEqual(['b:bin'], self.owners('b/main.py'))
+
+  def test_build_files(self):
+    self.assertEqual(['c:c'], self.owners('c/BUILD.c'))
+    self.assertEqual([], self.owners('c/BUILD'))
+    self.assertEqual(['d:d'], self.owners('d/BUILD'))
+    self.assertEqual([], self.owners('d/README'))
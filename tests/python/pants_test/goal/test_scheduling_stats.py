@@ -0,0 +1,23 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+
+from pants.goal.scheduling_stats import SchedulingStats
+
+
+class SchedulingStatsTest(unittest.TestCase):
+
+  def test_add_execution(self):
+    scheduling_stats = SchedulingStats()
+    stats = {'num_jobs': 3}
+    scheduling_stats.add_execution('compile.zinc', stats)
+    scheduling_stats.add_execution('compile.javac', {'num_jobs': 1})
+
+    self.assertEqual([{'scope': 'compile.zinc', 'num_jobs': 3},
+                      {'scope': 'compile.javac', 'num_jobs': 1}],
+                     scheduling_stats.get_all())
+    self.assertEqual({'num_jobs': 3}, stats)
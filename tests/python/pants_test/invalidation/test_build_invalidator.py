@@ -4,11 +4,13 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
 import tempfile
 import unittest
 from contextlib import contextmanager
 
-from pants.invalidation.build_invalidator import BuildInvalidator, CacheKey
+from pants.invalidation.build_invalidator import BuildInvalidator, CacheKey, SqliteBuildInvalidator
+from pants.subsystem.subsystem import Subsystem
 from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_rmtree
 from pants_test.subsystem.subsystem_util import init_subsystem
@@ -61,10 +63,12 @@ class BaseBuildInvalidatorTest(unittest.TestCase):
 
 
 class BuildInvalidatorTest(BaseBuildInvalidatorTest):
+  invalidator_type = BuildInvalidator
+
   @contextmanager
   def invalidator(self):
     with temporary_dir() as root:
-      yield BuildInvalidator(root)
+      yield self.invalidator_type(root)
 
   def test_cache_key_previous(self):
     with self.invalidator() as invalidator:
@@ -134,13 +138,74 @@ class BuildInvalidatorTest(BaseBuildInvalidatorTest):
       self.assertTrue(invalidator.needs_update(key1))
       self.assertTrue(invalidator.needs_update(key2))
 
+  def test_many(self):
+    with self.invalidator() as invalidator:
+      key1 = self.cache_key(key_id='1', key_hash='1')
+      key2 = self.cache_key(key_id='2', key_hash='2')
+      uncacheable_key = self.uncacheable_cache_key(key_id='3')
+      keys = [key1, key2, uncacheable_key]
+      self.assertEqual([None, None, None], invalidator.previous_keys(keys))
+      self.assertEqual([True, True, True], invalidator.needs_update_many(keys))
+
+      invalidator.update_many(keys)
+      self.assertEqual([key1, key2, None], invalidator.previous_keys(keys))
+      self.assertEqual([False, False, True], invalidator.needs_update_many(keys))
+
+      changed_key2 = self.update_hash(key2, new_hash='1/137')
+      self.assertEqual([False, True], invalidator.needs_update_many([key1, changed_key2]))
+      self.assertEqual(key2, invalidator.previous_key(changed_key2))
+
+  def test_many_empty(self):
+    with self.invalidator() as invalidator:
+      self.assertEqual([], invalidator.previous_keys([]))
+      self.assertEqual([], invalidator.needs_update_many([]))
+      invalidator.update_many([])
+
+
+class SqliteBuildInvalidatorTest(BuildInvalidatorTest):
+  invalidator_type = SqliteBuildInvalidator
+
+  def test_many_more_than_batch_size(self):
+    with self.invalidator() as invalidator:
+      keys = [self.cache_key(key_id=str(i), key_hash=str(i))
+              for i in range(SqliteBuildInvalidator._MAX_BATCH_SIZE * 2 + 1)]
+      invalidator.update_many(keys[::2])
+      self.assertEqual([i % 2 == 1 for i in range(len(keys))], invalidator.needs_update_many(keys))
+
+  def test_flush(self):
+    with temporary_dir() as root:
+      key1 = self.cache_key(key_id='1', key_hash='1')
+      key2 = self.cache_key(key_id='2', key_hash='2')
+      invalidator = SqliteBuildInvalidator(root)
+      invalidator.update_many([key1, key2])
+      self.assertTrue(SqliteBuildInvalidator(root).needs_update(key1))
+
+      invalidator.flush()
+      self.assertEqual([False, False], SqliteBuildInvalidator(root).needs_update_many([key1, key2]))
+
+      invalidator.force_invalidate(key1)
+      self.assertTrue(invalidator.needs_update(key1))
+      self.assertFalse(SqliteBuildInvalidator(root).needs_update(key1))
+      invalidator.flush()
+      self.assertEqual([True, False], SqliteBuildInvalidator(root).needs_update_many([key1, key2]))
+
+  def test_single_file(self):
+    with temporary_dir() as root:
+      invalidator = SqliteBuildInvalidator(root, scope='gen')
+      invalidator.update_many([self.cache_key(key_id=str(i)) for i in range(10)])
+      self.assertEqual([SqliteBuildInvalidator.DB_NAME], os.listdir(invalidator._root))
+
 
 class BuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
+  store = BuildInvalidator.Factory.STORE_FILES
+
   def setUp(self):
     pants_workdir = tempfile.mkdtemp()
     self.addCleanup(safe_rmtree, pants_workdir)
 
-    init_subsystem(BuildInvalidator.Factory, options={'': {'pants_workdir': pants_workdir}})
+    Subsystem.reset()
+    init_subsystem(BuildInvalidator.Factory, options={'': {'pants_workdir': pants_workdir},
+                                                      'build-invalidator': {'store': self.store}})
     self.root_invalidator = BuildInvalidator.Factory.create()
     self.scoped_invalidator1 = BuildInvalidator.Factory.create(build_task='gen')
     self.scoped_invalidator2 = BuildInvalidator.Factory.create(build_task='resolve')
@@ -168,3 +233,10 @@ class BuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
 
     self.assertTrue(self.scoped_invalidator1.needs_update(self.key))
     self.assertFalse(self.scoped_invalidator2.needs_update(self.key))
+
+
+class SqliteBuildInvalidatorFactoryTest(BuildInvalidatorFactoryTest):
+  store = BuildInvalidator.Factory.STORE_SQLITE
+
+  def test_store(self):
+    self.assertIsInstance(self.scoped_invalidator1, SqliteBuildInvalidator)
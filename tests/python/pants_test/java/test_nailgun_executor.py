@@ -4,10 +4,16 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import threading
+import unittest
+
 import mock
 import psutil
+from six.moves.queue import Queue
 
-from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_client import NailgunClient
+from pants.java.nailgun_executor import NailgunExecutor, NailgunExecutorPool, NailgunProcess
+from pants.util.process_handler import subprocess
 from pants_test.test_base import TestBase
 
 
@@ -50,3 +56,113 @@ class NailgunExecutorTest(TestBase):
       )
       self.assertFalse(self.executor.is_alive())
       mock_as_process.assert_called_with(self.executor)
+
+  def test_needs_recycling_after_max_runs(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               max_runs=2)
+    self.assertFalse(executor._needs_recycling())
+    executor.write_metadata_by_name('test', 'runs', '2')
+    self.assertTrue(executor._needs_recycling())
+
+  def test_needs_recycling_after_max_rss(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               max_rss=1000)
+    with mock.patch.object(NailgunExecutor, '_as_process', **PATCH_OPTS) as mock_as_process:
+      mock_as_process.return_value = fake_process(memory_info=mock.Mock(rss=1000))
+      self.assertFalse(executor._needs_recycling())
+      mock_as_process.return_value = fake_process(memory_info=mock.Mock(rss=1001))
+      self.assertTrue(executor._needs_recycling())
+
+  def test_health_check_restarts_unconnectable_server(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               health_check=True)
+    with mock.patch.multiple(NailgunExecutor,
+                             _check_nailgun_state=mock.Mock(return_value=(True, False)),
+                             ensure_connectable=mock.Mock(
+                               side_effect=NailgunClient.NailgunConnectionError(
+                                 address=('127.0.0.1', 0), pid=None, wrapped_exc=None,
+                                 traceback=None)),
+                             terminate=mock.DEFAULT,
+                             _spawn_nailgun_server=mock.DEFAULT) as mocks:
+      executor._get_nailgun_client([], [], None, None, None)
+      self.assertEqual(1, mocks['terminate'].call_count)
+      self.assertEqual(1, mocks['_spawn_nailgun_server'].call_count)
+
+
+class NailgunExecutorPoolTest(unittest.TestCase):
+
+  def fake_executor(self, name):
+    executor = mock.Mock(spec=NailgunExecutor)
+    executor.name = name
+    executor.distribution = mock.Mock(java='java')
+    return executor
+
+  def blocking_executor(self, name, started, finish):
+    executor = self.fake_executor(name)
+    def run(*args):
+      started.put(name)
+      finish.wait(10)
+      return 0
+    executor._runner.return_value.run.side_effect = run
+    return executor
+
+  def test_dispatches_to_least_loaded(self):
+    started = Queue()
+    finish = threading.Event()
+    pool = NailgunExecutorPool([self.blocking_executor('ng_pool_test_{}'.format(i), started, finish)
+                                for i in range(2)])
+
+    processes = [pool.runner([], 'Main').spawn() for _ in range(3)]
+    self.assertEqual(['ng_pool_test_0', 'ng_pool_test_0', 'ng_pool_test_1'],
+                     sorted(started.get(timeout=10) for _ in processes))
+    finish.set()
+    self.assertEqual([0, 0, 0], [process.wait() for process in processes])
+    self.assertEqual({'ng_pool_test_0': 0, 'ng_pool_test_1': 0},
+                     {e.name: NailgunExecutorPool._loads[e.name] for e in pool.executors})
+
+  def test_releases_on_error(self):
+    executor = self.fake_executor('ng_pool_test_error')
+    executor._runner.return_value.run.side_effect = NailgunExecutor.Error('boom')
+    pool = NailgunExecutorPool([executor])
+    with self.assertRaises(NailgunExecutor.Error):
+      pool.execute([], 'Main')
+    self.assertEqual(0, NailgunExecutorPool._loads['ng_pool_test_error'])
+
+
+class NailgunProcessTest(unittest.TestCase):
+
+  def test_wait(self):
+    process = NailgunProcess(mock.Mock(), lambda: 42, 'java')
+    self.assertEqual(42, process.wait())
+    self.assertEqual(42, process.poll())
+
+  def test_wait_raises_errors(self):
+    def run():
+      raise NailgunExecutor.Error('boom')
+    process = NailgunProcess(mock.Mock(), run, 'java')
+    with self.assertRaises(NailgunExecutor.Error):
+      process.wait()
+
+  def test_timeout_and_terminate(self):
+    done = threading.Event()
+    executor = mock.Mock()
+    executor.terminate.side_effect = done.set
+    process = NailgunProcess(executor, lambda: 0 if done.wait(10) else 1, 'java')
+    self.assertIsNone(process.poll())
+    with self.assertRaises(subprocess.TimeoutExpired):
+      process.wait(timeout=0.01)
+
+    process.terminate()
+    self.assertEqual(0, process.wait())
@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import textwrap
 import unittest
 
+from pants.engine.fs import FileContent
 from pants.option.config import Config
 from pants.util.contextutil import temporary_file
 
@@ -88,6 +89,23 @@ that.""",
     config = Config.load([])
     self.assertEquals([], config.sections())
 
+  def test_load_file_contents_cached(self):
+    Config.reset_cache()
+    ini1 = FileContent('ini1', self.ini1_content.encode('utf-8'))
+    ini2 = FileContent('ini2', self.ini2_content.encode('utf-8'))
+    config = Config.load_file_contents([ini1, ini2])
+    self.assertEquals('/a/b/42', config.get('a', 'path'))
+
+    # Unchanged files are shared with earlier loads with the same seed values.
+    changed_ini2 = FileContent('ini2', b'[a]\nfast: False\n')
+    changed = Config.load_file_contents([ini1, changed_ini2])
+    self.assertIs(config.configs()[1], changed.configs()[1])
+    self.assertEquals('False', changed.get('a', 'fast'))
+
+    seeded = Config.load_file_contents([ini1], seed_values={'buildroot': '/seeded'})
+    self.assertIsNot(config.configs()[1], seeded.configs()[0])
+    self.assertEquals('/seeded', seeded.get(Config.DEFAULT_SECTION, 'buildroot'))
+
   def _check_defaults(self, accessor, default):
     self.assertEquals(None, accessor('c', 'fast'))
     self.assertEquals(None, accessor('c', 'preempt', None))
@@ -594,6 +594,25 @@ class OptionsTest(unittest.TestCase):
     with self.assertRaises(FrozenRegistration):
       options.register(GLOBAL_SCOPE, '--arg2')
 
+  def test_restore_registration_state(self):
+    options = self._parse('./pants')
+    state = options.registration_state()
+
+    args = shlex.split(str('./pants -n=5 compile.java --no-verbose'))
+    restored = Options.create(env={},
+                              config=self._create_config({}),
+                              known_scope_infos=OptionsTest._known_scope_infos,
+                              args=args,
+                              option_tracker=OptionTracker())
+    restored.restore_registration_state(state)
+    self.assertEqual(5, restored.for_global_scope().num)
+    self.assertFalse(restored.for_scope('compile.java').verbose)
+    self.assertEqual(5, restored.for_scope('compile.java').num)
+    with self.assertRaises(OptionAlreadyRegistered):
+      restored.register('simple', '--spam')
+    with self.assertRaises(FrozenRegistration):
+      restored.register(GLOBAL_SCOPE, '--new-option')
+
   def test_implicit_value(self):
     options = self._parse('./pants')
     self.assertEqual('default', options.for_global_scope().implicit_valuey)
@@ -0,0 +1,79 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+import mock
+
+from pants.pantsd.service.fs_event_service import FSEventService
+from pants.pantsd.service.scheduler_service import SchedulerService
+from pants_test.test_base import TestBase
+
+
+class SchedulerServiceTest(TestBase):
+
+  def setUp(self):
+    super(SchedulerServiceTest, self).setUp()
+    self.fs_event_service = mock.Mock(
+      PANTS_PID_SUBSCRIPTION_NAME=FSEventService.PANTS_PID_SUBSCRIPTION_NAME)
+    self.legacy_graph_scheduler = mock.Mock()
+    self.mock_scheduler = self.legacy_graph_scheduler.scheduler
+    self.mock_scheduler.invalidate_files.return_value = 3
+    self.service = SchedulerService(self.fs_event_service,
+                                    self.legacy_graph_scheduler,
+                                    '/build_root',
+                                    invalidation_globs=[],
+                                    pantsd_pidfile=None)
+    self.service.setup(threading.RLock(), threading.RLock())
+
+  def event(self, files, subscription='all_files', is_fresh_instance=False):
+    return dict(subscription=subscription, is_fresh_instance=is_fresh_instance,
+                files=[f.encode('utf-8') for f in files])
+
+  def test_coalesces_events(self):
+    self.service._enqueue_fs_event(self.event(['a/BUILD', 'b/BUILD']))
+    self.service._enqueue_fs_event(self.event(['b/BUILD', 'c/BUILD']))
+    self.service._process_event_queue()
+
+    self.mock_scheduler.invalidate_files.assert_called_once_with(['a/BUILD', 'b/BUILD', 'c/BUILD'])
+    self.assertEqual({'batches': 1,
+                      'events': 2,
+                      'files': 3,
+                      'invalidated_nodes': 3,
+                      'last_batch_invalidated_nodes': 3},
+                     self.service.invalidation_metrics())
+
+  def test_logs_invalidation_metrics(self):
+    self.service._enqueue_fs_event(self.event(['a/BUILD']))
+    with mock.patch.object(self.service, '_logger') as logger:
+      self.service._process_event_queue()
+
+    logger.debug.assert_any_call('invalidated %d nodes for %d files, invalidation metrics: %s',
+                                 3, 1, self.service.invalidation_metrics())
+
+  def test_ignores_initial_event(self):
+    self.service._enqueue_fs_event(self.event(['a/BUILD'], is_fresh_instance=True))
+    self.service._process_event_queue()
+
+    self.assertFalse(self.mock_scheduler.invalidate_files.called)
+    self.assertTrue(self.service._watchman_is_running.is_set())
+
+  def test_pidfile_event(self):
+    self.service._enqueue_fs_event(
+      self.event(['.pids/pantsd'], subscription=FSEventService.PANTS_PID_SUBSCRIPTION_NAME))
+    self.service._enqueue_fs_event(self.event(['a/BUILD']))
+    with mock.patch.object(SchedulerService, '_maybe_invalidate_scheduler_pidfile') as check_pid:
+      self.service._process_event_queue()
+
+    check_pid.assert_called_once_with()
+    self.mock_scheduler.invalidate_files.assert_called_once_with(['a/BUILD'])
+
+  def test_invalid_event(self):
+    self.service._enqueue_fs_event(dict(subscription='all_files', files=[]))
+    self.service._process_event_queue()
+
+    self.assertFalse(self.mock_scheduler.invalidate_files.called)
+    self.assertFalse(self.service._watchman_is_running.is_set())
@@ -10,6 +10,8 @@ from contextlib import contextmanager
 from textwrap import dedent
 from unittest import skipIf
 
+import mock
+
 from pants.scm.git import Git
 from pants.scm.scm import Scm
 from pants.util.contextutil import environment_as, pushd, temporary_dir
@@ -286,6 +288,34 @@ class GitTest(unittest.TestCase):
         self.assertEqual('master', git.branch_name)
         self.assertEqual('second', git.tag_name, msg='annotated tags should be found')
 
+  def test_changed_files_from_commit(self):
+    with environment_as(GIT_DIR=self.gitdir, GIT_WORK_TREE=self.worktree):
+      with safe_open(os.path.join(self.worktree, 'dir', 'new'), 'w') as fp:
+        fp.write('new')
+      os.unlink(os.path.join(self.worktree, 'loop1'))
+      touch(os.path.join(self.worktree, 'loop1', 'f'))
+      chmod_plus_x(self.readme_file)
+      subprocess.check_call(['git', 'rm', '-q', 'dir/f'])
+      subprocess.check_call(['git', 'add', '-A', '.'])
+      subprocess.check_call(['git', 'commit', '-qm', 'Shuffle things around.'])
+
+    expected = {'README', 'dir/f', 'dir/new', 'loop1', 'loop1/f'}
+    with mock.patch.object(self.git, 'merge_base', wraps=self.git.merge_base) as merge_base:
+      self.assertEqual(expected, self.git.changed_files(from_commit='HEAD^'))
+      self.assertEqual(expected, self.git.changed_files(from_commit='HEAD^'))
+      self.assertEqual(1, merge_base.call_count)
+    self.assertEqual({'f', 'new'},
+                     self.git.changed_files(from_commit='HEAD^',
+                                            relative_to=os.path.join(self.worktree, 'dir')))
+
+  def test_readers_share_cat_file(self):
+    for rev in (self.initial_rev, self.current_rev):
+      with self.git.repo_reader(rev).open('README') as fp:
+        fp.read()
+    self.assertEqual(['--batch', '--batch-check'], sorted(self.git._cat_file._processes))
+    self.git._cat_file.close()
+    self.assertEqual({}, self.git._cat_file._processes)
+
   def test_detect_worktree(self):
     with temporary_dir() as _clone:
       with pushd(_clone):
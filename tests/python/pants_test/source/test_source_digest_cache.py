@@ -0,0 +1,103 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from hashlib import sha1
+
+import mock
+
+from pants.source import source_digest_cache
+from pants.source.source_digest_cache import SourceDigestCache
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_file_dump, safe_rmtree
+from pants_test.subsystem.subsystem_util import init_subsystem
+
+
+class SourceDigestCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.workdir = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.workdir)
+    self.root = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.root)
+
+  def cache(self, **options):
+    Subsystem.reset()
+    init_subsystem(SourceDigestCache, options={'': {'pants_workdir': self.workdir},
+                                               'source-digest-cache': options})
+    return SourceDigestCache.global_instance()
+
+  def write(self, name, content, age=60):
+    path = os.path.join(self.root, name)
+    safe_file_dump(path, content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+  def count_digested(self, cache, paths):
+    with mock.patch.object(source_digest_cache, 'digest_file',
+                           wraps=source_digest_cache.digest_file) as digest_file:
+      digests = cache.digests(paths)
+    return digests, digest_file.call_count
+
+  def test_digests(self):
+    path = self.write('a.txt', 'a_contents')
+    self.assertEqual([sha1(b'a_contents').hexdigest()], self.cache().digests([path]))
+
+  def test_unchanged_files_are_not_rehashed(self):
+    paths = [self.write('a.txt', 'a_contents'), self.write('b.txt', 'b_contents')]
+    cache = self.cache()
+    digests, digested = self.count_digested(cache, paths)
+    self.assertEqual(2, digested)
+
+    # Even across runs.
+    self.assertEqual((digests, 0), self.count_digested(self.cache(), paths))
+
+  def test_changed_files_are_rehashed(self):
+    path = self.write('a.txt', 'a_contents')
+    cache = self.cache()
+    cache.digests([path])
+
+    self.write('a.txt', 'b_contents', age=30)
+    self.assertEqual(([sha1(b'b_contents').hexdigest()], 1), self.count_digested(cache, [path]))
+
+  def test_recently_modified_files_are_not_remembered(self):
+    path = self.write('a.txt', 'a_contents', age=0)
+    cache = self.cache()
+    cache.digests([path])
+    self.assertEqual(1, self.count_digested(cache, [path])[1])
+
+  def test_disabled(self):
+    path = self.write('a.txt', 'a_contents')
+    cache = self.cache(enabled=False)
+    cache.digests([path])
+    self.assertEqual(1, self.count_digested(cache, [path])[1])
+    self.assertFalse(os.path.exists(os.path.join(self.workdir, 'source_digests')))
+
+  def test_connection_is_reused(self):
+    paths = [self.write('a.txt', 'a_contents')]
+    cache = self.cache()
+    with mock.patch.object(sqlite3, 'connect', wraps=sqlite3.connect) as connect:
+      cache.digests(paths)
+      cache.digests(paths)
+    self.assertEqual(1, connect.call_count)
+
+  def test_many(self):
+    paths = [self.write('{}.txt'.format(i), str(i))
+             for i in range(SourceDigestCache._MAX_BATCH_SIZE * 2 + 1)]
+    cache = self.cache()
+    digests = cache.digests(paths)
+    self.assertEqual([sha1(str(i)).hexdigest() for i in range(len(paths))], digests)
+    self.assertEqual((digests, 0), self.count_digested(cache, paths))
+
+  def test_uninitialized(self):
+    Subsystem.reset()
+    path = self.write('a.txt', 'a_contents')
+    self.assertEqual([sha1(b'a_contents').hexdigest()], SourceDigestCache.digests_for([path]))
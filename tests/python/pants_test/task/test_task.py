@@ -10,6 +10,7 @@ from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.build_graph.files import Files
 from pants.cache.cache_setup import CacheSetup
+from pants.invalidation.build_invalidator import BuildInvalidator
 from pants.option.arg_splitter import GLOBAL_SCOPE
 from pants.subsystem.subsystem import Subsystem
 from pants.subsystem.subsystem_client_mixin import SubsystemDependency
@@ -238,6 +239,22 @@ class TaskTest(TaskTestBase):
     self.assertFalse(was_valid)
     self.assertContent(vt, good_content)
 
+  def test_sqlite_store(self):
+    self.set_options_for_scope(BuildInvalidator.Factory.options_scope,
+                               store=BuildInvalidator.Factory.STORE_SQLITE)
+    task, target = self._fixture(incremental=False)
+
+    # Clean - this is the first run so the VT is invalid.
+    self._create_clean_file(target, self._file_contents)
+    _, was_valid = task.execute()
+    self.assertFalse(was_valid)
+
+    # A new task, as in a later run, sees the fingerprint recorded by the first one.
+    task = self.create_task(self.context(target_roots=[target]))
+    task._incremental = False
+    _, was_valid = task.execute()
+    self.assertTrue(was_valid)
+
   def test_incremental(self):
     """Run three times with two unique fingerprints."""
 
@@ -4,11 +4,16 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
 import unittest
+from multiprocessing.pool import ThreadPool
 
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
-                                                                 Job, JobExistsError,
-                                                                 NoRootJobError, UnknownJobError)
+                                                                 ExecutionStats, Job, JobExistsError,
+                                                                 JobTiming, NoRootJobError,
+                                                                 UnknownJobError)
+from pants.util.contextutil import temporary_dir
+from pants.util.job_durations import JobDurations
 
 
 class ImmediatelyExecutingPool(object):
@@ -18,6 +23,20 @@ class ImmediatelyExecutingPool(object):
     work.func(*work.args_tuples[0])
 
 
+class SingleThreadPool(object):
+  num_workers = 1
+
+  def __init__(self):
+    self._pool = ThreadPool(self.num_workers)
+
+  def submit_async_work(self, work):
+    return self._pool.map_async(lambda args: work.func(*args), work.args_tuples)
+
+  def close(self):
+    self._pool.close()
+    self._pool.join()
+
+
 class PrintLogger(object):
 
   def error(self, msg):
@@ -271,3 +290,99 @@ class ExecutionGraphTest(unittest.TestCase):
 
     self.assertEqual(self.jobs_run, ['A'])
     self.assertEqual(failures, ['A', 'B1', 'B2', 'C1', 'C2', 'E'])
+
+  def test_priorities_from_measured_durations(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = JobDurations(path)
+      durations.record("B", 10.0)
+      durations.record("C", 2.0)
+      durations.save()
+
+      # B was estimated to be the smaller job, but took longer to run.
+      jobs = [self.job("A", passing_fn, ["B", "C"], 1),
+              self.job("B", passing_fn, [], 2),
+              self.job("C", passing_fn, [], 4),
+              self.job("D", passing_fn, [], 8)]
+      JobDurations(path).apply_to(jobs)
+      exec_graph = ExecutionGraph(jobs)
+
+      # Jobs without measurements are scaled by the observed ratio of duration to estimated size.
+      self.assertEqual(exec_graph._job_priority, {"A": 2.0, "B": 12.0, "C": 4.0, "D": 16.0})
+
+  def test_stats(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, []),
+                                 self.job("B", passing_fn, ["A"]),
+                                 self.job("C", passing_fn, [])])
+    self.execute(exec_graph)
+
+    stats = exec_graph.stats
+    self.assertEqual({"A", "B", "C"}, set(stats.timings))
+    for timing in stats.timings.values():
+      self.assertLessEqual(timing.ready, timing.start)
+      self.assertLessEqual(timing.start, timing.finish)
+    self.assertGreaterEqual(stats.timings["B"].start, stats.timings["A"].finish)
+    self.assertEqual(["A", "B"], stats.critical_path())
+    self.assertEqual(stats.timings["A"].duration + stats.timings["B"].duration,
+                     stats.critical_path_times["B"])
+    self.assertLessEqual(stats.utilization, 1)
+
+
+class ExecutionStatsTest(unittest.TestCase):
+
+  def setUp(self):
+    # B finishes first, but C has to wait for A, and then for a free worker.
+    self.stats = ExecutionStats({"A": [], "B": [], "C": ["A", "B"]},
+                                {"A": JobTiming(100, 100, 102, "w1"),
+                                 "B": JobTiming(100, 100, 101, "w2"),
+                                 "C": JobTiming(102, 103, 104, "w2")},
+                                num_workers=2)
+
+  def test_critical_paths(self):
+    self.assertEqual(["A", "C"], self.stats.critical_path())
+    self.assertEqual(["A", "C"], self.stats.actual_critical_path())
+    self.assertEqual(3, self.stats.ideal_time)
+    self.assertEqual(4, self.stats.wall_time)
+    self.assertAlmostEqual(4 / 3, self.stats.ideal_speedup)
+
+  def test_utilization(self):
+    self.assertEqual(0.5, self.stats.utilization)
+    self.assertEqual({"w1": [(102, 104)], "w2": [(101, 103)]}, self.stats.idle_gaps())
+
+  def test_get_all(self):
+    stats = self.stats.get_all()
+    self.assertEqual([{"key": "A", "start": 0, "finish": 2, "queue_wait": 0, "worker": "w1"},
+                      {"key": "C", "start": 3, "finish": 4, "queue_wait": 1, "worker": "w2"}],
+                     stats["critical_path"])
+    self.assertEqual({"w1": {"jobs": 1, "idle_time": 2, "idle_gaps": [[2, 4]]},
+                      "w2": {"jobs": 2, "idle_time": 2, "idle_gaps": [[1, 3]]}},
+                     stats["workers"])
+    self.assertEqual(3, stats["num_jobs"])
+
+  def test_empty(self):
+    stats = ExecutionStats({}, {}, num_workers=2)
+    self.assertEqual(0, stats.wall_time)
+    self.assertEqual(0, stats.utilization)
+    self.assertEqual(1, stats.ideal_speedup)
+    self.assertEqual([], stats.get_all()["critical_path"])
+
+class WorkersPullJobsExecutionGraphTest(ExecutionGraphTest):
+
+  def setUp(self):
+    super(WorkersPullJobsExecutionGraphTest, self).setUp()
+    self.pool = SingleThreadPool()
+    self.addCleanup(self.pool.close)
+
+  def execute(self, exec_graph):
+    exec_graph.execute(self.pool, PrintLogger(), workers_pull_jobs=True)
+
+  def test_simple_unconnected_tree(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, ["B"]),
+                                 self.job("B", passing_fn, []),
+                                 self.job("C", passing_fn, []),
+    ])
+
+    self.execute(exec_graph)
+
+    # A becomes ready before the worker pulls its next job, and is chosen over C by key.
+    self.assertEqual(self.jobs_run, ["B", "A", "C"])
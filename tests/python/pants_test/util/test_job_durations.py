@@ -0,0 +1,58 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import unittest
+
+from pants.util.contextutil import temporary_dir
+from pants.util.job_durations import JobDurations
+
+
+class SizedJob(object):
+  def __init__(self, key, size):
+    self.key = key
+    self.size = size
+
+
+class JobDurationsTest(unittest.TestCase):
+
+  def test_save_and_load(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = JobDurations(path)
+      self.assertIsNone(durations.get('A'))
+      durations.record('A', 1.5)
+      self.assertEqual(1.5, durations.get('A'))
+      durations.save()
+
+      self.assertEqual(1.5, JobDurations(path).get('A'))
+      self.assertIsNone(JobDurations(path).get('B'))
+
+  def test_missing(self):
+    with temporary_dir() as tmpdir:
+      jobs = [SizedJob('A', 1)]
+      JobDurations(os.path.join(tmpdir, 'durations.json')).apply_to(jobs)
+      self.assertEqual(1, jobs[0].size)
+
+  def test_unreadable(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      with open(path, 'w') as fp:
+        fp.write('not json')
+      jobs = [SizedJob('A', 1)]
+      JobDurations(path).apply_to(jobs)
+      self.assertEqual(1, jobs[0].size)
+
+  def test_apply_to_scales_unmeasured(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = JobDurations(path)
+      durations.record('A', 10.0)
+      durations.record('B', 2.0)
+
+      jobs = [SizedJob('A', 2), SizedJob('B', 4), SizedJob('C', 8)]
+      durations.apply_to(jobs)
+      self.assertEqual([10.0, 2.0, 16.0], [job.size for job in jobs])